@@ -167,9 +167,14 @@ class Agent:
                 max_tokens=self.model.model_settings.max_tokens if hasattr(self.model, 'model_settings') else 1000
             )
             
-            async for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            try:
+                async for chunk in response:
+                    if chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Close the HTTP response so an abandoned or cancelled stream
+                # stops pulling (and paying for) the rest of the completion.
+                await response.close()
                     
         except Exception as e:
             logger.error(f"Error in agent stream: {str(e)}")
@@ -18,8 +18,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 # Import your existing services
-from app.services.assistant_bridge import AssistantBridge
-from app.services.workato_integration import WorkatoConfig
+from services.assistant_bridge import AssistantBridge
+from services.workato_integration import WorkatoConfig
+from services.generation_control import GenerationTask
 from services.service_db import DBService
 
 # Set up logging
@@ -53,6 +54,8 @@ class ConnectionParams(BaseModel):
 
 # Store active connections and their associated thread IDs
 active_connections: Dict[str, AssistantBridge] = {}
+# The reply task and the receive loop share each socket; frames must not interleave
+send_locks: Dict[WebSocket, asyncio.Lock] = {}
 thread_connections: Dict[str, str] = {}  # Maps thread_ids to connection_ids
 
 # Authentication dependency
@@ -62,11 +65,91 @@ async def get_api_key(x_api_key: str = Header(None)):
     # In production, you would validate the API key against your database
     return x_api_key
 
+async def send_json(websocket: WebSocket, data: Dict[str, Any]):
+    """Send one frame, serialized with any other sender on the same socket."""
+    lock = send_locks.get(websocket)
+    if lock is None:
+        await websocket.send_json(data)
+        return
+    async with lock:
+        await websocket.send_json(data)
+
+async def respond_to_message(websocket: WebSocket, bridge: AssistantBridge, user_input: str, stream: bool, thread_id: Optional[str] = None):
+    """Send the assistant reply for one message. Runs as a cancellable task."""
+    try:
+        # Handle streaming response
+        if stream:
+            try:
+                # Send response in chunks
+                tool_used = False
+                full_response = ""
+
+                async for chunk, event_type in bridge.chat_streaming(user_input):
+                    if event_type == "raw_response" or event_type == "message":
+                        # Text content
+                        await send_json(websocket, {
+                            "type": "stream",
+                            "content": chunk,
+                            "event_type": event_type
+                        })
+                        full_response += chunk
+                    elif event_type == "tool_call":
+                        # Tool call event
+                        tool_used = True
+                        await send_json(websocket, {
+                            "type": "tool",
+                            "tool": "call",
+                            "name": chunk
+                        })
+                    elif event_type == "tool_output":
+                        # Tool output event
+                        await send_json(websocket, {
+                            "type": "tool",
+                            "tool": "output",
+                            "content": chunk
+                        })
+
+                # Send completion message
+                await send_json(websocket, {
+                    "type": "completion",
+                    "content": full_response,
+                    "tool_used": tool_used,
+                    "thread_id": thread_id
+                })
+
+            except Exception as e:
+                logger.error(f"Error during streaming: {str(e)}")
+                await send_json(websocket, {
+                    "type": "error",
+                    "error": f"Error during response streaming: {str(e)}"
+                })
+        else:
+            # Handle non-streaming response
+            try:
+                response = await bridge.chat(user_input)
+                await send_json(websocket, {
+                    "type": "response",
+                    "content": response,
+                    "thread_id": thread_id
+                })
+            except Exception as e:
+                logger.error(f"Error during chat: {str(e)}")
+                await send_json(websocket, {
+                    "type": "error",
+                    "error": f"Error processing message: {str(e)}"
+                })
+    except asyncio.CancelledError:
+        logger.info("Response generation cancelled")
+        raise
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time chat with the assistant."""
     await websocket.accept()
+    send_locks[websocket] = asyncio.Lock()
     connection_id = str(uuid.uuid4())
+    # Replies stream in a background task so stop commands and disconnects are seen promptly
+    generation = GenerationTask()
     
     try:
         # Wait for connection parameters
@@ -76,7 +159,7 @@ async def websocket_endpoint(websocket: WebSocket):
         
         # Validate required parameters
         if not params.get("solomon_consumer_key") or not params.get("assistant_id"):
-            await websocket.send_json({
+            await send_json(websocket, {
                 "type": "error",
                 "error": "Missing required parameters: solomon_consumer_key and assistant_id are required"
             })
@@ -92,7 +175,7 @@ async def websocket_endpoint(websocket: WebSocket):
         # Retrieve OpenAI API key using DBService
         openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
         if not openai_api_key:
-            await websocket.send_json({
+            await send_json(websocket, {
                 "type": "error",
                 "error": "Invalid Solomon Consumer Key"
             })
@@ -123,7 +206,7 @@ async def websocket_endpoint(websocket: WebSocket):
             thread_connections[thread_id] = connection_id
             
             # Notify client that the assistant is ready
-            await websocket.send_json({
+            await send_json(websocket, {
                 "type": "ready",
                 "message": "Assistant initialized successfully",
                 "thread_id": thread_id
@@ -135,13 +218,25 @@ async def websocket_endpoint(websocket: WebSocket):
                 message_json = await websocket.receive_text()
                 message_data = json.loads(message_json)
                 
+                # Abort the reply in progress, including the upstream OpenAI stream or run
+                if message_data.get("type") == "stop" or (
+                    message_data.get("type") == "command" and message_data.get("command") == "stop"
+                ):
+                    stopped = await generation.cancel()
+                    await send_json(websocket, {
+                        "type": "system",
+                        "message": "Response stopped" if stopped else "No response in progress"
+                    })
+                    continue
+
                 # Process commands
                 if message_data.get("type") == "command":
                     command = message_data.get("command")
                     
                     if command == "clear_history":
+                        await generation.cancel()
                         bridge.clear_history()
-                        await websocket.send_json({
+                        await send_json(websocket, {
                             "type": "system",
                             "message": "Conversation history cleared"
                         })
@@ -149,7 +244,7 @@ async def websocket_endpoint(websocket: WebSocket):
 
                     elif command == "get_history":
                         history = bridge.get_conversation_history()
-                        await websocket.send_json({
+                        await send_json(websocket, {
                             "type": "history",
                             "history": history
                         })
@@ -161,77 +256,26 @@ async def websocket_endpoint(websocket: WebSocket):
                     if not user_input.strip():
                         continue
 
+                    if generation.is_running:
+                        await send_json(websocket, {
+                            "type": "error",
+                            "error": "A response is already in progress. Send a stop command first."
+                        })
+                        continue
+
                     # Send acknowledgment
-                    await websocket.send_json({
+                    await send_json(websocket, {
                         "type": "system",
                         "message": "Processing your message..."
                     })
 
-                    # Handle streaming response
-                    if message_data.get("stream", True):
-                        try:
-                            # Send response in chunks
-                            tool_used = False
-                            full_response = ""
-
-                            async for chunk, event_type in bridge.chat_streaming(user_input):
-                                if event_type == "raw_response" or event_type == "message":
-                                    # Text content
-                                    await websocket.send_json({
-                                        "type": "stream",
-                                        "content": chunk,
-                                        "event_type": event_type
-                                    })
-                                    full_response += chunk
-                                elif event_type == "tool_call":
-                                    # Tool call event
-                                    tool_used = True
-                                    await websocket.send_json({
-                                        "type": "tool",
-                                        "tool": "call",
-                                        "name": chunk
-                                    })
-                                elif event_type == "tool_output":
-                                    # Tool output event
-                                    await websocket.send_json({
-                                        "type": "tool",
-                                        "tool": "output",
-                                        "content": chunk
-                                    })
-
-                            # Send completion message
-                            await websocket.send_json({
-                                "type": "completion",
-                                "content": full_response,
-                                "tool_used": tool_used,
-                                "thread_id": thread_id
-                            })
-
-                        except Exception as e:
-                            logger.error(f"Error during streaming: {str(e)}")
-                            await websocket.send_json({
-                                "type": "error",
-                                "error": f"Error during response streaming: {str(e)}"
-                            })
-                    else:
-                        # Handle non-streaming response
-                        try:
-                            response = await bridge.chat(user_input)
-                            await websocket.send_json({
-                                "type": "response",
-                                "content": response,
-                                "thread_id": thread_id
-                            })
-                        except Exception as e:
-                            logger.error(f"Error during chat: {str(e)}")
-                            await websocket.send_json({
-                                "type": "error",
-                                "error": f"Error processing message: {str(e)}"
-                            })
+                    generation.start(respond_to_message(websocket, bridge, user_input, message_data.get("stream", True), thread_id))
 
+        except WebSocketDisconnect:
+            raise
         except Exception as e:
             logger.error(f"Error initializing bridge: {str(e)}")
-            await websocket.send_json({
+            await send_json(websocket, {
                 "type": "error",
                 "error": f"Error initializing assistant: {str(e)}"
             })
@@ -243,6 +287,9 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"Error in websocket connection: {str(e)}")
     finally:
+        # Stop paying for a reply nobody will read
+        await generation.cancel()
+        send_locks.pop(websocket, None)
         # Clean up connection
         if connection_id in active_connections:
             bridge = active_connections[connection_id]
@@ -1,6 +1,12 @@
+import time
+# Measured from here, so interpreter startup itself isn't included
+IMPORT_STARTED = time.perf_counter()
+
 import sys
 import os
 import json
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Dict, Any
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
@@ -15,16 +21,46 @@ import yaml
 import functools
 import logging
 from services.service_db import DBService
+from services.conversation_mux import ConversationMux, ConversationLimitError, DEFAULT_CONVERSATION_ID
+from services.ws_codec import JsonCodec, FrameDecodeError, negotiate_codec
+from services.http_client import close_http_session
+from services.upstream_scheduler import close_openai_http_clients
+from helpers.aws_helpers import secrets
+from services.access_log import access_log, setup_logging, shutdown_logging
+from services.metrics import websocket_connections
+from services.tracing import tracer, parse_traceparent, SERVER
+from services.startup import startup_stats, warm_up, STARTUP_WARMUP
 
 # Add the parent directory to sys.path to make 'tools' module discoverable
 sys.path.append(str(Path(__file__).parent.parent))
 
-# Set up logging
+# Set up logging; records are written by a background thread
 logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # Fetch the application secret once so request paths only read the cache
+    if secrets.enabled and not await asyncio.to_thread(secrets.preload):
+        logger.warning("Application secret could not be preloaded; lookups will retry on demand")
+    startup_stats.record("lifespan", time.perf_counter() - started)
+    logger.info(f"Ready to serve {(time.perf_counter() - IMPORT_STARTED) * 1000:.0f}ms after import started")
+
+    # Build the heavy clients while already serving, instead of at import or on the first request
+    warmup = asyncio.create_task(asyncio.to_thread(warm_up)) if STARTUP_WARMUP else None
+    yield
+
+    if warmup is not None and not warmup.done():
+        logger.info("Shutting down before startup warm-up finished")
+    # Release the pooled upstream connections shared by the routers
+    await close_http_session()
+    await close_openai_http_clients()
+    shutdown_logging()
+
 # Initialize the FastAPI application
-app = FastAPI(title="OpenAPI Assistants V2.0", version="0.1.0")
+app = FastAPI(title="OpenAPI Assistants V2.0", version="0.1.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -44,15 +80,25 @@ app.include_router(router_completions)
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        # Several conversations may stream over one socket; serialize their frames
+        self._send_locks: Dict[WebSocket, asyncio.Lock] = {}
+        # Frame encoding negotiated by each socket
+        self._codecs: Dict[WebSocket, JsonCodec] = {}
         
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, codec: JsonCodec = None):
         await websocket.accept()
         self.active_connections.append(websocket)
+        self._send_locks[websocket] = asyncio.Lock()
+        self._codecs[websocket] = codec or JsonCodec()
+        websocket_connections.set(len(self.active_connections))
         logger.info(f"New WebSocket connection. Total connections: {len(self.active_connections)}")
         
     def disconnect(self, websocket: WebSocket):
+        self._send_locks.pop(websocket, None)
+        self._codecs.pop(websocket, None)
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+            websocket_connections.set(len(self.active_connections))
             logger.info(f"WebSocket disconnected. Remaining connections: {len(self.active_connections)}")
         
     async def send_personal_message(self, message: str, websocket: WebSocket):
@@ -63,155 +109,221 @@ class ConnectionManager:
             await connection.send_text(message)
     
     async def send_json(self, data: Dict[str, Any], websocket: WebSocket):
-        await websocket.send_json(data)
+        codec = self._codecs.get(websocket) or JsonCodec()
+        payload = codec.encode(data)
+        lock = self._send_locks.get(websocket)
+        if lock is None:
+            await self._send_encoded(websocket, payload, codec)
+            return
+        async with lock:
+            await self._send_encoded(websocket, payload, codec)
+    
+    @staticmethod
+    async def _send_encoded(websocket: WebSocket, payload, codec: JsonCodec):
+        if codec.binary:
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_text(payload)
+    
+    async def receive_json(self, websocket: WebSocket) -> Dict[str, Any]:
+        """Receive one frame in the socket's negotiated encoding."""
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        raw = message.get("text")
+        if raw is None:
+            raw = message.get("bytes")
+        codec = self._codecs.get(websocket) or JsonCodec()
+        return codec.decode(raw)
 
 # Initialize the connection manager
 manager = ConnectionManager()
 
+async def send_frame(websocket: WebSocket, frame_type: str, data: Dict[str, Any], conversation_id: str = None):
+    """Send a frame, tagged with its conversation when the socket is multiplexed."""
+    frame = {"type": frame_type, "data": data}
+    if conversation_id is not None:
+        frame["conversation_id"] = conversation_id
+    await manager.send_json(frame, websocket)
+
+async def stream_chat_response(bridge, message: str, websocket: WebSocket, conversation_id: str = None):
+    """Stream one assistant reply to the client. Runs as a cancellable task."""
+    with tracer.span("ws stream", attributes={"ws.conversation_id": conversation_id}):
+        await _stream_chat_response(bridge, message, websocket, conversation_id)
+
+async def _stream_chat_response(bridge, message: str, websocket: WebSocket, conversation_id: str = None):
+    try:
+        # Use streaming mode for better real-time experience
+        await send_frame(websocket, "processing_started", {"message": "Processing your message..."}, conversation_id)
+        
+        async for event in bridge.chat_streaming(message):
+            content = event[0] if isinstance(event, tuple) else event.data.get("content", "")
+            event_type = event[1] if isinstance(event, tuple) else event.type
+            
+            if event_type == "tool_call" or event_type == "tool_event":
+                await send_frame(websocket, "tool_usage", {"message": content}, conversation_id)
+            elif event_type == "message" or event_type == "content_chunk":
+                await send_frame(websocket, "content_chunk", {"content": content}, conversation_id)
+        
+        await send_frame(websocket, "processing_complete", {"message": "Message processing complete"}, conversation_id)
+        
+    except asyncio.CancelledError:
+        logger.info(f"Generation cancelled for conversation {conversation_id}")
+        raise
+    except Exception as e:
+        try:
+            await send_frame(websocket, "error", {"message": f"Error processing message: {str(e)}"}, conversation_id)
+        except Exception:
+            pass
+
 # WebSocket endpoint for assistant chat
+#
+# A socket can carry several conversations at once. Every frame may include a
+# "conversation_id"; frames without one use the "default" conversation, so
+# single-conversation clients keep working unchanged. The consumer key is
+# resolved once per socket and reused by later "initialize" frames.
+#
+# Clients choose the frame encoding when connecting with the optional
+# "protocol_version" and "encoding" query parameters (see services/ws_codec.py).
+# Without them the original JSON frames are used.
 @app.websocket("/ws/assistant/{assistant_id}")
 async def websocket_endpoint(websocket: WebSocket, assistant_id: str):
-    await manager.connect(websocket)
+    codec = negotiate_codec(
+        websocket.query_params.get("protocol_version"),
+        websocket.query_params.get("encoding")
+    )
+    await manager.connect(websocket, codec)
+    
+    # Bridges for every conversation on this socket; replies stream as background tasks
+    conversations = ConversationMux()
+    
     try:
         # Send welcome message
-        await manager.send_json({
-            "type": "connection_established",
-            "data": {
-                "assistant_id": assistant_id,
-                "message": "Connected to the assistant service"
-            }
-        }, websocket)
+        await send_frame(websocket, "connection_established", {
+            "assistant_id": assistant_id,
+            "message": "Connected to the assistant service",
+            "max_conversations": conversations.max_conversations,
+            "protocol_version": codec.protocol_version,
+            "encoding": codec.encoding
+        })
         
-        from app.services.assistant_bridge import AssistantBridge, StreamEvent
+        from services.assistant_bridge import AssistantBridge, StreamEvent
         
-        # Maintain the bridge instance for this connection
-        bridge = None
+        # Authentication shared by all conversations on this socket
+        authenticated_consumer_key = None
+        openai_api_key = None
         
         while True:
-            data = await websocket.receive_json()
+            try:
+                data = await manager.receive_json(websocket)
+            except FrameDecodeError as e:
+                await send_frame(websocket, "error", {"message": str(e)})
+                continue
+            message_type = data.get("type")
+            conversation_id = str(data.get("conversation_id") or DEFAULT_CONVERSATION_ID)
             
-            # Handle different message types
-            if data.get("type") == "initialize":
-                # Initialize the assistant bridge using Solomon Consumer Key
-                solomon_consumer_key = data.get("solomon_consumer_key")
-                vector_store_ids = data.get("vector_store_ids", [])
+            # One span per frame; clients may continue their own trace with "traceparent"
+            with tracer.span(f"ws {message_type}", SERVER, {
+                "ws.assistant_id": assistant_id, "ws.conversation_id": conversation_id
+            }, parent=parse_traceparent(data.get("traceparent"))):
+                # Handle different message types
+                if message_type == "initialize":
+                    # Initialize an assistant bridge for this conversation
+                    solomon_consumer_key = data.get("solomon_consumer_key") or authenticated_consumer_key
+                    vector_store_ids = data.get("vector_store_ids", [])
+                    conversation_assistant_id = data.get("assistant_id") or assistant_id
 
-                if not solomon_consumer_key:
-                    await manager.send_json({
-                        "type": "error",
-                        "data": {"message": "Solomon Consumer Key is required for initialization"}
-                    }, websocket)
-                    continue
+                    if not solomon_consumer_key:
+                        await send_frame(websocket, "error", {"message": "Solomon Consumer Key is required for initialization"}, conversation_id)
+                        continue
 
-                # Fetch the OpenAI API key from the database
-                openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-                if not openai_api_key:
-                    await manager.send_json({
-                        "type": "error",
-                        "data": {"message": "Invalid Solomon Consumer Key"}
-                    }, websocket)
-                    continue
+                    if solomon_consumer_key != authenticated_consumer_key:
+                        # Fetch the OpenAI API key from the database
+                        api_key = await DBService.get_openai_api_key(solomon_consumer_key)
+                        if not api_key:
+                            await send_frame(websocket, "error", {"message": "Invalid Solomon Consumer Key"}, conversation_id)
+                            continue
+                        authenticated_consumer_key = solomon_consumer_key
+                        openai_api_key = api_key
 
-                try:
-                    bridge = AssistantBridge(
-                        api_key=openai_api_key,
-                        assistant_id=assistant_id,
-                        vector_store_ids=vector_store_ids
-                    )
-                    await bridge.initialize()
+                    try:
+                        bridge = AssistantBridge(
+                            api_key=openai_api_key,
+                            assistant_id=conversation_assistant_id,
+                            vector_store_ids=vector_store_ids
+                        )
+                        await bridge.initialize()
+                        await conversations.add(conversation_id, conversation_assistant_id, bridge)
                     
-                    await manager.send_json({
-                        "type": "initialized",
-                        "data": {"message": "Assistant bridge initialized successfully"}
-                    }, websocket)
-                except Exception as e:
-                    await manager.send_json({
-                        "type": "error",
-                        "data": {"message": f"Initialization error: {str(e)}"}
-                    }, websocket)
+                        await send_frame(websocket, "initialized", {
+                            "message": "Assistant bridge initialized successfully",
+                            "assistant_id": conversation_assistant_id
+                        }, conversation_id)
+                    except ConversationLimitError as e:
+                        await send_frame(websocket, "error", {"message": str(e)}, conversation_id)
+                    except Exception as e:
+                        await send_frame(websocket, "error", {"message": f"Initialization error: {str(e)}"}, conversation_id)
             
-            elif data.get("type") == "chat_message":
-                # Process a chat message
-                if not bridge:
-                    await manager.send_json({
-                        "type": "error",
-                        "data": {"message": "Bridge not initialized. Send an initialize message first."}
-                    }, websocket)
-                    continue
+                elif message_type == "chat_message":
+                    # Process a chat message
+                    conversation = conversations.get(conversation_id)
+                    if not conversation:
+                        await send_frame(websocket, "error", {"message": "Bridge not initialized. Send an initialize message first."}, conversation_id)
+                        continue
                 
-                message = data.get("message", "")
-                if not message:
-                    await manager.send_json({
-                        "type": "error",
-                        "data": {"message": "Message content is required"}
-                    }, websocket)
-                    continue
+                    message = data.get("message", "")
+                    if not message:
+                        await send_frame(websocket, "error", {"message": "Message content is required"}, conversation_id)
+                        continue
                 
-                try:
-                    # Use streaming mode for better real-time experience
-                    await manager.send_json({
-                        "type": "processing_started",
-                        "data": {"message": "Processing your message..."}
-                    }, websocket)
-                    
-                    async for event in bridge.chat_streaming(message):
-                        content = event[0] if isinstance(event, tuple) else event.data.get("content", "")
-                        event_type = event[1] if isinstance(event, tuple) else event.type
-                        
-                        if event_type == "tool_call" or event_type == "tool_event":
-                            await manager.send_json({
-                                "type": "tool_usage",
-                                "data": {"message": content}
-                            }, websocket)
-                        elif event_type == "message" or event_type == "content_chunk":
-                            await manager.send_json({
-                                "type": "content_chunk",
-                                "data": {"content": content}
-                            }, websocket)
-                    
-                    await manager.send_json({
-                        "type": "processing_complete",
-                        "data": {"message": "Message processing complete"}
-                    }, websocket)
-                    
-                except Exception as e:
-                    await manager.send_json({
-                        "type": "error",
-                        "data": {"message": f"Error processing message: {str(e)}"}
-                    }, websocket)
+                    if conversation.generation.is_running:
+                        await send_frame(websocket, "error", {"message": "A response is already in progress. Send a stop message first."}, conversation_id)
+                        continue
+                
+                    conversation.generation.start(
+                        stream_chat_response(conversation.bridge, message, websocket, conversation_id)
+                    )
             
-            elif data.get("type") == "clear_history":
-                # Clear conversation history
-                if bridge:
-                    bridge.clear_history()
-                    await manager.send_json({
-                        "type": "history_cleared",
-                        "data": {"message": "Conversation history cleared"}
-                    }, websocket)
-                else:
-                    await manager.send_json({
-                        "type": "error",
-                        "data": {"message": "Bridge not initialized"}
-                    }, websocket)
+                elif message_type == "stop":
+                    # Abort the reply in progress, including the upstream OpenAI stream or run
+                    conversation = conversations.get(conversation_id)
+                    stopped = await conversation.generation.cancel() if conversation else False
+                    await send_frame(websocket, "processing_stopped", {
+                        "message": "Message processing stopped" if stopped else "No message is being processed"
+                    }, conversation_id)
+            
+                elif message_type == "clear_history":
+                    # Clear conversation history
+                    conversation = conversations.get(conversation_id)
+                    if conversation:
+                        await conversation.generation.cancel()
+                        conversation.bridge.clear_history()
+                        await send_frame(websocket, "history_cleared", {"message": "Conversation history cleared"}, conversation_id)
+                    else:
+                        await send_frame(websocket, "error", {"message": "Bridge not initialized"}, conversation_id)
+            
+                elif message_type == "close_conversation":
+                    # Free this conversation's slot on the socket
+                    closed = await conversations.remove(conversation_id)
+                    await send_frame(websocket, "conversation_closed", {
+                        "message": "Conversation closed" if closed else "Conversation not found"
+                    }, conversation_id)
                     
-            else:
-                await manager.send_json({
-                    "type": "error",
-                    "data": {"message": f"Unknown message type: {data.get('type')}"}
-                }, websocket)
+                else:
+                    await send_frame(websocket, "error", {"message": f"Unknown message type: {message_type}"}, conversation_id)
                 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
         try:
-            await manager.send_json({
-                "type": "error",
-                "data": {"message": f"Unexpected error: {str(e)}"}
-            }, websocket)
+            await send_frame(websocket, "error", {"message": f"Unexpected error: {str(e)}"})
         except:
             pass
         manager.disconnect(websocket)
+    finally:
+        # Stop paying for replies nobody will read
+        await conversations.close()
 
 # Customize OpenAPI schema
 def custom_openapi():
@@ -243,16 +355,46 @@ def get_openapi_yaml() -> Response:
     yaml_output = yaml.dump(openapi_json)  # Convert JSON to YAML
     return Response(content=yaml_output, media_type="text/x-yaml")
 
-# Debug middleware to log requests
+# Sampled, redacted access log (see services/access_log.py)
 @app.middleware("http")
 async def log_requests(request, call_next):
-    print(f"Received request: {request.method} {request.url}")
-    print("Headers:")
-    for name, value in request.headers.items():
-        print(f"{name}: {value}")
-    response = await call_next(request)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        access_log.record(request, 500, (time.perf_counter() - started) * 1000)
+        raise
+    access_log.record(request, response.status_code, (time.perf_counter() - started) * 1000)
     return response
 
+# Server span per request, continuing the caller's trace when it sends "traceparent".
+# Registered after log_requests so access log entries carry the trace id.
+async def trace_requests(request, call_next):
+    with tracer.span(f"{request.method} {request.url.path}", SERVER, {
+        "http.method": request.method, "http.target": request.url.path
+    }, parent=tracer.extract(request.headers)) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            # Name by route template so ids don't make every span unique
+            span.name = f"{request.method} {route.path}"
+            span.set_attribute("http.route", route.path)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status("error")
+        response.headers["traceparent"] = span.traceparent
+        return response
+
+if tracer.enabled:
+    app.middleware("http")(trace_requests)
+
+startup_stats.record("import", time.perf_counter() - IMPORT_STARTED)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8080,
+        ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true"
+    )
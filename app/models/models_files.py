@@ -37,3 +37,8 @@ class FileContentUploadResponse(BaseModel):
     created_at: int
     filename: str
     purpose: str
+
+class DeleteFileResponse(BaseModel):
+    id: str
+    object: str
+    deleted: bool
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Dict
 from pydantic import BaseModel
 from typing import List
 from enum import Enum
@@ -37,4 +37,22 @@ class FileType(str, Enum):
 class CreateVectorStoreFileWorkatoRequest(BaseModel):
     content: str
     file_name: str
-    file_type: FileType
\ No newline at end of file
+    file_type: FileType
+
+class BulkIngestWorkatoRequest(BaseModel):
+    files: List[CreateVectorStoreFileWorkatoRequest]
+
+class IngestFileResult(BaseModel):
+    filename: str
+    file_id: Optional[str] = None
+    error: Optional[str] = None
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    vector_store_id: str
+    status: str
+    batch_ids: List[str] = []
+    files: List[IngestFileResult] = []
+    file_counts: Dict[str, int] = {}
+    created_at: int
+    updated_at: int
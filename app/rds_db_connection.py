@@ -7,6 +7,8 @@ import os
 from dotenv import load_dotenv
 from typing import Any, Dict, List, Optional
 import logging
+from services.metrics import db_query_seconds
+from services.tracing import instrument_engine
 
 class DatabaseConnector:
     def __init__(self):
@@ -47,8 +49,10 @@ class DatabaseConnector:
             pool_size=10,
             max_overflow=20
         )
+        instrument_engine(self.engine)
         self.Session = sessionmaker(bind=self.engine)
 
+    @db_query_seconds.timed("test_connection")
     def test_connection(self) -> bool:
         try:
             with self.engine.connect() as connection:
@@ -58,8 +62,8 @@ class DatabaseConnector:
             logging.error(f"Database connection test failed: {e}")
             return False
 
-    def execute_query(self, query, params=None):
-        with self.Session() as session:
+    def execute_query(self, query, params=None, method: str = "execute_query"):
+        with self.Session() as session, db_query_seconds.time(method):
             try:
                 result = session.execute(text(query), params or {})
                 return result.fetchall()
@@ -68,6 +72,7 @@ class DatabaseConnector:
                 session.rollback()
                 raise
 
+    @db_query_seconds.timed("get_threads")
     def get_threads(self, solomon_consumer_key: str) -> List[Dict[str, Any]]:
         query = text("SELECT thread_id, thread_name FROM dbo.solConnectThreads WHERE solomon_consumer_key = :key")
         with self.Session() as session:
@@ -78,6 +83,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving threads: {e}")
                 return []
     
+    @db_query_seconds.timed("get_consumer_key_by_email")
     def get_consumer_key_by_email(self, email: str) -> Optional[str]:
         query = text("SELECT TOP 1 solomon_consumer_key FROM dbo.solConnectConsumers WHERE customer_email = :email")
         with self.Session() as session:
@@ -89,6 +95,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving consumer key by email: {e}")
                 return None
             
+    @db_query_seconds.timed("update_solomon_consumer_key")
     def update_solomon_consumer_key(self, email: str, new_key: str) -> bool:
         query = text("UPDATE dbo.solConnectConsumers SET solomon_consumer_key = :new_key WHERE customer_email = :email")
         with self.Session() as session:
@@ -104,6 +111,7 @@ class DatabaseConnector:
                 session.rollback()
                 return False
     
+    @db_query_seconds.timed("get_workspaces_by_email")
     def get_workspaces_by_email(self, email: str) -> list[str]:
         query = text("""
             SELECT workspace_name
@@ -120,6 +128,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving workspaces by email: {e}")
                 return []
     
+    @db_query_seconds.timed("get_consumer_key_by_email_and_workspace")
     def get_consumer_key_by_email_and_workspace(self, email: str, workspace_name: str) -> Optional[str]:
         query = text("""
             SELECT solomon_consumer_key
@@ -140,6 +149,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving consumer key: {e}")
                 return None
 
+    @db_query_seconds.timed("get_assistant_builder_threads")
     def get_assistant_builder_threads(self, solomon_consumer_key: str) -> List[Dict[str, Any]]:
         query = text("""
             SELECT thread_id, thread_name 
@@ -154,6 +164,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving assistant builder threads: {e}")
                 return []
 
+    @db_query_seconds.timed("create_assistant_builder_thread")
     def create_assistant_builder_thread(self, solomon_consumer_key: str, thread_id: str, thread_name: str) -> bool:
         query = text("""
             INSERT INTO dbo.solConnect_AssistantBuilderThreads 
@@ -174,6 +185,7 @@ class DatabaseConnector:
                 session.rollback()
                 return False
 
+    @db_query_seconds.timed("delete_assistant_builder_thread")
     def delete_assistant_builder_thread(self, thread_id: str) -> bool:
         query = text("""
             DELETE FROM dbo.solConnect_AssistantBuilderThreads
@@ -189,6 +201,7 @@ class DatabaseConnector:
                 session.rollback()
                 return False
     
+    @db_query_seconds.timed("get_assistant_id_by_thread")
     def get_assistant_id_by_thread(self, thread_id: str, solomon_consumer_key: str) -> Optional[str]:
         """
         Retrieves the assistant_id associated with a thread_id and validates the solomon_consumer_key.
@@ -219,6 +232,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving assistant ID: {e}")
                 return None
 
+    @db_query_seconds.timed("get_assistant_builder_id")
     def get_assistant_builder_id(self, solomon_consumer_key: str, workspace_name: str) -> Optional[str]:
         """
         Retrieves the assistant_builder_id for a given solomon_consumer_key and workspace_name.
@@ -249,6 +263,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving assistant builder ID: {e}")
                 return None
     
+    @db_query_seconds.timed("add_team_member")
     def add_team_member(self, solomon_consumer_key: str, origin_assistant_id: str, 
                      callable_assistant_id: str, callable_assistant_reason: Optional[str] = None) -> tuple[bool, str]:
         """
@@ -297,6 +312,7 @@ class DatabaseConnector:
                 session.rollback()
                 return False, f"Database error: {str(e)}"
 
+    @db_query_seconds.timed("get_team_callable_assistants")
     def get_team_callable_assistants(self, solomon_consumer_key: str, origin_assistant_id: str) -> List[Dict[str, Any]]:
         """
         Retrieves all callable assistants for a given origin assistant.
@@ -319,6 +335,7 @@ class DatabaseConnector:
                 logging.error(f"Error retrieving team callable assistants: {e}")
                 return []
 
+    @db_query_seconds.timed("delete_team_callable_assistant")
     def delete_team_callable_assistant(self, solomon_consumer_key: str, origin_assistant_id: str, 
                                     callable_assistant_id: str) -> bool:
         """
@@ -1,12 +1,48 @@
 # routers/healthcheck.py
 
 from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from services.service_healthcheck import HealthcheckService
+from services.metadata_cache import metadata_cache
+from services.single_flight import single_flight_stats
+from services.token_verifier import token_verifier, profile_cache, consumer_key_cache
+from services.tenant_context import consumer_info_cache
+from helpers.aws_helpers import secrets
+from services.upstream_scheduler import scheduler
+from services.resilience import resilience_stats
+from services.service_auth import cognito_stats
+from services.access_log import access_log
+from services.metrics import registry
+from services.startup import startup_stats
 
 router_health_check = APIRouter(tags=["HealthCheck"])
 
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _collect_stats():
+    # Read the existing stats objects at scrape time instead of on every call
+    circuits = resilience_stats()
+    yield ("circuit_breaker_state", "gauge", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)",
+           [({"upstream": name}, CIRCUIT_STATES.get(stats["state"], 2)) for name, stats in circuits.items()])
+    yield ("circuit_breaker_rejected_total", "counter", "Calls rejected by an open circuit",
+           [({"upstream": name}, stats["rejected"]) for name, stats in circuits.items()])
+    caches = {"metadata": metadata_cache, "auth_profiles": profile_cache, "auth_consumer_keys": consumer_key_cache}
+    cache_stats = {name: cache.stats() for name, cache in caches.items()}
+    yield ("cache_lookups_total", "counter", "Cache lookups by result",
+           [({"cache": name, "result": result}, stats[result])
+            for name, stats in cache_stats.items() for result in ("hits", "stale_hits", "misses")])
+    yield ("cache_entries", "gauge", "Entries held per cache",
+           [({"cache": name}, stats["entries"]) for name, stats in cache_stats.items()])
+    cognito = cognito_stats.snapshot()
+    yield ("cognito_calls_queued", "gauge", "Cognito calls waiting for an executor thread", [({}, cognito["queued"])])
+    logs = access_log.stats()
+    yield ("log_records_dropped_total", "counter", "Log records dropped because the log queue was full", [({}, logs["dropped"])])
+
+
+registry.register_collector("healthcheck", _collect_stats)
+
 class HealthResponse(BaseModel):
     status: str
 
@@ -40,4 +76,50 @@ async def db_health_check():
         return JSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={"status": "unavailable", "message": message}
-        )
\ No newline at end of file
+        )
+
+@router_health_check.get(
+    "/cache/stats",
+    status_code=status.HTTP_200_OK,
+    operation_id="cache_stats"
+)
+async def cache_stats():
+    return {
+        "metadata_cache": metadata_cache.stats(),
+        "auth": {
+            **token_verifier.stats(),
+            "profiles": profile_cache.stats(),
+            "consumer_keys": consumer_key_cache.stats()
+        },
+        "tenants": consumer_info_cache.stats(),
+        "single_flight": single_flight_stats(),
+        "secrets": secrets.stats()
+    }
+
+@router_health_check.get(
+    "/upstream/stats",
+    status_code=status.HTTP_200_OK,
+    operation_id="upstream_stats"
+)
+async def upstream_stats():
+    # Keys are reported by hash
+    return {**scheduler.stats(), "circuits": resilience_stats(), "cognito": cognito_stats.snapshot()}
+
+@router_health_check.get(
+    "/startup/stats",
+    status_code=status.HTTP_200_OK,
+    operation_id="startup_stats"
+)
+async def get_startup_stats():
+    # Import, lifespan and warm-up timings, and which lazy clients are built yet
+    return startup_stats.snapshot()
+
+@router_health_check.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    operation_id="metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False
+)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
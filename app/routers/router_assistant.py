@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query, Path, Header
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query, Path
 from fastapi.params import Body
 from fastapi.responses import JSONResponse
 from models.models_assistants import CreateAssistantRequest, AssistantResponse, ListAssistantsRequest, ListAssistantsResponse, Assistant, ModifyAssistantRequest, DeleteAssistantResponse, CreateAssistantWithToolsRequest
-from services.service_db import DBService
-from services.service_assistants import create_assistant_service, list_openai_assistants, modify_openai_assistant, delete_openai_assistant, create_assistant_with_tools, get_openai_assistant
+from services.tenant_context import TenantContext, get_tenant_context
+from services.pagination import ndjson_response, DEFAULT_PAGE_SIZE
+from services.service_assistants import iter_openai_assistants, create_assistant_service, list_openai_assistants, modify_openai_assistant, delete_openai_assistant, create_assistant_with_tools, get_openai_assistant
+from services.metadata_cache import metadata_cache, ASSISTANT, ASSISTANT_LIST
+from services.json_response import proxy_response
+from services.stream_proxy import stream_proxy, STREAMING_ENABLED
+from services.http_client import OpenAIHTTPError
+import asyncio
 import logging
 from typing import Optional
 from tools import tool_registry
@@ -17,21 +23,16 @@ router_assistant = APIRouter(prefix="/assistant", tags=["Assistants V2"])
 @router_assistant.post("/create_with_tools", response_model=Assistant, operation_id="create_assistant_with_tools")
 async def create_assistant_with_tools_endpoint(
     assistant_data: CreateAssistantWithToolsRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
         if not assistant_data.tools:
             assistant_data.tools = [
                 tool_class().get_definition() for tool_class in tool_registry.values()
             ]
         
-        assistant = create_assistant_with_tools(assistant_data, openai_api_key)
+        assistant = await asyncio.to_thread(create_assistant_with_tools, assistant_data, tenant.openai_api_key)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, ASSISTANT_LIST)
         return assistant
     except Exception as e:
         logging.error(f"Error in create_assistant_with_tools_endpoint: {e}")
@@ -40,16 +41,11 @@ async def create_assistant_with_tools_endpoint(
 @router_assistant.post("/create_assistant", operation_id="create_assistant", response_model=AssistantResponse)
 async def create_assistant(
     assistant: CreateAssistantRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = create_assistant_service(assistant, openai_api_key)
+        response = await asyncio.to_thread(create_assistant_service, assistant, tenant.openai_api_key)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, ASSISTANT_LIST)
         return AssistantResponse(**response)  
     except Exception as e:
         logging.error(f"Error in create_assistant: {e}")
@@ -59,41 +55,39 @@ async def create_assistant(
 async def get_openai_assistants_endpoint(
     limit: Optional[int] = Query(20, description="A limit on the number of objects to be returned. Limit can range between 1 and 100, and the default is 20."),
     order: Optional[str] = Query("desc", description="Sort order by the created_at timestamp of the objects. asc for ascending order and desc for descending order."),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication"),
+    tenant: TenantContext = Depends(get_tenant_context),
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = list_openai_assistants(
-            limit=limit,
-            order=order,
-            openai_api_key=openai_api_key
+        response = await metadata_cache.get_or_load(
+            tenant.solomon_consumer_key, ASSISTANT_LIST, (limit, order),
+            lambda: asyncio.to_thread(list_openai_assistants, limit=limit, order=order, openai_api_key=tenant.openai_api_key)
         )
         
-        return ListAssistantsResponse(**response)
+        return proxy_response(response, ListAssistantsResponse)
     except Exception as e:
         logging.error(f"Error in get_openai_assistants endpoint: {e}")
         return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
     
+
+@router_assistant.get("/list_assistants/all", operation_id="list_all_assistants")
+async def list_all_assistants_endpoint(
+    order: Optional[str] = Query("desc", description="Sort order by the created_at timestamp of the objects. asc for ascending order and desc for descending order."),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100, description="Items fetched from OpenAI per page"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Stream every assistant as NDJSON, one object per line."""
+    return await ndjson_response(iter_openai_assistants(tenant.client, order=order, page_size=page_size))
+
 @router_assistant.post("/modify_assistant/{assistant_id}", response_model=AssistantResponse)  # Keep as POST
 async def modify_assistant(
     assistant_id: str = Path(..., description="The ID of the assistant to modify"),
     request: ModifyAssistantRequest = Body(..., description="The modifications to apply to the assistant"),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ) -> AssistantResponse:
     """
     Modify an existing assistant.
     """
     try:
-        # Get OpenAI API key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
         # Convert request to dict, maintaining the exact structure OpenAI expects
         modifications = request.dict(exclude_unset=True, exclude_none=True)
         
@@ -101,11 +95,14 @@ async def modify_assistant(
         logger.debug(f"Modification request: {modifications}")
         
         # Modify the assistant
-        response = modify_openai_assistant(
+        response = await asyncio.to_thread(
+            modify_openai_assistant,
             assistant_id=assistant_id,
             data=modifications,
-            openai_api_key=openai_api_key
+            openai_api_key=tenant.openai_api_key
         )
+        metadata_cache.invalidate(tenant.solomon_consumer_key, ASSISTANT, assistant_id)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, ASSISTANT_LIST)
 
         return AssistantResponse(**response)
 
@@ -118,16 +115,12 @@ async def modify_assistant(
 @router_assistant.delete("/delete_assistant/{assistant_id}", response_model=DeleteAssistantResponse, operation_id="delete_assistant")
 async def delete_assistant(
     assistant_id: str = Path(..., description="The ID of the assistant to delete"),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = delete_openai_assistant(assistant_id, openai_api_key=openai_api_key)
+        response = await asyncio.to_thread(delete_openai_assistant, assistant_id, openai_api_key=tenant.openai_api_key)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, ASSISTANT, assistant_id)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, ASSISTANT_LIST)
         return DeleteAssistantResponse(**response)
     except Exception as e:
         logging.error(f"Error in delete_assistant endpoint: {e}")
@@ -136,17 +129,19 @@ async def delete_assistant(
 @router_assistant.get("/{assistant_id}", response_model=AssistantResponse, operation_id="get_assistant")
 async def get_assistant(
     assistant_id: str = Path(..., description="The ID of the assistant to retrieve"),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = get_openai_assistant(assistant_id, openai_api_key=openai_api_key)
-        return AssistantResponse(**response)
+        # With the cache off there is nothing to keep; forward OpenAI's response as it arrives
+        if STREAMING_ENABLED and not metadata_cache.enabled:
+            return await stream_proxy(tenant.client, f"assistants/{assistant_id}")
+        response = await metadata_cache.get_or_load(
+            tenant.solomon_consumer_key, ASSISTANT, (assistant_id,),
+            lambda: asyncio.to_thread(get_openai_assistant, assistant_id, openai_api_key=tenant.openai_api_key)
+        )
+        return proxy_response(response, AssistantResponse)
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logging.error(f"Error in get_assistant endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Header
 from models.models_assistant_builder_threads import (
     AssistantBuilderThreadsResponse, 
@@ -6,20 +7,33 @@ from models.models_assistant_builder_threads import (
     AssistantBuilderIdResponse
 )
 from services.service_assistant_builder_threads import AssistantBuilderThreadService
+from services.single_flight import SingleFlight
+from services.startup import LazyResource
+import asyncio
 import logging
 router_assistant_builder_threads = APIRouter(prefix="/assistant-builder-thread", tags=["Assistant Builder Threads"])
 logger = logging.getLogger(__name__)
 
+builder_threads_flight = SingleFlight("assistant_builder_threads", key_func=lambda solomon_consumer_key: solomon_consumer_key)
+
+# One service and database engine for all requests, built when the builder is first used
+thread_service_resource = LazyResource("assistant_builder_threads", AssistantBuilderThreadService, warm=False)
+
+async def get_thread_service() -> AssistantBuilderThreadService:
+    return await thread_service_resource.aget()
+
 @router_assistant_builder_threads.post("/thread")
 async def create_thread(
     thread_data: AssistantBuilderThreadCreate, 
     solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication"),
-    thread_service: AssistantBuilderThreadService = Depends(AssistantBuilderThreadService)
+    thread_service: AssistantBuilderThreadService = Depends(get_thread_service)
 ):
     try:
         logger.info(f"Creating assistant builder thread with ID: {thread_data.thread_id}")
         thread_data.solomon_consumer_key = solomon_consumer_key
-        success = thread_service.create_thread(thread_data)
+        success = await asyncio.to_thread(thread_service.create_thread, thread_data)
+        # Reads starting after this shouldn't join a query that began before the insert
+        builder_threads_flight.forget(solomon_consumer_key)
         
         if not success:
             raise HTTPException(status_code=400, detail="Failed to create thread")
@@ -33,17 +47,24 @@ async def create_thread(
 @router_assistant_builder_threads.get("/threads/{solomon_consumer_key}", response_model=AssistantBuilderThreadsResponse)
 async def get_threads(
     solomon_consumer_key: str,
-    thread_service: AssistantBuilderThreadService = Depends(AssistantBuilderThreadService)
+    thread_service: AssistantBuilderThreadService = Depends(get_thread_service)
 ):
-    threads = thread_service.get_threads(solomon_consumer_key)
+    threads = await builder_threads_flight.do(
+        lambda: asyncio.to_thread(thread_service.get_threads, solomon_consumer_key),
+        solomon_consumer_key
+    )
     return AssistantBuilderThreadsResponse(threads=threads)
 
 @router_assistant_builder_threads.delete("/thread/{thread_id}")
 async def delete_thread(
     thread_id: str, 
-    thread_service: AssistantBuilderThreadService = Depends(AssistantBuilderThreadService)
+    solomon_consumer_key: Optional[str] = Header(None, description="Solomon Consumer Key of the thread's owner"),
+    thread_service: AssistantBuilderThreadService = Depends(get_thread_service)
 ):
-    success = thread_service.delete_thread(thread_id)
+    success = await asyncio.to_thread(thread_service.delete_thread, thread_id)
+    if solomon_consumer_key:
+        # As in create_thread: later reads must not join a query that still sees the thread
+        builder_threads_flight.forget(solomon_consumer_key)
     if not success:
         raise HTTPException(status_code=404, detail="Thread not found")
     return {"message": "Thread deleted successfully"}
@@ -56,7 +77,7 @@ async def delete_thread(
 async def get_assistant_id_for_thread(
     thread_id: str,
     solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication"),
-    thread_service: AssistantBuilderThreadService = Depends(AssistantBuilderThreadService)
+    thread_service: AssistantBuilderThreadService = Depends(get_thread_service)
 ):
     """
     Retrieves the Assistant ID associated with a Thread ID.
@@ -94,7 +115,7 @@ async def get_assistant_id_for_thread(
 async def get_assistant_builder_id_for_workspace(
     workspace_name: str,
     solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication"),
-    thread_service: AssistantBuilderThreadService = Depends(AssistantBuilderThreadService)
+    thread_service: AssistantBuilderThreadService = Depends(get_thread_service)
 ):
     """
     Retrieves the Assistant Builder ID for a given workspace name.
@@ -4,10 +4,14 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.security import OAuth2PasswordBearer
 from models.models_auth import UserSignUp, UserSignIn, TokenResponse, UserResponse, VerificationRequest, SolomonConsumerKeyUpdate, WorkspacesResponse
 from services.service_auth import CognitoService
+from services.token_verifier import token_verifier, TokenVerificationError, profile_cache, consumer_key_cache, PROFILE, CONSUMER_KEY
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from botocore.exceptions import ClientError
-from rds_db_connection import DatabaseConnector 
+from rds_db_connection import DatabaseConnector
+from services.startup import LazyResource
+import asyncio
 import logging
+from typing import Optional
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -16,26 +20,65 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
 router_auth = APIRouter(tags=["Auth"])
-cognito_service = CognitoService()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 security = HTTPBearer()
-db_connector = DatabaseConnector()  
+# Built on first use or by the startup warm-up, not at import
+cognito_service = LazyResource("cognito", CognitoService)
+db_connector = LazyResource("auth_database", DatabaseConnector)
 
 # Dependency to get the token
 async def get_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     return credentials.credentials
 
+async def authenticate(token: str) -> UserResponse:
+    """
+    Resolve a bearer token to its user.
+
+    The token is verified locally against the Cognito JWKS. ID tokens carry the
+    profile; for access tokens it comes from Cognito once per user and is cached.
+    """
+    if not token_verifier.enabled:
+        return await get_cognito_user(token)
+    try:
+        claims = await token_verifier.verify(token)
+    except TokenVerificationError:
+        raise Exception("Invalid or expired token")
+    except Exception as e:
+        # JWKS unreachable; let Cognito validate the token instead
+        logger.warning(f"Local token verification failed, falling back to Cognito: {str(e)}")
+        return await get_cognito_user(token)
+
+    if claims["token_use"] == "id" and claims.get("email"):
+        return UserResponse(
+            id=claims.get("cognito:username", claims["sub"]),
+            email=claims["email"],
+            name=claims.get("name", "")
+        )
+    return await profile_cache.get_or_load(claims["sub"], PROFILE, (), lambda: get_cognito_user(token))
+
+async def get_cognito_user(token: str) -> UserResponse:
+    cognito = await cognito_service.aget()
+    return await cognito.get_user(token)
+
+async def get_consumer_key_for_email(email: str) -> Optional[str]:
+    return await consumer_key_cache.get_or_load(
+        email, CONSUMER_KEY, (),
+        lambda: asyncio.to_thread(lambda: db_connector.get().get_consumer_key_by_email(email))
+    )
+
 @router_auth.post("/signup", response_model=UserResponse)
 async def sign_up(user: UserSignUp):
     try:
-        return await cognito_service.sign_up(user)
+        cognito = await cognito_service.aget()
+        return await cognito.sign_up(user)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router_auth.post("/signin", response_model=TokenResponse)
 async def sign_in(user: UserSignIn):
     try:
-        return await cognito_service.sign_in(user)
+        cognito = await cognito_service.aget()
+        return await cognito.sign_in(user)
     except Exception as e:
         if "Incorrect username or password" in str(e):
             raise HTTPException(status_code=401, detail="Incorrect username or password")
@@ -47,7 +90,7 @@ async def sign_in(user: UserSignIn):
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
-        return await cognito_service.get_user(token)
+        return await authenticate(token)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -69,11 +112,11 @@ async def get_user_info(authorization: str = Header(...)):
     token = authorization.split(" ")[1]
     
     try:
-        # Step 1: Retrieve user data from Cognito
-        cognito_user = await cognito_service.get_user(token)
+        # Step 1: Verify the token and resolve the user
+        cognito_user = await authenticate(token)
         
         # Step 2: Fetch Solomon consumer key from the database
-        solomon_consumer_key = db_connector.get_consumer_key_by_email(cognito_user.email)
+        solomon_consumer_key = await get_consumer_key_for_email(cognito_user.email)
         
         # Step 3: Combine the data and create the final response
         user_response = UserResponse(
@@ -90,7 +133,8 @@ async def get_user_info(authorization: str = Header(...)):
 @router_auth.post("/verify")
 async def verify_signup(verification: VerificationRequest):
     try:
-        result = await cognito_service.confirm_sign_up(verification)
+        cognito = await cognito_service.aget()
+        result = await cognito.confirm_sign_up(verification)
         if result:
             return {"message": "User verified successfully"}
     except Exception as e:
@@ -104,7 +148,8 @@ async def verify_signup(verification: VerificationRequest):
 @router_auth.post("/refresh-token", response_model=TokenResponse)
 async def refresh_token(refresh_token: str = Query(...), email: str = Query(...)):
     try:
-        token_response = await cognito_service.refresh_token(refresh_token, email)
+        cognito = await cognito_service.aget()
+        token_response = await cognito.refresh_token(refresh_token, email)
         return token_response
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
@@ -113,7 +158,14 @@ async def refresh_token(refresh_token: str = Query(...), email: str = Query(...)
 async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
-        cognito_service.client.global_sign_out(AccessToken=token)
+        cognito = await cognito_service.aget()
+        await cognito.global_sign_out(token)
+        try:
+            claims = await token_verifier.verify(token) if token_verifier.enabled else None
+        except Exception:
+            claims = None
+        if claims:
+            profile_cache.invalidate(claims["sub"], PROFILE)
         return {"message": "Logged out successfully"}
     except ClientError as e:
         raise HTTPException(status_code=500, detail=f"Error logging out: {str(e)}")
@@ -132,11 +184,11 @@ async def get_consumer_key(
     token = authorization.split(" ")[1]
     
     try:
-        # Step 1: Validate token and get user from Cognito
-        cognito_user = await cognito_service.get_user(token)
+        # Step 1: Validate token and resolve the user
+        cognito_user = await authenticate(token)
         
         # Step 2: Get consumer key from RDS
-        consumer_key = db_connector.get_consumer_key_by_email(cognito_user.email)
+        consumer_key = await get_consumer_key_for_email(cognito_user.email)
         
         if consumer_key is None:
             logger.warning(f"No consumer key found for user: {cognito_user.email}")
@@ -165,15 +217,17 @@ async def update_consumer_key(
     token = authorization.split(" ")[1]
     
     try:
-        # Step 1: Validate token and get user from Cognito
-        cognito_user = await cognito_service.get_user(token)
+        # Step 1: Validate token and resolve the user
+        cognito_user = await authenticate(token)
         logger.info(f"Updating consumer key for user: {cognito_user.email}")
         
         # Step 2: Update consumer key in RDS
-        success = db_connector.update_solomon_consumer_key(
+        db = await db_connector.aget()
+        success = db.update_solomon_consumer_key(
             cognito_user.email, 
             update.solomon_consumer_key
         )
+        consumer_key_cache.invalidate(cognito_user.email, CONSUMER_KEY)
         
         if not success:
             logger.warning(f"Failed to update consumer key for user: {cognito_user.email}")
@@ -206,11 +260,12 @@ async def get_user_workspaces(authorization: str = Header(...)):
     token = authorization.split(" ")[1]
     
     try:
-        # Step 1: Get user email from Cognito
-        cognito_user = await cognito_service.get_user(token)
+        # Step 1: Resolve the user's email
+        cognito_user = await authenticate(token)
         
         # Step 2: Get workspace names from database using email
-        workspace_names = db_connector.get_workspaces_by_email(cognito_user.email)
+        db = await db_connector.aget()
+        workspace_names = db.get_workspaces_by_email(cognito_user.email)
         
         return WorkspacesResponse(workspace_names=workspace_names)
         
@@ -235,11 +290,12 @@ async def get_workspace_consumer_key(
     token = authorization.split(" ")[1]
     
     try:
-        # Step 1: Get user from Cognito
-        cognito_user = await cognito_service.get_user(token)
+        # Step 1: Resolve the user
+        cognito_user = await authenticate(token)
         
         # Step 2: Get consumer key for workspace
-        consumer_key = db_connector.get_consumer_key_by_email_and_workspace(
+        db = await db_connector.aget()
+        consumer_key = db.get_consumer_key_by_email_and_workspace(
             cognito_user.email,
             workspace_name
         )
@@ -3,7 +3,8 @@ from typing import List, Optional, Dict, Any
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from openai import AsyncOpenAI
+
+from services.startup import LazyResource
 
 # Simple in-memory session store
 _SESSION_STORE: Dict[str, List[Dict[str, Any]]] = {}
@@ -27,7 +28,13 @@ class CompletionResponse(BaseModel):
     messages: List[Dict[str, Any]]
 
 
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def _create_openai_client():
+    # The SDK is imported here so it stays off the startup path
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+openai_client = LazyResource("openai_completions", _create_openai_client)
 
 
 @router_completions.post("/request", response_model=CompletionResponse)
@@ -48,7 +55,8 @@ async def agent_request(req: CompletionRequest) -> CompletionResponse:
         messages.append({"role": "user", "content": req.prompt})
 
         # Generate response using OpenAI chat completions
-        resp = await openai_client.chat.completions.create(
+        client = await openai_client.aget()
+        resp = await client.chat.completions.create(
             model=req.model,
             messages=messages,
             tools=req.tools,
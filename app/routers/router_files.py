@@ -1,11 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Header
-from models.models_files import UploadFileResponse, ListFilesResponse, FileContentUploadRequest, FileContentUploadResponse, FileResponse
-from services.service_files import upload_file, list_files, upload_file_content, get_file
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Depends, Header, Request
+from models.models_files import UploadFileResponse, ListFilesResponse, FileContentUploadRequest, FileContentUploadResponse, FileResponse, DeleteFileResponse
+from services.service_files import list_files, iter_files, get_file, delete_file
+from services.pagination import ndjson_response, DEFAULT_PAGE_SIZE
+from services.upload_stream import stream_upload_file, upload_file_chunks, upload_content, hash_upload_file, get_upload_progress
+from services.upload_dedup import UPLOAD_DEDUP_ENABLED, dedup_index
+from services.metadata_cache import metadata_cache, FILE
+from services.stream_proxy import stream_proxy, STREAMING_ENABLED
+from services.upstream_scheduler import batch_priority
+import asyncio
+from services.http_client import OpenAIHTTPError
 import logging
-import os
-import tempfile
 from typing import Optional
-from services.service_db import DBService
+from services.tenant_context import TenantContext, get_tenant_context
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,46 +22,84 @@ router_files = APIRouter(prefix="/files", tags=["Files V2"])
 async def upload_file_endpoint(
     file: UploadFile = File(...),  # The uploaded file
     purpose: str = Form("assistants"),  # The purpose of the file, defaulting to "assistants"
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        # Save the uploaded file temporarily
-        file_location = f"/tmp/{file.filename}"
-        with open(file_location, "wb") as buffer:
-            buffer.write(file.file.read())
-
-        # Upload the file to OpenAI using the API key
-        response = upload_file(file_path=file_location, purpose=purpose, openai_api_key=openai_api_key)
-
-        # Remove the temporary file
-        os.remove(file_location)
-
-        return response
+        # Stream the upload to OpenAI in chunks instead of copying it to another file
+        response = await stream_upload_file(
+            tenant.client,
+            upload_file_chunks(file),
+            filename=file.filename,
+            purpose=purpose,
+            content_type=file.content_type or "application/octet-stream",
+            total_bytes=file.size,
+            owner=tenant.solomon_consumer_key,
+            # The upload is already spooled, so hashing it first lets duplicates skip the upload
+            content_sha256=await hash_upload_file(file) if UPLOAD_DEDUP_ENABLED else None
+        )
+        return UploadFileResponse(**response)
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except HTTPException as he:
         raise he
     except Exception as e:
         logger.exception(f"Error in upload_file_endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+    finally:
+        await file.close()
+
+@router_files.post("/upload_stream", response_model=UploadFileResponse, operation_id="upload_file_stream")
+async def upload_file_stream_endpoint(
+    request: Request,
+    filename: str = Query(..., description="Name of the file"),
+    purpose: str = Query("assistants", description="The purpose of the file"),
+    x_upload_id: Optional[str] = Header(None, description="Optional id for polling /files/uploads/{upload_id}"),
+    x_content_sha256: Optional[str] = Header(None, description="Optional SHA-256 of the body; an identical earlier upload is reused"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """
+    Upload the raw request body as a file.
+
+    The body is piped to OpenAI as it arrives, so memory use stays constant and
+    nothing is written to disk. Send the file bytes as the body (not multipart).
+    """
+    content_length = request.headers.get("content-length")
+    try:
+        response = await stream_upload_file(
+            tenant.client,
+            request.stream(),
+            filename=filename,
+            purpose=purpose,
+            content_type=request.headers.get("content-type") or "application/octet-stream",
+            total_bytes=int(content_length) if content_length and content_length.isdigit() else None,
+            upload_id=x_upload_id,
+            owner=tenant.solomon_consumer_key,
+            content_sha256=x_content_sha256.lower() if x_content_sha256 else None
+        )
+        return UploadFileResponse(**response)
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.exception(f"Error in upload_file_stream_endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router_files.get("/uploads/{upload_id}", operation_id="get_upload_progress")
+async def get_upload_progress_endpoint(
+    upload_id: str,
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    progress = get_upload_progress(upload_id)
+    if not progress or progress.owner != tenant.solomon_consumer_key:
+        raise HTTPException(status_code=404, detail="No upload with this id")
+    return progress.to_dict()
 
 @router_files.get("/list", response_model=ListFilesResponse, operation_id="list_files")
 async def list_files_endpoint(
     purpose: Optional[str] = Query(None, description="Filter by file purpose"),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = list_files(purpose=purpose, openai_api_key=openai_api_key)
+        response = await asyncio.to_thread(list_files, purpose=purpose, openai_api_key=tenant.openai_api_key)
         return response
     except HTTPException as he:
         raise he
@@ -63,31 +107,32 @@ async def list_files_endpoint(
         logger.exception(f"Error in list_files_endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
-@router_files.post("/upload_file_workato", response_model=FileContentUploadResponse, operation_id="upload_file_content")
+@router_files.get("/list/all", operation_id="list_all_files")
+async def list_all_files_endpoint(
+    purpose: Optional[str] = Query(None, description="Filter by file purpose"),
+    order: str = Query("desc"),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100, description="Items fetched from OpenAI per page"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Stream every file as NDJSON, one object per line."""
+    return await ndjson_response(iter_files(tenant.client, purpose=purpose, order=order, page_size=page_size))
+
+@router_files.post("/upload_file_workato", response_model=FileContentUploadResponse, operation_id="upload_file_content", dependencies=[Depends(batch_priority)])
 async def upload_file_content_endpoint(
     request: FileContentUploadRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        with tempfile.NamedTemporaryFile(mode='w+', suffix=f'.{request.file_type}', delete=False) as temp_file:
-            temp_file.write(request.content)
-            temp_file.flush()
-            
-            response = upload_file_content(
-                file_path=temp_file.name,
-                file_name=request.file_name,
-                purpose=request.purpose,
-                openai_api_key=openai_api_key
-            )
-            
-        os.remove(temp_file.name)
-        return response
-        
+        response = await upload_content(
+            tenant.client,
+            request.content,
+            filename=request.file_name,
+            purpose=request.purpose,
+            owner=tenant.solomon_consumer_key
+        )
+        return FileContentUploadResponse(**response)
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.exception(f"Error in upload_file_content_endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
@@ -95,19 +140,37 @@ async def upload_file_content_endpoint(
 @router_files.get("/{file_id}", response_model=FileResponse, operation_id="get_file")
 async def get_file_endpoint(
     file_id: str,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-        
-        response = get_file(file_id=file_id, openai_api_key=openai_api_key)
+        # With the cache off there is nothing to keep; forward OpenAI's response as it arrives
+        if STREAMING_ENABLED and not metadata_cache.enabled:
+            return await stream_proxy(tenant.client, f"files/{file_id}")
+        response = await metadata_cache.get_or_load(
+            tenant.solomon_consumer_key, FILE, (file_id,),
+            lambda: asyncio.to_thread(get_file, file_id=file_id, openai_api_key=tenant.openai_api_key)
+        )
         return response
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except HTTPException as he:
         raise he
     except Exception as e:
         logger.exception(f"Error in get_file_endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router_files.delete("/{file_id}", response_model=DeleteFileResponse, operation_id="delete_file")
+async def delete_file_endpoint(
+    file_id: str,
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    try:
+        response = await asyncio.to_thread(delete_file, file_id=file_id, openai_api_key=tenant.openai_api_key)
+        dedup_index.forget_file(tenant.solomon_consumer_key, file_id)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, FILE, file_id)
+        return response
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.exception(f"Error in delete_file_endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi import APIRouter, HTTPException, Query, Depends
 from models.models_messages import ListMessagesResponse, CreateMessageRequest, CreateMessageResponse
-from services.service_messages import list_thread_messages, create_message
-from services.service_db import DBService
+from services.service_messages import fetch_thread_messages, iter_thread_messages, create_message
+from services.pagination import ndjson_response, DEFAULT_PAGE_SIZE
+from services.tenant_context import TenantContext, get_tenant_context
+from services.json_response import proxy_response
+from services.stream_proxy import stream_proxy, STREAMING_ENABLED
+from services.http_client import OpenAIHTTPError
 import logging
 from typing import Optional
 
@@ -14,41 +18,39 @@ async def list_messages_endpoint(
     thread_id: str,
     limit: int = Query(20, description="A limit on the number of objects to be returned. Limit can range between 1 and 100, and the default is 20."),
     order: str = Query("desc", description="Sort order by the created_at timestamp of the objects. asc for ascending order and desc for descending order."),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        logger.info(f"Retrieved OpenAI API key: {openai_api_key[:4]}...{openai_api_key[-4:]}")  # Log partial key
-
-        response = await list_thread_messages(thread_id, limit, order, openai_api_key)
-        return response
+        if STREAMING_ENABLED:
+            return await stream_proxy(tenant.client, f"threads/{thread_id}/messages", {"limit": limit, "order": order})
+        body = await fetch_thread_messages(thread_id, limit, order, client=tenant.client)
+        return proxy_response(body, ListMessagesResponse)
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except HTTPException as he:
         raise he
     except Exception as e:
         logger.exception(f"Error in list_messages_endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@router_messages.get("/list_messages/threads/{thread_id}/messages/all", operation_id="list_all_thread_messages")
+async def list_all_messages_endpoint(
+    thread_id: str,
+    order: str = Query("desc", description="Sort order by the created_at timestamp of the objects. asc for ascending order and desc for descending order."),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100, description="Items fetched from OpenAI per page"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Stream every message of a thread as NDJSON, one object per line."""
+    return await ndjson_response(iter_thread_messages(tenant.client, thread_id, order=order, page_size=page_size))
+
 @router_messages.post("/create_message/threads/{thread_id}/messages", response_model=CreateMessageResponse, operation_id="create_thread_message")
 async def create_message_endpoint(
     thread_id: str,
     create_message_request: CreateMessageRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        logger.info(f"Retrieved OpenAI API key: {openai_api_key[:4]}...{openai_api_key[-4:]}")  # Log partial key
-
-        response = await create_message(thread_id, create_message_request, openai_api_key=openai_api_key)
+        response = await create_message(thread_id, create_message_request, client=tenant.client)
         return response
     except ValueError as ve:
         logger.error(f"Value Error: {ve}")
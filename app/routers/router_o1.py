@@ -1,7 +1,6 @@
 # routers/router_o1.py
 from fastapi import APIRouter, Depends, HTTPException
 from models.models_o1 import O1Request, O1Response
-from services.service_o1 import get_o1_completion
 
 router_o1 = APIRouter(
     prefix="/o1",
@@ -11,6 +10,8 @@ router_o1 = APIRouter(
 @router_o1.post("/completion", response_model=O1Response)
 async def o1_completion(request: O1Request):
     try:
+        # Imported on first use to keep the OpenAI SDK off the startup path
+        from services.service_o1 import get_o1_completion
         response = await get_o1_completion(request)
         return response
     except Exception as e:
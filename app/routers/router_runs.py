@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi import APIRouter, HTTPException, Query, Depends
 from models.models_runs import CreateThreadRunRequest, RunThreadRequest
 from models.models_messages import ListMessagesResponse
 from services.service_runs import create_run_and_list_messages, run_thread_and_list_messages
-from services.service_db import DBService
+from services.tenant_context import TenantContext, get_tenant_context
+from services.json_response import FastJSONResponse
+import asyncio
 import logging
 from typing import Optional, List, Dict, Any, Union
 from tools import tool_registry
@@ -15,20 +17,12 @@ logger = logging.getLogger(__name__)
 @router_runs.post("/create_thread_and_run", response_model=List[Dict[str, Any]], operation_id="create_thread_and_run")
 async def create_thread_and_run_endpoint(
     create_thread_run_request: CreateThreadRunRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
         logger.info(f"Received request for assistant_id: {create_thread_run_request.assistant_id}")
         logger.debug(f"Request body: {create_thread_run_request.json()}")
-        logger.debug(f"Solomon Consumer Key: {solomon_consumer_key[:4]}...{solomon_consumer_key[-4:]}")  # Log partial key
-
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        logger.info(f"Retrieved OpenAI API key: {openai_api_key}")  # Log partial key
+        logger.debug(f"Solomon Consumer Key: {tenant.solomon_consumer_key[:4]}...{tenant.solomon_consumer_key[-4:]}")  # Log partial key
 
         if not create_thread_run_request.tools:
             create_thread_run_request.tools = [
@@ -39,13 +33,17 @@ async def create_thread_and_run_endpoint(
         request_dict = create_thread_run_request.dict()
         logger.debug(f"Converted request to dict: {request_dict}")
 
-        messages_response = create_run_and_list_messages(request_dict, openai_api_key=openai_api_key)
+        # Polls with blocking sleeps and waits on the scheduler; keep it off the event loop
+        messages_response = await asyncio.to_thread(
+            create_run_and_list_messages, request_dict, openai_api_key=tenant.openai_api_key
+        )
         logger.info("Successfully created run and listed messages")
         
+        # Plain upstream dicts; skip re-validating them against List[Dict[str, Any]]
         if isinstance(messages_response, list):
-            return messages_response
+            return FastJSONResponse(messages_response)
         elif isinstance(messages_response, dict) and 'data' in messages_response:
-            return messages_response['data']
+            return FastJSONResponse(messages_response['data'])
         else:
             raise ValueError("Unexpected response format from create_run_and_list_messages")
 
@@ -59,26 +57,20 @@ async def create_thread_and_run_endpoint(
 @router_runs.post("/run_thread_and_list_messages", response_model=Union[List[Dict[str, Any]], Dict[str, Any]], operation_id="run_thread_and_list_messages")
 async def run_thread_and_list_messages_endpoint(
     run_thread_request: RunThreadRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
         logger.info(f"Received request to run thread {run_thread_request.thread_id} with assistant {run_thread_request.assistant_id}")
         
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        logger.info(f"Retrieved OpenAI API key: {openai_api_key}")  # Log partial key
-
-        messages_response = run_thread_and_list_messages(
+        # Polls with blocking sleeps; keep it off the event loop
+        messages_response = await asyncio.to_thread(
+            run_thread_and_list_messages,
             thread_id=run_thread_request.thread_id,
             assistant_id=run_thread_request.assistant_id,
             tools=run_thread_request.tools,
-            openai_api_key=openai_api_key
+            openai_api_key=tenant.openai_api_key
         )
-        return messages_response
+        return FastJSONResponse(messages_response)
     except HTTPException as he:
         logger.error(f"HTTP Exception in run_thread_and_list_messages_endpoint: {str(he)}")
         raise he
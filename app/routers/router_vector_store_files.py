@@ -1,27 +1,41 @@
-from fastapi import APIRouter, HTTPException, Query, Header
-from models.models_vector_store_files import CreateVectorStoreFileRequest, VectorStoreFileResponse, ListVectorStoreFilesResponse, DeleteVectorStoreFileResponse, CreateVectorStoreFileWorkatoRequest
-from services.service_vector_store_files import create_vector_store_file, list_vector_store_files, delete_vector_store_file, retrieve_vector_store_file, create_vector_store_file_workato
-from services.service_db import DBService
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File
+from models.models_vector_store_files import CreateVectorStoreFileRequest, VectorStoreFileResponse, ListVectorStoreFilesResponse, DeleteVectorStoreFileResponse, CreateVectorStoreFileWorkatoRequest, BulkIngestWorkatoRequest, IngestJobResponse
+from services.pagination import ndjson_response, DEFAULT_PAGE_SIZE
+from services.service_vector_store_files import iter_vector_store_files, create_vector_store_file, fetch_vector_store_files, delete_vector_store_file, retrieve_vector_store_file, create_vector_store_file_workato, workato_file_name
+from services.upload_stream import stream_upload_file, upload_file_chunks, upload_content
+from services.vector_store_ingest import ingest_files, get_ingest_job, INGEST_CONCURRENCY, INGEST_MAX_CONCURRENCY
+from services.upload_dedup import dedup_index
+from services.metadata_cache import metadata_cache, VECTOR_STORE, VECTOR_STORE_LIST
+from services.upstream_scheduler import batch_priority
+from services.tenant_context import TenantContext, get_tenant_context
+from services.http_client import OpenAIHTTPError
+from services.json_response import proxy_response
+from services.stream_proxy import stream_proxy, STREAMING_ENABLED
+from typing import List, Optional
+import asyncio
 import logging
+import requests
 
 router_vector_store_files = APIRouter(prefix="/vector_stores", tags=["Vector Store Files V2"])
 
 logger = logging.getLogger(__name__)
 
+def _invalidate_vector_store(tenant: TenantContext, vector_store_id: str) -> None:
+    # File counts and usage_bytes of the store change with its files
+    metadata_cache.invalidate(tenant.solomon_consumer_key, VECTOR_STORE, vector_store_id)
+    metadata_cache.invalidate(tenant.solomon_consumer_key, VECTOR_STORE_LIST)
+
 @router_vector_store_files.post("/create_vector_store_file/{vector_store_id}/files", response_model=VectorStoreFileResponse, operation_id="create_vector_store_file")
 async def create_vector_store_file_endpoint(
     vector_store_id: str, 
     create_vector_store_file_request: CreateVectorStoreFileRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        return create_vector_store_file(vector_store_id, create_vector_store_file_request, openai_api_key)
+        response = await asyncio.to_thread(create_vector_store_file, vector_store_id, create_vector_store_file_request, tenant.openai_api_key)
+        dedup_index.record_vector_store_file(tenant.solomon_consumer_key, vector_store_id, create_vector_store_file_request.file_id)
+        _invalidate_vector_store(tenant, vector_store_id)
+        return response
     except requests.exceptions.HTTPError as errh:
         logger.error(f"HTTP Error: {errh}")
         raise HTTPException(status_code=errh.response.status_code, detail=errh.response.text)
@@ -37,35 +51,44 @@ async def list_vector_store_files_endpoint(
     after: Optional[str] = Query(None),
     before: Optional[str] = Query(None),
     filter: Optional[str] = Query(None),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        return list_vector_store_files(
-            vector_store_id, limit, order, after, before, filter,
-            openai_api_key=openai_api_key
-        )
+        if STREAMING_ENABLED:
+            return await stream_proxy(tenant.client, f"vector_stores/{vector_store_id}/files", {
+                "limit": limit, "order": order, "after": after, "before": before, "filter": filter
+            })
+        body = await fetch_vector_store_files(tenant.client, vector_store_id, limit, order, after, before, filter)
+        return proxy_response(body, ListVectorStoreFilesResponse)
+    except OpenAIHTTPError as e:
+        logger.error(f"HTTP Error: {e}")
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error in list_vector_store_files_endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@router_vector_store_files.get("/list_vector_store_files/{vector_store_id}/files/all", operation_id="list_all_vector_store_files")
+async def list_all_vector_store_files_endpoint(
+    vector_store_id: str,
+    order: str = Query("desc"),
+    filter: Optional[str] = Query(None),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100, description="Items fetched from OpenAI per page"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Stream every file of a vector store as NDJSON, one object per line."""
+    return await ndjson_response(iter_vector_store_files(tenant.client, vector_store_id, order=order, filter=filter, page_size=page_size))
+
 @router_vector_store_files.delete("/delete_vector_store_file/{vector_store_id}/files/{file_id}", response_model=DeleteVectorStoreFileResponse, operation_id="delete_vector_store_file")
 async def delete_vector_store_file_endpoint(
     vector_store_id: str, 
     file_id: str,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        return delete_vector_store_file(vector_store_id, file_id, openai_api_key)
+        response = await asyncio.to_thread(delete_vector_store_file, vector_store_id, file_id, tenant.openai_api_key)
+        dedup_index.forget_vector_store_file(tenant.solomon_consumer_key, vector_store_id, file_id)
+        _invalidate_vector_store(tenant, vector_store_id)
+        return response
     except Exception as e:
         logger.error(f"Error in delete_vector_store_file_endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -74,15 +97,10 @@ async def delete_vector_store_file_endpoint(
 async def retrieve_vector_store_file_endpoint(
     vector_store_id: str, 
     file_id: str,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        return retrieve_vector_store_file(vector_store_id, file_id, openai_api_key)
+        return await asyncio.to_thread(retrieve_vector_store_file, vector_store_id, file_id, tenant.openai_api_key)
     except requests.exceptions.HTTPError as errh:
         logger.error(f"HTTP Error: {errh}")
         raise HTTPException(status_code=errh.response.status_code, detail=errh.response.text)
@@ -90,21 +108,89 @@ async def retrieve_vector_store_file_endpoint(
         logger.error(f"Error in retrieve_vector_store_file_endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
-@router_vector_store_files.post("/create_vector_store_file_workato/{vector_store_id}/files", response_model=VectorStoreFileResponse, operation_id="create_vector_store_file_workato")
+@router_vector_store_files.post("/create_vector_store_file_workato/{vector_store_id}/files", response_model=VectorStoreFileResponse, operation_id="create_vector_store_file_workato", dependencies=[Depends(batch_priority)])
 async def create_vector_store_file_workato_endpoint(
     vector_store_id: str,
     request: CreateVectorStoreFileWorkatoRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-            
-        return create_vector_store_file_workato(vector_store_id, request, openai_api_key)
-    except requests.exceptions.HTTPError as errh:
-        logger.error(f"HTTP Error: {errh}")
-        raise HTTPException(status_code=errh.response.status_code, detail=errh.response.text)
+        response = await create_vector_store_file_workato(vector_store_id, request, client=tenant.client, owner=tenant.solomon_consumer_key)
+        _invalidate_vector_store(tenant, vector_store_id)
+        return response
+    except OpenAIHTTPError as e:
+        logger.error(f"HTTP Error: {e}")
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error in create_vector_store_file_workato_endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@router_vector_store_files.post("/ingest/{vector_store_id}/files", response_model=IngestJobResponse, status_code=202, operation_id="ingest_vector_store_files", dependencies=[Depends(batch_priority)])
+async def ingest_vector_store_files_endpoint(
+    vector_store_id: str,
+    files: List[UploadFile] = File(...),
+    concurrency: int = Query(INGEST_CONCURRENCY, ge=1, le=INGEST_MAX_CONCURRENCY, description="Number of files uploaded in parallel"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """
+    Upload many files concurrently and add them to a vector store as file batches.
+
+    Returns a job once the batches are created; poll /vector_stores/ingest_jobs/{job_id} for indexing status.
+    """
+    client = tenant.client
+    uploads = [
+        (file.filename, lambda file=file: stream_upload_file(
+            client,
+            upload_file_chunks(file),
+            filename=file.filename,
+            content_type=file.content_type or "application/octet-stream",
+            total_bytes=file.size,
+            owner=tenant.solomon_consumer_key
+        ))
+        for file in files
+    ]
+    try:
+        job = await ingest_files(client, vector_store_id, uploads, concurrency=concurrency, owner=tenant.solomon_consumer_key)
+        _invalidate_vector_store(tenant, vector_store_id)
+        return job.to_dict()
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error in ingest_vector_store_files_endpoint: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    finally:
+        for file in files:
+            await file.close()
+
+@router_vector_store_files.post("/ingest_workato/{vector_store_id}/files", response_model=IngestJobResponse, status_code=202, operation_id="ingest_vector_store_files_workato", dependencies=[Depends(batch_priority)])
+async def ingest_vector_store_files_workato_endpoint(
+    vector_store_id: str,
+    request: BulkIngestWorkatoRequest,
+    concurrency: int = Query(INGEST_CONCURRENCY, ge=1, le=INGEST_MAX_CONCURRENCY, description="Number of files uploaded in parallel"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Bulk variant of create_vector_store_file_workato for a list of Workato documents."""
+    client = tenant.client
+    uploads = [
+        (workato_file_name(item), lambda item=item: upload_content(client, item.content, filename=workato_file_name(item), owner=tenant.solomon_consumer_key))
+        for item in request.files
+    ]
+    try:
+        job = await ingest_files(client, vector_store_id, uploads, concurrency=concurrency, owner=tenant.solomon_consumer_key)
+        _invalidate_vector_store(tenant, vector_store_id)
+        return job.to_dict()
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error in ingest_vector_store_files_workato_endpoint: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@router_vector_store_files.get("/ingest_jobs/{job_id}", response_model=IngestJobResponse, operation_id="get_ingest_job")
+async def get_ingest_job_endpoint(
+    job_id: str,
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    job = get_ingest_job(job_id, owner=tenant.solomon_consumer_key)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job.to_dict()
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi import APIRouter, HTTPException, Query, Depends
 from models.models_vector_stores import CreateVectorStoreRequest, VectorStoreResponse, ListVectorStoresResponse, DeleteVectorStoreResponse
-from services.service_vector_stores import create_vector_store, list_vector_stores, retrieve_vector_store, delete_vector_store
-from services.service_db import DBService
+from services.pagination import ndjson_response, DEFAULT_PAGE_SIZE
+from services.service_vector_stores import iter_vector_stores, create_vector_store, list_vector_stores, retrieve_vector_store, delete_vector_store
+from services.tenant_context import TenantContext, get_tenant_context
+from services.upload_dedup import dedup_index
+from services.metadata_cache import metadata_cache, VECTOR_STORE, VECTOR_STORE_LIST
+from services.stream_proxy import stream_proxy, STREAMING_ENABLED
+from services.http_client import OpenAIHTTPError
+import asyncio
 import logging
 from typing import Optional
 
@@ -12,16 +18,11 @@ logger = logging.getLogger(__name__)
 @router_vector_stores.post("/create_vector_store", response_model=VectorStoreResponse, operation_id="create_vector_store")
 async def create_vector_store_endpoint(
     create_vector_store_request: CreateVectorStoreRequest,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        # Retrieve the OpenAI API key using the solomon_consumer_key
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = create_vector_store(create_vector_store_request, openai_api_key)
+        response = await asyncio.to_thread(create_vector_store, create_vector_store_request, tenant.openai_api_key)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, VECTOR_STORE_LIST)
         return response
     except Exception as e:
         logger.error(f"Error in create_vector_store_endpoint: {e}")
@@ -33,33 +34,43 @@ async def list_vector_stores_endpoint(
     order: str = Query("desc"),
     after: Optional[str] = Query(None),
     before: Optional[str] = Query(None),
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = list_vector_stores(limit=limit, order=order, after=after, before=before, openai_api_key=openai_api_key)
+        response = await metadata_cache.get_or_load(
+            tenant.solomon_consumer_key, VECTOR_STORE_LIST, (limit, order, after, before),
+            lambda: asyncio.to_thread(list_vector_stores, limit=limit, order=order, after=after, before=before, openai_api_key=tenant.openai_api_key)
+        )
         return response
     except Exception as e:
         logger.error(f"Error in list_vector_stores_endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@router_vector_stores.get("/list_vector_stores/all", operation_id="list_all_vector_stores")
+async def list_all_vector_stores_endpoint(
+    order: str = Query("desc"),
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100, description="Items fetched from OpenAI per page"),
+    tenant: TenantContext = Depends(get_tenant_context)
+):
+    """Stream every vector store as NDJSON, one object per line."""
+    return await ndjson_response(iter_vector_stores(tenant.client, order=order, page_size=page_size))
+
 @router_vector_stores.get("/retrieve_vector_store/{vector_store_id}", response_model=VectorStoreResponse, operation_id="retrieve_vector_store")
 async def retrieve_vector_store_endpoint(
     vector_store_id: str,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = retrieve_vector_store(vector_store_id, openai_api_key)
+        # With the cache off there is nothing to keep; forward OpenAI's response as it arrives
+        if STREAMING_ENABLED and not metadata_cache.enabled:
+            return await stream_proxy(tenant.client, f"vector_stores/{vector_store_id}")
+        response = await metadata_cache.get_or_load(
+            tenant.solomon_consumer_key, VECTOR_STORE, (vector_store_id,),
+            lambda: asyncio.to_thread(retrieve_vector_store, vector_store_id, tenant.openai_api_key)
+        )
         return response
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error in retrieve_vector_store_endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -67,15 +78,13 @@ async def retrieve_vector_store_endpoint(
 @router_vector_stores.delete("/delete_vector_store/{vector_store_id}", response_model=DeleteVectorStoreResponse, operation_id="delete_vector_store")
 async def delete_vector_store_endpoint(
     vector_store_id: str,
-    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+    tenant: TenantContext = Depends(get_tenant_context)
 ):
     try:
-        openai_api_key = await DBService.get_openai_api_key(solomon_consumer_key)
-        
-        if not openai_api_key:
-            raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
-
-        response = delete_vector_store(vector_store_id, openai_api_key)
+        response = await asyncio.to_thread(delete_vector_store, vector_store_id, tenant.openai_api_key)
+        dedup_index.forget_vector_store(tenant.solomon_consumer_key, vector_store_id)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, VECTOR_STORE, vector_store_id)
+        metadata_cache.invalidate(tenant.solomon_consumer_key, VECTOR_STORE_LIST)
         return response
     except Exception as e:
         logger.error(f"Error in delete_vector_store_endpoint: {e}")
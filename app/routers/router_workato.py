@@ -2,13 +2,12 @@ from fastapi import APIRouter, Header, HTTPException
 import requests
 import logging
 from models.models_workato import WorkatoAssistantBuilderRequest, WorkatoAssistantBuilderResponse
+from helpers.aws_helpers import secrets, SecretNotFoundError
 
 router_workato = APIRouter(prefix="/workato", tags=["Workato Integration"])
 
 logger = logging.getLogger(__name__)
 
-# Hardcoded API token - in production, consider moving this to environment variables or secure secrets management
-WORKATO_API_TOKEN = "340a90abdecd4f0584569b180dc4c4326ebda649ca88e731dcaa44d04d30cbeb"
 WORKATO_ENDPOINT = "https://apim.workato.com/solconsult/assistant-functions-v1/assistant-builder-functions"
 
 @router_workato.post("/assistant-builder", response_model=WorkatoAssistantBuilderResponse)
@@ -20,7 +19,7 @@ async def forward_to_workato(
     try:
         # Prepare headers for Workato request
         headers = {
-            "API-TOKEN": WORKATO_API_TOKEN,
+            "API-TOKEN": secrets.get("WORKATO_API_TOKEN"),
             "Solomon_consumer_key": solomon_consumer_key,
             "Thread_id": thread_id,
             "Content-Type": "application/json"
@@ -53,6 +52,9 @@ async def forward_to_workato(
                 message=f"Workato request failed with status code: {response.status_code}"
             )
 
+    except SecretNotFoundError as e:
+        logger.error(f"Workato token unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error forwarding request to Workato: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -8,6 +8,8 @@ def main():
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind the server to")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind the server to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload for development")
+    parser.add_argument("--no-ws-per-message-deflate", dest="ws_per_message_deflate", action="store_false",
+                        help="Disable permessage-deflate compression for WebSocket frames")
 
     args = parser.parse_args()
 
@@ -25,7 +27,8 @@ def main():
         server_path,
         host=args.host,
         port=args.port,
-        reload=args.reload
+        reload=args.reload,
+        ws_per_message_deflate=args.ws_per_message_deflate
     )
 
 if __name__ == "__main__":
@@ -1,3 +1,13 @@
 """
 Service layer implementations.
-""" 
\ No newline at end of file
+
+Import this package as ``services`` (``app/`` on the path, as in the Docker
+image), never as ``app.services``: a second name loads a second copy of every
+module, with its own breakers, caches, scheduler and metrics.
+"""
+import logging
+
+if __name__ != "services":
+    logging.getLogger(__name__).warning(
+        f"Service package imported as {__name__!r}; import it as 'services' so module state isn't duplicated"
+    )
@@ -0,0 +1,251 @@
+"""
+Structured, sampled access logging off the request path.
+
+``setup_logging`` puts a ``QueueHandler`` in front of the root logger's
+handlers, so log calls only enqueue the record; formatting, secret redaction
+and the stdout write happen on a ``QueueListener`` thread. When the queue is
+full records are dropped (and counted) rather than blocking the event loop.
+
+``AccessLog.record`` writes one JSON line per request to the ``access`` logger.
+Failed (4xx/5xx) and slow requests are always logged; other requests are
+sampled at ``ACCESS_LOG_SAMPLE_RATE``. Verbosity is set per path prefix with
+``ACCESS_LOG_ROUTES``, a JSON object mapping a prefix to ``"off"``, ``"basic"``
+or ``"headers"`` (or to ``{"level": ..., "sample_rate": ...}``), e.g.
+``{"/health": "off", "/auth": {"level": "headers", "sample_rate": 1}}``.
+Header values that carry credentials are never written.
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+ACCESS_LOG_LEVEL = os.getenv("ACCESS_LOG_LEVEL", "basic").lower()
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+# Requests slower than this are logged regardless of sampling
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+ACCESS_LOG_ROUTES = os.getenv("ACCESS_LOG_ROUTES", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+OFF = "off"
+BASIC = "basic"
+HEADERS = "headers"
+LEVELS = (OFF, BASIC, HEADERS)
+
+SENSITIVE_HEADERS = frozenset({
+    "authorization", "proxy-authorization", "cookie", "set-cookie",
+    "solomon_consumer_key", "solomon-consumer-key", "api-token", "api_token",
+    "x-api-key", "openai-api-key", "openai_api_key"
+})
+
+# Credentials that end up inside free-form log messages
+_SECRET_PATTERNS = (
+    (re.compile(r"\bsk-[A-Za-z0-9_\-]{8,}"), "sk-***"),
+    (re.compile(r"(?i)\bbearer\s+[A-Za-z0-9_\-\.=]+"), "Bearer ***"),
+    (re.compile(r"(?i)(['\"]?(?:authorization|api[-_]?token|api[-_]?key|solomon_consumer_key)['\"]?\s*[:=]\s*['\"]?)[^'\",\s}]+"), r"\1***"),
+)
+
+
+def mask_secret(value: Optional[str]) -> str:
+    """Show at most the last four characters of a credential."""
+    if not value:
+        return ""
+    return f"***{value[-4:]}" if len(value) >= 16 else "***"
+
+
+def redact(text: str) -> str:
+    """Replace API keys, bearer tokens and credential assignments in text."""
+    for pattern, replacement in _SECRET_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def redact_headers(headers: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+    """Copy headers, masking the values of credential headers."""
+    if hasattr(headers, "items"):
+        headers = headers.items()
+    return {
+        name: mask_secret(value) if name.lower() in SENSITIVE_HEADERS else value
+        for name, value in headers
+    }
+
+
+class RedactingFilter(logging.Filter):
+    """Scrubs credentials from the rendered message. Runs on the listener thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        scrubbed = redact(message)
+        if scrubbed != message:
+            record.msg = scrubbed
+            record.args = None
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records unformatted so message rendering happens on the listener
+    thread, and drops records instead of raising when the queue is full.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so args and exc_info stay valid
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: Optional[_DeferredQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """
+    Route all logging through a bounded queue. Existing root handlers (or a
+    stderr handler when there are none) become the listener's targets.
+    """
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger()
+        targets = [handler for handler in root.handlers] or [logging.StreamHandler()]
+        for handler in targets:
+            root.removeHandler(handler)
+            if handler.formatter is None:
+                handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+            handler.addFilter(RedactingFilter())
+        _queue_handler = _DeferredQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *targets, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        for handler in _listener.handlers:
+            root.addHandler(handler)
+        _queue_handler = None
+        _listener = None
+
+
+class _AccessEntry:
+    """Serialized to JSON only when the listener renders the record."""
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return json.dumps(self.fields, separators=(",", ":"))
+
+
+def _parse_routes(raw: str) -> Dict[str, Dict[str, Any]]:
+    if not raw:
+        return {}
+    try:
+        routes = json.loads(raw)
+    except ValueError:
+        logger.warning("ACCESS_LOG_ROUTES is not valid JSON; ignoring it")
+        return {}
+    parsed = {}
+    for prefix, setting in routes.items():
+        if isinstance(setting, str):
+            setting = {"level": setting}
+        level = str(setting.get("level", ACCESS_LOG_LEVEL)).lower()
+        if level not in LEVELS:
+            logger.warning(f"Unknown access log level {level!r} for {prefix}; using {ACCESS_LOG_LEVEL}")
+            level = ACCESS_LOG_LEVEL
+        parsed[prefix] = {"level": level, "sample_rate": float(setting.get("sample_rate", ACCESS_LOG_SAMPLE_RATE))}
+    return parsed
+
+
+class AccessLog:
+    """
+    Per-request access log entries with per-route verbosity and sampling.
+
+    Args:
+        level: Default verbosity, one of ``off``, ``basic`` or ``headers``
+        sample_rate: Fraction of successful, fast requests that are logged
+        slow_ms: Requests at least this slow are always logged
+        routes: Path prefix -> ``{"level", "sample_rate"}`` overrides
+    """
+
+    def __init__(self, level: str = ACCESS_LOG_LEVEL, sample_rate: float = ACCESS_LOG_SAMPLE_RATE,
+                 slow_ms: float = ACCESS_LOG_SLOW_MS, routes: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.default = {"level": level if level in LEVELS else BASIC, "sample_rate": sample_rate}
+        self.slow_ms = slow_ms
+        # Longest prefix wins
+        self.routes = sorted((routes or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.access_logger = logging.getLogger("access")
+        self.logged = 0
+        self.sampled_out = 0
+
+    def settings_for(self, path: str) -> Dict[str, Any]:
+        for prefix, setting in self.routes:
+            if path.startswith(prefix):
+                return setting
+        return self.default
+
+    def record(self, request, status_code: int, duration_ms: float) -> None:
+        """Log one finished request, subject to its route's level and sampling."""
+        setting = self.settings_for(request.url.path)
+        level = setting["level"]
+        if level == OFF:
+            return
+        if status_code < 400 and duration_ms < self.slow_ms and random.random() >= setting["sample_rate"]:
+            self.sampled_out += 1
+            return
+        self.logged += 1
+
+        fields = {
+            "method": request.method,
+            "path": request.url.path,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "client": request.client.host if request.client else None
+        }
+        span = tracer.current_span()
+        if span is not None:
+            fields["trace_id"] = span.trace_id
+        if level == HEADERS:
+            fields["headers"] = redact_headers(request.headers.items())
+        self.access_logger.log(
+            logging.WARNING if status_code >= 500 else logging.INFO, "%s", _AccessEntry(fields)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "logged": self.logged,
+            "sampled_out": self.sampled_out,
+            "dropped": _queue_handler.dropped if _queue_handler else 0,
+            "queued": _queue_handler.queue.qsize() if _queue_handler else 0
+        }
+
+
+access_log = AccessLog(routes=_parse_routes(ACCESS_LOG_ROUTES))
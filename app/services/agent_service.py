@@ -18,6 +18,7 @@ from .tool_management import ToolManagementService
 from .workato_integration import WorkatoIntegration
 from .tools.memory_tool import MemoryTool
 from .session_memory import SessionMemory
+from .upstream_scheduler import Priority, get_openai_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +37,7 @@ class AgentService:
         """Initialize with an API key."""
         self.api_key = api_key
         self.agent = None
-        self.openai_client = AsyncOpenAI(api_key=api_key)
+        self.openai_client = AsyncOpenAI(api_key=api_key, http_client=get_openai_http_client(Priority.INTERACTIVE))
         self.session_memory = SessionMemory()
         self.initialized = False
     
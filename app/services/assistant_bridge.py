@@ -2,6 +2,7 @@ from typing import Dict, Any, List, Optional, AsyncGenerator, Union, Tuple
 import logging
 import json
 import asyncio
+import time
 from openai import AsyncOpenAI
 from dataclasses import dataclass
 
@@ -15,6 +16,15 @@ try:
 except ImportError:
     AGENT_SERVICES_AVAILABLE = False
 
+from .run_waiter import RunWaiter, make_registry_tool_handler
+from .upstream_scheduler import Priority, get_openai_http_client
+from .metrics import stream_first_token_seconds
+
+try:
+    from ..tools import tool_registry
+except ImportError:
+    tool_registry = {}
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -41,9 +51,11 @@ class AssistantBridge:
         self.assistant_id = assistant_id
         self.vector_store_ids = vector_store_ids
         self.conversation_history = []
-        self.openai_client = AsyncOpenAI(api_key=api_key)
+        # WebSocket chat goes ahead of batch work queued on the same key
+        self.openai_client = AsyncOpenAI(api_key=api_key, http_client=get_openai_http_client(Priority.INTERACTIVE))
         self._thread_id = None
         self.initialized = False
+        self.run_timeout = 300.0
         
         # Initialize agent service if available
         if AGENT_SERVICES_AVAILABLE:
@@ -77,12 +89,13 @@ class AssistantBridge:
             logger.error(f"Failed to initialize assistant bridge: {str(e)}")
             raise AssistantBridgeError(f"Initialization failed: {str(e)}")
             
-    async def chat(self, message: str) -> str:
+    async def chat(self, message: str, cancel_event: Optional[asyncio.Event] = None) -> str:
         """
         Process a chat message using the assistant.
         
         Args:
             message: The user's message
+            cancel_event: Optional event that aborts the run when set
         
         Returns:
             The assistant's response
@@ -118,19 +131,16 @@ class AssistantBridge:
                 assistant_id=self.assistant_id
             )
             
-            # Wait for the run to complete
-            while True:
-                run_status = await self.openai_client.beta.threads.runs.retrieve(
-                    thread_id=self._thread_id,
-                    run_id=run.id
-                )
-                
-                if run_status.status == "completed":
-                    break
-                elif run_status.status in ["failed", "cancelled", "expired"]:
-                    raise AssistantBridgeError(f"Run failed with status: {run_status.status}")
-                
-                await asyncio.sleep(1)
+            # Wait for the run to complete, executing any requested tools
+            waiter = RunWaiter(
+                self.openai_client,
+                tool_handler=make_registry_tool_handler(tool_registry),
+                timeout=self.run_timeout,
+                cancel_event=cancel_event
+            )
+            run_status = await waiter.wait(self._thread_id, run.id)
+            if run_status.status != "completed":
+                raise AssistantBridgeError(f"Run failed with status: {run_status.status}")
             
             # Get the messages
             messages = await self.openai_client.beta.threads.messages.list(
@@ -161,6 +171,7 @@ class AssistantBridge:
         """Process a chat message with streaming responses."""
         # Add the message to history
         self.conversation_history.append({"role": "user", "content": message})
+        started = time.perf_counter()
         
         try:
             # If agent service is available, use streaming
@@ -174,6 +185,8 @@ class AssistantBridge:
                 async for event in self.agent_service.run_existing_agent_streaming(message, context):
                     if event.type == "content_chunk":
                         content = event.data.get("content", "")
+                        if not full_response and content:
+                            stream_first_token_seconds.observe(time.perf_counter() - started, "agent")
                         full_response += content
                         yield content, "message"
                     elif event.type == "tool_event":
@@ -185,6 +198,7 @@ class AssistantBridge:
             
             # Otherwise, get the complete response first then simulate streaming
             full_response = await self.chat(message)
+            stream_first_token_seconds.observe(time.perf_counter() - started, "assistant")
             
             # Simulate streaming by breaking the response into chunks
             sentences = full_response.split(". ")
@@ -0,0 +1,94 @@
+"""
+Per-socket conversation map for multiplexed WebSocket connections.
+"""
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+import logging
+import os
+import time
+
+from .generation_control import GenerationTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONVERSATION_ID = "default"
+MAX_CONVERSATIONS_PER_SOCKET = int(os.getenv("WS_MAX_CONVERSATIONS_PER_SOCKET", "8"))
+
+
+class ConversationLimitError(Exception):
+    """Raised when a socket has no room for another conversation."""
+    pass
+
+
+@dataclass
+class Conversation:
+    """One assistant conversation carried over a shared socket."""
+    conversation_id: str
+    assistant_id: str
+    bridge: Any
+    generation: GenerationTask = field(default_factory=GenerationTask)
+    last_used: float = field(default_factory=time.monotonic)
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+
+class ConversationMux:
+    """
+    Holds the bridges for every conversation on one WebSocket.
+
+    The number of conversations is capped; when the cap is reached the least
+    recently used idle conversation is evicted. Conversations that are still
+    generating are never evicted.
+    """
+
+    def __init__(self, max_conversations: int = MAX_CONVERSATIONS_PER_SOCKET):
+        self.max_conversations = max_conversations
+        self._conversations: Dict[str, Conversation] = {}
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        conversation = self._conversations.get(conversation_id)
+        if conversation:
+            conversation.touch()
+        return conversation
+
+    def ids(self) -> List[str]:
+        return list(self._conversations)
+
+    async def add(self, conversation_id: str, assistant_id: str, bridge: Any) -> Conversation:
+        """
+        Register a bridge for ``conversation_id``, replacing any existing one.
+
+        Raises:
+            ConversationLimitError: The cap is reached and every conversation is busy.
+        """
+        await self.remove(conversation_id)
+
+        if len(self._conversations) >= self.max_conversations:
+            idle = [c for c in self._conversations.values() if not c.generation.is_running]
+            if not idle:
+                raise ConversationLimitError(
+                    f"At most {self.max_conversations} conversations per connection are allowed"
+                )
+            oldest = min(idle, key=lambda c: c.last_used)
+            logger.info(f"Evicting idle conversation {oldest.conversation_id}")
+            await self.remove(oldest.conversation_id)
+
+        conversation = Conversation(conversation_id=conversation_id, assistant_id=assistant_id, bridge=bridge)
+        self._conversations[conversation_id] = conversation
+        return conversation
+
+    async def remove(self, conversation_id: str) -> bool:
+        conversation = self._conversations.pop(conversation_id, None)
+        if not conversation:
+            return False
+        await conversation.generation.cancel()
+        return True
+
+    async def close(self) -> None:
+        """Cancel every generation and drop all conversations."""
+        for conversation_id in list(self._conversations):
+            await self.remove(conversation_id)
@@ -0,0 +1,60 @@
+"""
+Cancellable generation tasks for WebSocket handlers.
+"""
+from typing import Any, Awaitable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationTask:
+    """
+    Runs at most one generation at a time as a background task.
+
+    WebSocket handlers keep their receive loop free while a response streams,
+    so they can react to ``stop`` messages and disconnects. Cancelling the
+    task propagates ``CancelledError`` into the OpenAI stream or run waiter,
+    which closes the upstream response or cancels the run.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, coro: Awaitable[Any]) -> asyncio.Task:
+        """Start a generation. Callers must check ``is_running`` first."""
+        if self.is_running:
+            raise RuntimeError("A generation is already in progress")
+        self._task = asyncio.create_task(coro)
+        self._task.add_done_callback(self._log_failure)
+        return self._task
+
+    async def cancel(self, timeout: float = 5.0) -> bool:
+        """
+        Cancel the running generation and wait for it to unwind.
+
+        Returns:
+            True if a generation was running and has been cancelled.
+        """
+        task = self._task
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning("Generation did not stop within %.1fs after cancellation", timeout)
+        except Exception:
+            pass
+        return True
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Generation task failed: {str(task.exception())}")
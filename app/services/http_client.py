@@ -0,0 +1,221 @@
+"""
+Shared async HTTP client for upstream OpenAI calls.
+
+One ``aiohttp.ClientSession`` (and its connection pool) is shared by the whole
+process instead of opening a connection per request. ``OpenAIClient`` binds
+that session to a tenant's API key and paces its calls through the
+:mod:`upstream_scheduler`.
+"""
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import time
+
+import aiohttp
+
+from .upstream_scheduler import scheduler, estimate_tokens, is_quota_error, UPSTREAM_MAX_RETRIES
+from .resilience import get_upstream, classify_aiohttp_error, Failure, IDEMPOTENT_METHODS
+from .metrics import upstream_request_seconds, endpoint_label, status_label
+from .tracing import tracer, CLIENT
+
+logger = logging.getLogger(__name__)
+
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=None, connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def close_http_session() -> None:
+    """Close the shared session. Called on application shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+class OpenAIHTTPError(Exception):
+    """Raised when OpenAI answers with an error status."""
+
+    def __init__(self, status: int, body: str):
+        self.status = status
+        self.body = body
+        super().__init__(f"OpenAI API error {status}: {body}")
+
+    @property
+    def message(self) -> str:
+        """The ``error.message`` field of the response, or the raw body."""
+        try:
+            return json.loads(self.body).get("error", {}).get("message") or self.body
+        except (ValueError, AttributeError):
+            return self.body
+
+
+class OpenAIClient:
+    """Async OpenAI REST client bound to one API key, using the shared session."""
+
+    def __init__(self, api_key: str, base_url: str = OPENAI_API_BASE):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "OpenAI-Beta": "assistants=v2"
+        }
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Any] = None,
+        data: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """Send a request and return the decoded JSON response. See :meth:`request_bytes`."""
+        body = await self.request_bytes(method, path, params=params, json_body=json_body, data=data)
+        return json.loads(body) if body else {}
+
+    async def request_bytes(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Any] = None,
+        data: Optional[Any] = None,
+    ) -> bytes:
+        """
+        Send a request and return the raw response body.
+
+        The call waits for capacity on this key first. A 429 is retried after
+        the pause the response asks for, unless the body is a one-shot stream.
+        Connection failures and 5xx go through the ``openai`` circuit breaker
+        and are retried when the request is idempotent.
+
+        Raises:
+            OpenAIHTTPError: The response status is 400 or above.
+        """
+        session = await get_http_session()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        tokens = estimate_tokens(json_body)
+        replayable = data is None or isinstance(data, (bytes, str, dict))
+        retries = UPSTREAM_MAX_RETRIES if replayable else 0
+        upstream = get_upstream("openai")
+        endpoint = endpoint_label(path)
+
+        async def send():
+            await scheduler.acquire(self.api_key, tokens)
+            started = time.perf_counter()
+            status = None
+            try:
+                async with session.request(method, url, headers=self.headers(), params=params, json=json_body, data=data) as response:
+                    body = await response.read()
+                    status = response.status
+                    scheduler.observe(self.api_key, response.status, response.headers)
+                    return response.status, body
+            finally:
+                upstream_request_seconds.observe(time.perf_counter() - started, "openai", endpoint, status_label(status))
+
+        def classify(e: BaseException) -> Failure:
+            failure = classify_aiohttp_error(e)
+            # A consumed stream can't be sent again, even if the server never saw it
+            return failure if replayable else Failure(counts=failure.counts)
+
+        with tracer.span(f"openai {method.upper()} {endpoint}", CLIENT, {"http.method": method.upper(), "http.url": url}) as span:
+            for attempt in range(retries + 1):
+                status, body = await upstream.acall(
+                    send,
+                    idempotent=replayable and method.upper() in IDEMPOTENT_METHODS,
+                    is_failure=lambda result: result[0] >= 500,
+                    classify=classify
+                )
+                span.set_attribute("http.status_code", status)
+                if status < 400:
+                    return body
+                text = body.decode("utf-8", errors="replace")
+                if status == 429 and attempt < retries and not is_quota_error(text):
+                    logger.info(f"OpenAI {method} {path} rate limited, retrying (attempt {attempt + 1} of {retries})")
+                    continue
+                logger.error(f"OpenAI {method} {path} failed with {status}: {text}")
+                raise OpenAIHTTPError(status, text)
+
+    async def open_stream(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> aiohttp.ClientResponse:
+        """
+        Send a bodiless request and return the response with its body unread,
+        so it can be forwarded as it arrives.
+
+        Pacing, 429 retries and the circuit breaker apply as in
+        :meth:`request_bytes`, up to the response headers; the latency metric
+        and span cover the same. The caller must ``release()`` the response.
+
+        Raises:
+            OpenAIHTTPError: The response status is 400 or above.
+        """
+        session = await get_http_session()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        upstream = get_upstream("openai")
+        endpoint = endpoint_label(path)
+
+        async def send():
+            await scheduler.acquire(self.api_key, 0)
+            started = time.perf_counter()
+            status = None
+            try:
+                response = await session.request(method, url, headers=self.headers(), params=params)
+                status = response.status
+                scheduler.observe(self.api_key, response.status, response.headers)
+                if status >= 400:
+                    try:
+                        return status, await response.read()
+                    finally:
+                        response.release()
+                return status, response
+            finally:
+                upstream_request_seconds.observe(time.perf_counter() - started, "openai", endpoint, status_label(status))
+
+        with tracer.span(f"openai {method.upper()} {endpoint}", CLIENT, {"http.method": method.upper(), "http.url": url}) as span:
+            for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+                status, result = await upstream.acall(
+                    send,
+                    idempotent=method.upper() in IDEMPOTENT_METHODS,
+                    is_failure=lambda result: result[0] >= 500
+                )
+                span.set_attribute("http.status_code", status)
+                if status < 400:
+                    return result
+                text = result.decode("utf-8", errors="replace")
+                if status == 429 and attempt < UPSTREAM_MAX_RETRIES and not is_quota_error(text):
+                    logger.info(f"OpenAI {method} {path} rate limited, retrying (attempt {attempt + 1} of {UPSTREAM_MAX_RETRIES})")
+                    continue
+                logger.error(f"OpenAI {method} {path} failed with {status}: {text}")
+                raise OpenAIHTTPError(status, text)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.request("GET", path, params=params)
+
+    async def get_bytes(self, path: str, params: Optional[Dict[str, Any]] = None) -> bytes:
+        """GET returning the undecoded JSON body, for responses passed straight through."""
+        return await self.request_bytes("GET", path, params=params)
+
+    async def post(self, path: str, json_body: Optional[Any] = None, data: Optional[Any] = None) -> Dict[str, Any]:
+        return await self.request("POST", path, json_body=json_body, data=data)
+
+    async def delete(self, path: str) -> Dict[str, Any]:
+        return await self.request("DELETE", path)
@@ -0,0 +1,81 @@
+"""
+Fast JSON responses for endpoints that proxy OpenAI objects.
+
+By default FastAPI validates a returned model against ``response_model`` again
+and then encodes it, so a proxied OpenAI list is parsed, validated twice and
+re-serialized on its way through. :func:`proxy_response` skips that: the
+upstream JSON is validated once against the model and serialized by Pydantic
+directly, or, where a deployment opts in, sent unchanged. Returning a ``Response`` leaves
+``response_model`` in place for the OpenAPI schema.
+
+Configuration:
+    PROXY_RESPONSE_VALIDATION: ``on`` validates upstream JSON against the
+        endpoint's model a single time, dropping fields the model doesn't
+        declare, as before (default); ``off`` sends it as-is, including
+        undeclared fields
+"""
+from typing import Any, Optional, Type, Union
+import json
+import logging
+import os
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROXY_RESPONSE_VALIDATION = os.getenv("PROXY_RESPONSE_VALIDATION", "on").lower()
+if PROXY_RESPONSE_VALIDATION not in ("on", "off"):
+    logger.warning(f"Unknown PROXY_RESPONSE_VALIDATION {PROXY_RESPONSE_VALIDATION!r}; using on")
+    PROXY_RESPONSE_VALIDATION = "on"
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered by :func:`dumps`, for plain dicts and lists."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Body that is already encoded JSON."""
+    media_type = "application/json"
+
+
+def proxy_response(content: Union[bytes, dict, list], model: Type[BaseModel], status_code: int = 200,
+                   validation: Optional[str] = None) -> Response:
+    """
+    Response for an endpoint that returns an OpenAI object unchanged.
+
+    Args:
+        content: Upstream body as bytes, or already decoded (e.g. from a cache)
+        model: The endpoint's ``response_model``; only used when
+            validation is ``on``
+        status_code: Response status
+        validation: ``on`` or ``off``; defaults to ``PROXY_RESPONSE_VALIDATION``
+
+    Raises:
+        pydantic.ValidationError: Validation is on and ``content`` doesn't match ``model``.
+    """
+    if (validation or PROXY_RESPONSE_VALIDATION) == "on":
+        if isinstance(content, (bytes, str)):
+            instance = model.model_validate_json(content)
+        else:
+            instance = model.model_validate(content)
+        return RawJSONResponse(instance.model_dump_json(by_alias=True), status_code=status_code)
+    if isinstance(content, (bytes, str)):
+        return RawJSONResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
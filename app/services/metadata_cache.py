@@ -0,0 +1,181 @@
+"""
+Per-tenant read-through cache for OpenAI metadata.
+
+Assistant, vector store and file metadata rarely changes, but the front-end
+reads it on every page load. Entries are keyed by ``(tenant, resource,
+params)`` and served fresh for ``METADATA_CACHE_TTL`` seconds. For a further
+``METADATA_CACHE_STALE_TTL`` seconds the stale value is returned immediately
+while a background task refreshes it. Our own create/modify/delete endpoints
+invalidate the affected entries. Concurrent misses for the same key share one
+upstream call through a :class:`~.single_flight.SingleFlight` group.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import asyncio
+import logging
+import os
+import time
+
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+METADATA_CACHE_ENABLED = os.getenv("METADATA_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "30"))
+METADATA_CACHE_STALE_TTL = float(os.getenv("METADATA_CACHE_STALE_TTL", "300"))
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "5000"))
+
+CacheKey = Tuple[str, str, Tuple[Hashable, ...]]
+Loader = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+
+
+class MetadataCache:
+    """
+    LRU-bounded TTL cache with stale-while-revalidate.
+
+    Args:
+        ttl: Seconds an entry is served without refreshing
+        stale_ttl: Further seconds a stale entry is served while it refreshes
+        max_entries: Least recently used entries are evicted beyond this
+        name: Name of the cache's single-flight group in stats
+    """
+
+    def __init__(self, ttl: float = METADATA_CACHE_TTL, stale_ttl: float = METADATA_CACHE_STALE_TTL,
+                 max_entries: int = METADATA_CACHE_MAX_ENTRIES, enabled: bool = METADATA_CACHE_ENABLED,
+                 name: str = "metadata_cache"):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._refreshing: Dict[CacheKey, asyncio.Task] = {}
+        # Bumped on invalidation so a load that started earlier doesn't store an outdated value
+        self._generation = 0
+        # Keyed by (cache key, generation) so callers after an invalidation don't join an older load
+        self._flight = SingleFlight(name, key_func=lambda key, generation: (key, generation))
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(tenant: str, resource: str, *params: Hashable) -> CacheKey:
+        return (tenant, resource, tuple(params))
+
+    async def get_or_load(self, tenant: str, resource: str, params: Tuple[Hashable, ...], loader: Loader) -> Any:
+        """Return the cached value for the key, loading it with ``loader`` when missing or expired."""
+        key = self.key(tenant, resource, *params)
+        if not self.enabled:
+            return await self._flight.do(loader, key, self._generation)
+
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            age = now - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh_in_background(key, loader)
+                return entry.value
+
+        self.misses += 1
+        generation = self._generation
+
+        async def load():
+            value = await loader()
+            self._store(key, value, generation)
+            return value
+
+        return await self._flight.do(load, key, generation)
+
+    def _store(self, key: CacheKey, value: Any, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._entries[key] = _Entry(value=value, fetched_at=time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _refresh_in_background(self, key: CacheKey, loader: Loader) -> None:
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            generation = self._generation
+            try:
+                value = await loader()
+                self._store(key, value, generation)
+                self.refreshes += 1
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Background refresh of {key[1]} failed: {str(e)}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def invalidate(self, tenant: str, resource: str, *params: Hashable) -> int:
+        """
+        Drop cached entries of a tenant's resource.
+
+        With ``params``, only entries whose params start with them are dropped;
+        without, every entry of the resource is.
+
+        Returns:
+            The number of entries removed.
+        """
+        self._generation += 1
+        matching = [
+            key for key in self._entries
+            if key[0] == tenant and key[1] == resource and key[2][:len(params)] == tuple(params)
+        ]
+        for key in matching:
+            del self._entries[key]
+        self.invalidations += len(matching)
+        return len(matching)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshing": len(self._refreshing),
+            "invalidations": self.invalidations
+        }
+
+
+metadata_cache = MetadataCache()
+
+# Resource names used as cache keys
+ASSISTANT = "assistant"
+ASSISTANT_LIST = "assistant_list"
+VECTOR_STORE = "vector_store"
+VECTOR_STORE_LIST = "vector_store_list"
+FILE = "file"
@@ -0,0 +1,281 @@
+"""
+In-process metrics in the Prometheus text format, served at ``GET /metrics``.
+
+Histograms, counters and gauges are plain in-memory series guarded by a lock;
+observing a value costs a bisect and two additions. Everything else (cache,
+breaker and queue stats that already exist elsewhere) is read by collectors
+only when ``/metrics`` is scraped.
+
+Endpoint labels are normalized with :func:`endpoint_label` so object ids in
+URLs don't create a series per thread or run.
+"""
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import functools
+import re
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RUN_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# OpenAI ids (thread_abc123, run_...), numbers, uuids and other long tokens
+_ID_SEGMENT = re.compile(r"^(?:[a-z]+_[A-Za-z0-9]{6,}|\d+|[0-9a-fA-F-]{32,36}|[A-Za-z0-9_\-]{24,})$")
+
+# A collector yields (name, type, help, [(labels, value), ...])
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+def endpoint_label(url: str) -> str:
+    """Path of ``url`` with id-like segments replaced by ``{id}``."""
+    path = urlsplit(url).path if "://" in url else url.split("?", 1)[0]
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")) or "/"
+
+
+def status_label(status: Optional[int]) -> str:
+    """``2xx``-style class of an HTTP status, or ``error`` when there was no response."""
+    return f"{status // 100}xx" if status else "error"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Gauge(_Metric):
+    """Current value per label set."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items()) or ([((), 0)] if not self.label_names else [])
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution per label set.
+
+    Args:
+        name: Metric name, conventionally ending in ``_seconds``
+        documentation: HELP text
+        labels: Label names; values are passed positionally to :meth:`observe`
+        buckets: Upper bounds in ascending order; ``+Inf`` is implied
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the elapsed time of its block."""
+        return _Timer(self, labels)
+
+    def timed(self, *labels: str):
+        """Decorator observing the duration of each call."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labels)
+            return wrapper
+        return decorator
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = []
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Collector] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labels, buckets)
+
+    def register_collector(self, name: str, collector: Collector) -> None:
+        """Add (or replace) a callable producing samples at scrape time."""
+        self._collectors[name] = collector
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in list(self._collectors.values()):
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+upstream_request_seconds = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Latency of individual upstream call attempts",
+    ("upstream", "endpoint", "status")
+)
+db_query_seconds = registry.histogram(
+    "db_query_duration_seconds", "Latency of database queries by DatabaseConnector method", ("method",), DB_BUCKETS
+)
+run_duration_seconds = registry.histogram(
+    "run_duration_seconds", "Wall time of Assistants API runs from creation to terminal status", ("status",), RUN_BUCKETS
+)
+tool_duration_seconds = registry.histogram(
+    "tool_duration_seconds", "Latency of assistant tool executions", ("tool", "outcome")
+)
+stream_first_token_seconds = registry.histogram(
+    "stream_first_token_seconds", "Time from a chat message to the first streamed content", ("mode",)
+)
+websocket_connections = registry.gauge("websocket_connections", "Open WebSocket connections")
+runs_in_flight = registry.gauge("runs_in_flight", "Assistants API runs being waited on")
+
+
+class track_run:
+    """
+    Counts a run as in flight for the duration of the block and records its
+    wall time under ``status``, which the block sets once the run ends.
+    """
+
+    def __init__(self):
+        self.status = "error"
+
+    def __enter__(self) -> "track_run":
+        self.started = time.perf_counter()
+        runs_in_flight.inc()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        runs_in_flight.dec()
+        run_duration_seconds.observe(time.perf_counter() - self.started, self.status)
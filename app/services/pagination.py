@@ -0,0 +1,99 @@
+"""
+Auto-paginating iteration over OpenAI list endpoints.
+
+:func:`paginate` yields items across pages and fetches page N+1 while the
+caller is still consuming page N. :func:`ndjson_response` streams any such
+iterator to the client as newline-delimited JSON.
+"""
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import json
+import logging
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from .http_client import OpenAIClient, OpenAIHTTPError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def paginate(
+    client: OpenAIClient,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    max_items: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield every item of a cursor-paginated list endpoint.
+
+    Args:
+        client: Tenant OpenAI client
+        path: List endpoint, e.g. ``"vector_stores"``
+        params: Extra query parameters (``order``, filters, a starting ``after``)
+        page_size: Items requested per page
+        max_items: Stop after this many items
+    """
+    base_params = dict(params or {})
+    base_params["limit"] = page_size
+
+    def fetch(after: Optional[str]) -> "asyncio.Task":
+        page_params = dict(base_params)
+        if after:
+            page_params["after"] = after
+        return asyncio.create_task(client.get(path, params=page_params))
+
+    next_page = fetch(base_params.pop("after", None))
+    yielded = 0
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+            data = page.get("data") or []
+
+            if page.get("has_more") and data:
+                # Prefetch while the caller works through this page
+                next_page = fetch(page.get("last_id") or data[-1].get("id"))
+
+            for item in data:
+                yield item
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+
+
+async def ndjson_response(items: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Stream ``items`` as NDJSON.
+
+    The first page is fetched before the response starts, so upstream errors
+    such as 404 still map to a proper status code. Errors after that are
+    reported as a final ``{"error": ...}`` line.
+    """
+    iterator = items.__aiter__()
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except OpenAIHTTPError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+
+    async def body() -> AsyncIterator[bytes]:
+        if first is None:
+            return
+        yield (json.dumps(first) + "\n").encode("utf-8")
+        try:
+            async for item in iterator:
+                yield (json.dumps(item) + "\n").encode("utf-8")
+        except Exception as e:
+            logger.error(f"Error while streaming list: {str(e)}")
+            yield (json.dumps({"error": str(e)}) + "\n").encode("utf-8")
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
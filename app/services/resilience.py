@@ -0,0 +1,426 @@
+"""
+Shared retry, timeout and circuit-breaker policy for upstream dependencies.
+
+Each dependency (OpenAI, Workato, our own Solomon API, Cognito) is an
+:class:`Upstream` with a circuit breaker, a retry policy and connect/read
+timeouts. When a dependency keeps failing its breaker opens, and calls fail
+immediately with :class:`CircuitOpenError` instead of each tying up a worker
+until its socket times out. After ``reset_timeout`` a single trial call is let
+through to probe for recovery.
+
+Retries use full-jitter exponential backoff, stop when the caller's deadline
+would be exceeded, and only repeat a non-idempotent call when the earlier
+attempt provably never reached the server.
+
+Rate limiting (429) of OpenAI keys is handled by :mod:`upstream_scheduler`,
+not here.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+
+from .metrics import upstream_request_seconds, endpoint_label, status_label
+from .tracing import tracer, CLIENT, TRACE_PROPAGATE_UPSTREAMS
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# A ``requests`` timeout: seconds, or a ``(connect, read)`` tuple
+Timeout = Union[float, Tuple[float, float]]
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised without calling the upstream while its circuit is open.
+
+    Subclasses ``requests.exceptions.ConnectionError`` so existing
+    ``except RequestException`` handlers treat it like an unreachable host.
+    """
+
+    def __init__(self, upstream: str, retry_in: float):
+        self.upstream = upstream
+        self.retry_in = retry_in
+        super().__init__(f"{upstream} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after ``failure_threshold`` consecutive failures;
+    open -> half-open after ``reset_timeout`` seconds, admitting one trial call;
+    half-open -> closed on success, or back to open on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self) -> None:
+        """Raise :class:`CircuitOpenError` unless a call may go ahead."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == self.OPEN and elapsed >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial that ended without an outcome (e.g. was cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                if self.state == self.CLOSED:
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+def _clamp_timeout(timeout: Timeout, deadline_at: Optional[float]) -> Optional[Timeout]:
+    """``timeout`` cut down to the time left before ``deadline_at``; None once it has passed."""
+    if deadline_at is None:
+        return timeout
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0:
+        return None
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+@dataclass
+class RetryPolicy:
+    """Full-jitter exponential backoff: each delay is uniform in [0, min(maximum, base * 2**attempt)]."""
+    attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5.0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+@dataclass
+class Upstream:
+    """Timeouts, retry policy and circuit breaker for one dependency."""
+    name: str
+    connect_timeout: float
+    read_timeout: float
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    breaker: CircuitBreaker = None
+
+    def __post_init__(self):
+        if self.breaker is None:
+            self.breaker = CircuitBreaker(self.name)
+
+    @property
+    def timeout(self):
+        """``(connect, read)`` tuple for ``requests``."""
+        return (self.connect_timeout, self.read_timeout)
+
+    def _plan_retry(self, attempt: int, deadline_at: Optional[float]) -> Optional[float]:
+        """Delay before the next attempt, or None when out of attempts or time."""
+        if attempt + 1 >= self.retry.attempts:
+            return None
+        delay = self.retry.delay(attempt)
+        if deadline_at is not None and time.monotonic() + delay + self.connect_timeout >= deadline_at:
+            return None
+        return delay
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        *,
+        idempotent: bool = True,
+        deadline: Optional[float] = None,
+        is_failure: Callable[[Any], bool] = lambda result: False,
+        classify: Callable[[BaseException], "Failure"] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> Any:
+        """
+        Run ``fn`` with the breaker, retrying per policy.
+
+        Args:
+            fn: The upstream call
+            idempotent: Whether repeating a call the server may have seen is safe
+            deadline: Overall time budget in seconds, across retries
+            is_failure: Flags a returned result (e.g. a 5xx response) as a failure;
+                the last such result is returned rather than raised
+            classify: Maps an exception to a :class:`Failure`; defaults to
+                :func:`classify_requests_error`
+            timeout: When given, ``fn`` is called with this ``requests`` timeout,
+                shortened so that no attempt runs past ``deadline``
+        """
+        classify = classify or classify_requests_error
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+        attempt = 0
+        while True:
+            if timeout is not None:
+                attempt_timeout = _clamp_timeout(timeout, deadline_at)
+                if attempt_timeout is None:
+                    raise requests.exceptions.Timeout(f"{self.name} call deadline of {deadline}s exceeded")
+            self.breaker.before_call()
+            try:
+                result = fn(attempt_timeout) if timeout is not None else fn()
+            except Exception as e:
+                failure = classify(e)
+                if not failure.counts:
+                    # A bad request or a bug says nothing about the upstream's health
+                    self.breaker.release_trial()
+                    raise
+                self.breaker.record_failure()
+                delay = self._plan_retry(attempt, deadline_at) if (idempotent or failure.never_sent) else None
+                if delay is None:
+                    raise
+                logger.info(f"{self.name} call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+            else:
+                if not is_failure(result):
+                    self.breaker.record_success()
+                    return result
+                self.breaker.record_failure()
+                delay = self._plan_retry(attempt, deadline_at) if idempotent else None
+                if delay is None:
+                    return result
+                logger.info(f"{self.name} call returned an error, retry {attempt + 1} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        idempotent: bool = True,
+        deadline: Optional[float] = None,
+        is_failure: Callable[[Any], bool] = lambda result: False,
+        classify: Callable[[BaseException], "Failure"] = None,
+    ) -> Any:
+        """Async variant of :meth:`call`."""
+        classify = classify or classify_aiohttp_error
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                # The caller went away; the trial says nothing about the upstream,
+                # so let the next call probe instead of leaving the circuit stuck
+                self.breaker.release_trial()
+                raise
+            except Exception as e:
+                failure = classify(e)
+                if not failure.counts:
+                    # A bad request or a bug says nothing about the upstream's health
+                    self.breaker.release_trial()
+                    raise
+                self.breaker.record_failure()
+                delay = self._plan_retry(attempt, deadline_at) if (idempotent or failure.never_sent) else None
+                if delay is None:
+                    raise
+                logger.info(f"{self.name} call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+            else:
+                if not is_failure(result):
+                    self.breaker.record_success()
+                    return result
+                self.breaker.record_failure()
+                delay = self._plan_retry(attempt, deadline_at) if idempotent else None
+                if delay is None:
+                    return result
+                logger.info(f"{self.name} call returned an error, retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+@dataclass
+class Failure:
+    """How an exception affects the breaker and retries."""
+    counts: bool
+    never_sent: bool = False
+
+
+def classify_requests_error(e: BaseException) -> Failure:
+    if isinstance(e, CircuitOpenError):
+        return Failure(counts=False)
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return Failure(counts=True, never_sent=True)
+    if isinstance(e, requests.exceptions.ConnectionError):
+        # Refused or unresolvable connections never carried the request
+        text = str(e)
+        never_sent = "NewConnectionError" in text or "NameResolutionError" in text or "Failed to establish" in text
+        return Failure(counts=True, never_sent=never_sent)
+    if isinstance(e, requests.exceptions.Timeout):
+        return Failure(counts=True)
+    return Failure(counts=False)
+
+
+def classify_aiohttp_error(e: BaseException) -> Failure:
+    try:
+        import aiohttp
+    except ImportError:
+        aiohttp = None
+    if aiohttp is not None:
+        if isinstance(e, aiohttp.ClientConnectorError):
+            return Failure(counts=True, never_sent=True)
+        if isinstance(e, (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError, aiohttp.ServerTimeoutError)):
+            return Failure(counts=True)
+    if isinstance(e, asyncio.TimeoutError):
+        return Failure(counts=True)
+    return Failure(counts=False)
+
+
+_RETRYABLE_AWS_CODES = {"InternalErrorException", "ServiceUnavailable", "TooManyRequestsException", "ThrottlingException", "RequestTimeout"}
+
+
+def classify_botocore_error(e: BaseException) -> Failure:
+    try:
+        from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+    except ImportError:
+        return Failure(counts=False)
+    if isinstance(e, (EndpointConnectionError, ConnectTimeoutError)):
+        return Failure(counts=True, never_sent=True)
+    if isinstance(e, ReadTimeoutError):
+        return Failure(counts=True)
+    if isinstance(e, ClientError):
+        status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        code = e.response.get("Error", {}).get("Code")
+        # Throttling means the request was rejected before it was acted on
+        return Failure(counts=status >= 500 or code in _RETRYABLE_AWS_CODES, never_sent=code in ("TooManyRequestsException", "ThrottlingException"))
+    return Failure(counts=False)
+
+
+def is_server_error(response: Any) -> bool:
+    status = getattr(response, "status_code", None) or getattr(response, "status", None) or 0
+    return status >= 500
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _upstream(name: str, connect: float, read: float, attempts: int, threshold: int, reset: float) -> Upstream:
+    prefix = name.upper()
+    return Upstream(
+        name=name,
+        connect_timeout=_env_float(f"{prefix}_CONNECT_TIMEOUT", connect),
+        read_timeout=_env_float(f"{prefix}_READ_TIMEOUT", read),
+        retry=RetryPolicy(attempts=int(os.getenv(f"{prefix}_RETRY_ATTEMPTS", str(attempts)))),
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv(f"{prefix}_BREAKER_THRESHOLD", str(threshold))),
+            reset_timeout=_env_float(f"{prefix}_BREAKER_RESET", reset)
+        )
+    )
+
+
+# Timeouts and thresholds can be overridden per upstream, e.g. WORKATO_READ_TIMEOUT=30
+upstreams: Dict[str, Upstream] = {
+    "openai": _upstream("openai", connect=5, read=120, attempts=3, threshold=10, reset=15),
+    "workato": _upstream("workato", connect=5, read=60, attempts=2, threshold=5, reset=30),
+    "solomon_api": _upstream("solomon_api", connect=5, read=120, attempts=2, threshold=5, reset=30),
+    "cognito": _upstream("cognito", connect=3, read=10, attempts=3, threshold=5, reset=30),
+}
+
+
+def get_upstream(name: str) -> Upstream:
+    return upstreams[name]
+
+
+def resilient_request(upstream: str, method: str, url: str, *, deadline: Optional[float] = None,
+                      idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+    """
+    ``requests.request`` through an upstream's breaker, retry policy and timeouts.
+
+    5xx responses count as failures and are retried when the call is
+    idempotent; the final response is returned as-is, so callers keep using
+    ``raise_for_status`` or ``response.text`` as before. ``idempotent`` defaults
+    from the HTTP method.
+    """
+    target = upstreams[upstream]
+    timeout = kwargs.pop("timeout", target.timeout)
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    endpoint = endpoint_label(url)
+
+    def send(attempt_timeout: Timeout):
+        started = time.perf_counter()
+        status = None
+        try:
+            response = requests.request(method, url, timeout=attempt_timeout, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            upstream_request_seconds.observe(time.perf_counter() - started, upstream, endpoint, status_label(status))
+
+    with tracer.span(f"{upstream} {method.upper()} {endpoint}", CLIENT, {
+        "http.method": method.upper(), "http.url": url.split("?", 1)[0], "upstream": upstream
+    }) as span:
+        if upstream in TRACE_PROPAGATE_UPSTREAMS:
+            kwargs["headers"] = tracer.inject(kwargs.get("headers"))
+        response = target.call(
+            send,
+            idempotent=idempotent,
+            deadline=deadline,
+            is_failure=is_server_error,
+            timeout=timeout
+        )
+        span.set_attribute("http.status_code", response.status_code)
+        return response
+
+
+def resilience_stats() -> Dict[str, Any]:
+    return {
+        name: {
+            **upstream.breaker.stats(),
+            "connect_timeout": upstream.connect_timeout,
+            "read_timeout": upstream.read_timeout,
+            "retry_attempts": upstream.retry.attempts
+        }
+        for name, upstream in upstreams.items()
+    }
@@ -0,0 +1,244 @@
+"""
+Async waiter for Assistants API runs.
+
+Polls a run with adaptive backoff until it reaches a terminal status, dispatches
+``requires_action`` tool calls, enforces a hard deadline and cancels the
+upstream run when the caller goes away.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+from dataclasses import dataclass
+import asyncio
+import json
+import logging
+import time
+
+from .metrics import track_run, tool_duration_seconds
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled", "expired", "incomplete"}
+
+ToolHandler = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+
+class RunWaiterError(Exception):
+    """Base exception for run waiter errors."""
+    pass
+
+
+class RunTimeoutError(RunWaiterError):
+    """Raised when a run does not finish before the deadline."""
+    pass
+
+
+class RunCancelledError(RunWaiterError):
+    """Raised when waiting is aborted because the caller cancelled."""
+    pass
+
+
+class RunActionError(RunWaiterError):
+    """Raised when a run requires an action that cannot be handled."""
+    pass
+
+
+@dataclass
+class BackoffPolicy:
+    """Polling intervals: start fast, grow geometrically, cap at maximum."""
+    initial: float = 0.25
+    maximum: float = 4.0
+    multiplier: float = 1.6
+
+    def next(self, current: float) -> float:
+        return min(current * self.multiplier, self.maximum)
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    return dict(obj)
+
+
+def _get(obj: Any, key: str, default: Any = None) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def make_registry_tool_handler(registry: Mapping[str, Any]) -> ToolHandler:
+    """
+    Build a tool handler that executes tool classes from a registry.
+
+    Tools are synchronous, so each call runs in a worker thread. Errors are
+    returned to the assistant as tool output instead of failing the run.
+    """
+    async def _run_one(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        function = tool_call.get("function", {})
+        tool_name = function.get("name")
+        tool_class = registry.get(tool_name)
+        if not tool_class:
+            logger.error(f"Unknown tool: {tool_name}")
+            return {"tool_call_id": tool_call["id"], "output": f"Error: unknown tool '{tool_name}'"}
+
+        started = time.perf_counter()
+        with tracer.span(f"tool {tool_name}", attributes={"tool.name": tool_name}) as span:
+            try:
+                arguments = json.loads(function.get("arguments") or "{}")
+                result = await asyncio.to_thread(tool_class().execute, **arguments)
+            except Exception as e:
+                span.record_exception(e)
+                tool_duration_seconds.observe(time.perf_counter() - started, tool_name, "error")
+                logger.error(f"Error executing tool {tool_name}: {str(e)}")
+                return {"tool_call_id": tool_call["id"], "output": f"Error: {str(e)}"}
+        tool_duration_seconds.observe(time.perf_counter() - started, tool_name, "ok")
+
+        if isinstance(result, str):
+            output = result
+        else:
+            try:
+                output = json.dumps(result)
+            except TypeError:
+                output = str(result)
+        return {"tool_call_id": tool_call["id"], "output": output}
+
+    async def handler(tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return list(await asyncio.gather(*(_run_one(call) for call in tool_calls)))
+
+    return handler
+
+
+class RunWaiter:
+    """
+    Wait for an Assistants API run using an ``AsyncOpenAI``-compatible client.
+
+    Args:
+        client: Client exposing ``beta.threads.runs.retrieve/cancel/submit_tool_outputs``
+        tool_handler: Coroutine turning ``tool_calls`` into ``tool_outputs``
+        timeout: Hard deadline in seconds for the whole run, tool calls included
+        backoff: Polling interval policy
+        cancel_event: Optional event; when set, the run is cancelled upstream
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        tool_handler: Optional[ToolHandler] = None,
+        timeout: float = 300.0,
+        backoff: Optional[BackoffPolicy] = None,
+        cancel_event: Optional[asyncio.Event] = None,
+    ):
+        self.client = client
+        self.tool_handler = tool_handler
+        self.timeout = timeout
+        self.backoff = backoff or BackoffPolicy()
+        self.cancel_event = cancel_event
+
+    async def wait(self, thread_id: str, run_id: str) -> Any:
+        """
+        Wait until the run reaches a terminal status and return the final run.
+
+        Raises:
+            RunTimeoutError: The deadline passed; the run was cancelled upstream.
+            RunCancelledError: ``cancel_event`` was set; the run was cancelled upstream.
+            RunActionError: The run required an action and no tool handler is configured.
+        """
+        deadline = time.monotonic() + self.timeout
+        interval = self.backoff.initial
+
+        with track_run() as tracked:
+            return await self._wait(thread_id, run_id, deadline, interval, tracked)
+
+    async def _wait(self, thread_id: str, run_id: str, deadline: float, interval: float, tracked: track_run) -> Any:
+        try:
+            while True:
+                run = await self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+                status = _get(run, "status")
+
+                if status in TERMINAL_STATUSES:
+                    tracked.status = status
+                    return run
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    tracked.status = "timeout"
+                    await self._cancel_run(thread_id, run_id)
+                    raise RunTimeoutError(f"Run {run_id} did not complete within {self.timeout} seconds")
+
+                if status == "requires_action":
+                    try:
+                        await self._submit_tool_outputs(thread_id, run_id, run, remaining)
+                    except asyncio.TimeoutError:
+                        tracked.status = "timeout"
+                        await self._cancel_run(thread_id, run_id)
+                        raise RunTimeoutError(
+                            f"Tool calls for run {run_id} did not finish within {self.timeout} seconds"
+                        )
+                    # The run moves again after tool outputs; poll eagerly.
+                    interval = self.backoff.initial
+                    continue
+
+                if await self._sleep(min(interval, remaining)):
+                    tracked.status = "aborted"
+                    await self._cancel_run(thread_id, run_id)
+                    raise RunCancelledError(f"Run {run_id} cancelled by caller")
+                interval = self.backoff.next(interval)
+        except asyncio.CancelledError:
+            # The surrounding task was cancelled (e.g. the client disconnected);
+            # stop the upstream run so it doesn't keep consuming tokens.
+            tracked.status = "aborted"
+            await asyncio.shield(self._cancel_run(thread_id, run_id))
+            raise
+
+    async def _sleep(self, delay: float) -> bool:
+        """Sleep for ``delay`` seconds; return True if cancellation was requested."""
+        if self.cancel_event is None:
+            await asyncio.sleep(delay)
+            return False
+        try:
+            await asyncio.wait_for(self.cancel_event.wait(), timeout=delay)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _submit_tool_outputs(self, thread_id: str, run_id: str, run: Any, timeout: float) -> None:
+        """Run the tool handler, bounded by ``timeout`` seconds, and submit its outputs."""
+        required_action = _get(run, "required_action")
+        submit = _get(required_action, "submit_tool_outputs") if required_action else None
+        tool_calls = [_as_dict(call) for call in (_get(submit, "tool_calls") or [])]
+
+        if not self.tool_handler:
+            await self._cancel_run(thread_id, run_id)
+            raise RunActionError(f"Run {run_id} requires tool outputs but no tool handler is configured")
+
+        logger.info(f"Run {run_id} requires action, executing {len(tool_calls)} tool call(s)")
+        tool_outputs = await asyncio.wait_for(self.tool_handler(tool_calls), timeout=timeout)
+        await self.client.beta.threads.runs.submit_tool_outputs(
+            thread_id=thread_id,
+            run_id=run_id,
+            tool_outputs=tool_outputs
+        )
+
+    async def _cancel_run(self, thread_id: str, run_id: str) -> None:
+        try:
+            await self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+            logger.info(f"Cancelled run {run_id}")
+        except Exception as e:
+            # The run may already be terminal; nothing else to do.
+            logger.warning(f"Failed to cancel run {run_id}: {str(e)}")
+
+
+async def wait_for_run(
+    client: Any,
+    thread_id: str,
+    run_id: str,
+    tool_handler: Optional[ToolHandler] = None,
+    timeout: float = 300.0,
+    cancel_event: Optional[asyncio.Event] = None,
+) -> Any:
+    """Convenience wrapper around :class:`RunWaiter`."""
+    waiter = RunWaiter(client, tool_handler=tool_handler, timeout=timeout, cancel_event=cancel_event)
+    return await waiter.wait(thread_id, run_id)
@@ -1,4 +1,3 @@
-from openai import OpenAI
 import asyncio
 import logging
 from fastapi import UploadFile
@@ -11,6 +10,9 @@ import logging
 import requests
 from utils import get_headers
 from tools import tool_registry
+from services.pagination import paginate, DEFAULT_PAGE_SIZE
+from services.http_client import OpenAIClient
+from services.access_log import redact_headers
 
 # TODO
 # from config import get_settings
@@ -74,6 +76,10 @@ def list_openai_assistants(limit: int = 20, order: str = "desc", openai_api_key:
         logging.error(f"Error in list_openai_assistants: {e}")
         raise HTTPException(status_code=500, detail="Error fetching assistants from OpenAI")
 
+def iter_openai_assistants(client: OpenAIClient, order: str = "desc", page_size: int = DEFAULT_PAGE_SIZE):
+    """Async iterator over all assistants, fetching pages as needed."""
+    return paginate(client, "assistants", {"order": order}, page_size=page_size)
+
 import requests
 import logging
 from fastapi import HTTPException
@@ -114,7 +120,7 @@ def modify_openai_assistant(assistant_id: str, data: Dict[str, Any], openai_api_
         
         # Log the request and response for debugging
         logger.debug(f"Request URL: {url}")
-        logger.debug(f"Request headers: {headers}")
+        logger.debug(f"Request headers: {redact_headers(headers)}")
         logger.debug(f"Request payload: {payload}")
         logger.debug(f"Response status: {response.status_code}")
         logger.debug(f"Response body: {response.text}")
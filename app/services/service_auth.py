@@ -1,17 +1,91 @@
 # services/service_auth.py
 import os
+import asyncio
+import logging
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
 import boto3
 import hmac
 import base64
 import hashlib
 import jwt
 import requests
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from models.models_auth import UserSignUp, UserSignIn, TokenResponse, UserResponse, VerificationRequest
+from services.resilience import get_upstream, classify_botocore_error
+from services.metrics import upstream_request_seconds
+
+logger = logging.getLogger(__name__)
+
+cognito_upstream = get_upstream("cognito")
+
+# boto3 is blocking; Cognito calls run on their own bounded pool so a login
+# spike queues here instead of stalling the event loop or the default executor
+COGNITO_MAX_WORKERS = int(os.getenv("COGNITO_MAX_WORKERS", "8"))
+
+
+class CognitoCallStats:
+    """Queue depth and per-operation latency of Cognito calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.operations: Dict[str, Dict[str, float]] = {}
+
+    def submitted(self) -> None:
+        with self._lock:
+            self.queued += 1
+
+    def started(self) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+
+    def finished(self, operation: str, seconds: float, queued_seconds: float, error: bool) -> None:
+        with self._lock:
+            self.running -= 1
+            stats = self.operations.setdefault(operation, {
+                "count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0, "total_queued_seconds": 0.0
+            })
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["total_queued_seconds"] += queued_seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {
+                name: {
+                    "count": int(stats["count"]),
+                    "errors": int(stats["errors"]),
+                    "avg_ms": round(stats["total_seconds"] / stats["count"] * 1000, 2),
+                    "max_ms": round(stats["max_seconds"] * 1000, 2),
+                    "avg_queued_ms": round(stats["total_queued_seconds"] / stats["count"] * 1000, 2)
+                }
+                for name, stats in self.operations.items()
+            }
+            return {"max_workers": COGNITO_MAX_WORKERS, "queued": self.queued, "running": self.running, "operations": operations}
+
+
+cognito_stats = CognitoCallStats()
+_cognito_executor = ThreadPoolExecutor(max_workers=COGNITO_MAX_WORKERS, thread_name_prefix="cognito")
 
 class CognitoService:
     def __init__(self):
-        self.client = boto3.client('cognito-idp', region_name=os.getenv('AWS_REGION'))
+        # Retries are done by the resilience layer so they share its breaker and budget.
+        # One connection per executor worker; the client itself is thread-safe.
+        self.client = boto3.client('cognito-idp', region_name=os.getenv('AWS_REGION'), config=Config(
+            connect_timeout=cognito_upstream.connect_timeout,
+            read_timeout=cognito_upstream.read_timeout,
+            retries={'total_max_attempts': 1},
+            max_pool_connections=COGNITO_MAX_WORKERS,
+            tcp_keepalive=True
+        ))
         self.user_pool_id = os.getenv('COGNITO_USER_POOL_ID')
         self.client_id = os.getenv('COGNITO_APP_CLIENT_ID')
         self.client_secret = os.getenv('COGNITO_APP_CLIENT_SECRET')
@@ -23,9 +97,34 @@ class CognitoService:
                        digestmod=hashlib.sha256).digest()
         return base64.b64encode(dig).decode()
 
+    async def _call(self, operation: str, idempotent: bool = True, **params):
+        """Run a Cognito API operation on the Cognito executor."""
+        submitted_at = time.perf_counter()
+
+        def run():
+            started_at = time.perf_counter()
+            cognito_stats.started()
+            error = True
+            try:
+                result = cognito_upstream.call(
+                    lambda: getattr(self.client, operation)(**params),
+                    idempotent=idempotent,
+                    classify=classify_botocore_error
+                )
+                error = False
+                return result
+            finally:
+                seconds = time.perf_counter() - started_at
+                cognito_stats.finished(operation, seconds, started_at - submitted_at, error)
+                upstream_request_seconds.observe(seconds, "cognito", operation, "error" if error else "ok")
+
+        cognito_stats.submitted()
+        return await asyncio.get_running_loop().run_in_executor(_cognito_executor, run)
+
     async def sign_up(self, user: UserSignUp) -> UserResponse:
         try:
-            response = self.client.sign_up(
+            response = await self._call(
+                'sign_up', idempotent=False,
                 ClientId=self.client_id,
                 Username=user.email,
                 Password=user.password,
@@ -45,7 +144,8 @@ class CognitoService:
 
     async def sign_in(self, user: UserSignIn) -> TokenResponse:
         try:
-            response = self.client.initiate_auth(
+            response = await self._call(
+                'initiate_auth',
                 ClientId=self.client_id,
                 AuthFlow='USER_PASSWORD_AUTH',
                 AuthParameters={
@@ -69,7 +169,7 @@ class CognitoService:
 
     async def get_user(self, access_token: str) -> UserResponse:
         try:
-            response = self.client.get_user(AccessToken=access_token)
+            response = await self._call('get_user', AccessToken=access_token)
             user_attrs = {attr['Name']: attr['Value'] for attr in response['UserAttributes']}
             return UserResponse(
                 id=response['Username'],
@@ -84,7 +184,8 @@ class CognitoService:
         
     async def attach_solomon_consumer_key(self, username: str, solomon_consumer_key: str) -> bool:
         try:
-            self.client.admin_update_user_attributes(
+            await self._call(
+                'admin_update_user_attributes',
                 UserPoolId=self.user_pool_id,
                 Username=username,
                 UserAttributes=[
@@ -100,7 +201,8 @@ class CognitoService:
 
     async def get_solomon_consumer_key(self, username: str) -> str:
         try:
-            response = self.client.admin_get_user(
+            response = await self._call(
+                'admin_get_user',
                 UserPoolId=self.user_pool_id,
                 Username=username
             )
@@ -111,7 +213,8 @@ class CognitoService:
     
     async def confirm_sign_up(self, verification: VerificationRequest) -> bool:
         try:
-            self.client.confirm_sign_up(
+            await self._call(
+                'confirm_sign_up', idempotent=False,
                 ClientId=self.client_id,
                 Username=verification.email,
                 ConfirmationCode=verification.code,
@@ -129,7 +232,8 @@ class CognitoService:
     
     async def refresh_token(self, refresh_token: str, email: str) -> TokenResponse:
         try:
-            response = self.client.initiate_auth(
+            response = await self._call(
+                'initiate_auth',
                 ClientId=self.client_id,
                 AuthFlow='REFRESH_TOKEN_AUTH',
                 AuthParameters={
@@ -144,8 +248,11 @@ class CognitoService:
                 refresh_token=refresh_token  # Keep the original refresh token
             )
         except self.client.exceptions.NotAuthorizedException as e:
-            print(f"NotAuthorizedException: {str(e)}")  # Add this for debugging
+            logger.info(f"Token refresh rejected: {str(e)}")
             raise Exception("Invalid or expired refresh token")
         except ClientError as e:
-            print(f"ClientError: {str(e)}")  # Add this for debugging
-            raise Exception(f"Error refreshing token: {str(e)}")
\ No newline at end of file
+            logger.warning(f"Token refresh failed: {str(e)}")
+            raise Exception(f"Error refreshing token: {str(e)}")
+
+    async def global_sign_out(self, access_token: str) -> None:
+        await self._call('global_sign_out', AccessToken=access_token)
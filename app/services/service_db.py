@@ -17,7 +17,7 @@ class DBService:
                 FROM dbo.solConnectConsumers 
                 WHERE solomon_consumer_key = :solomon_consumer_key
             """
-            result = db_connector.execute_query(query, {"solomon_consumer_key": solomon_consumer_key})
+            result = db_connector.execute_query(query, {"solomon_consumer_key": solomon_consumer_key}, method="get_openai_api_key")
             if result and result[0]:
                 return result[0][0]
             else:
@@ -29,7 +29,11 @@ class DBService:
 
     @staticmethod
     async def get_consumer_info(solomon_consumer_key: str) -> dict:
-        db_connector = DatabaseConnector()
+        return DBService.read_consumer_info(DatabaseConnector(), solomon_consumer_key)
+
+    @staticmethod
+    def read_consumer_info(db_connector: DatabaseConnector, solomon_consumer_key: str) -> dict:
+        """Blocking lookup of a consumer record on an existing connector; run it off the event loop."""
         try:
             query = """
                 SELECT TOP 1
@@ -44,7 +48,7 @@ class DBService:
                 FROM dbo.solConnectConsumers
                 WHERE solomon_consumer_key = :solomon_consumer_key
             """
-            result = db_connector.execute_query(query, {"solomon_consumer_key": solomon_consumer_key})
+            result = db_connector.execute_query(query, {"solomon_consumer_key": solomon_consumer_key}, method="get_consumer_info")
             if result and result[0]:
                 return {
                     "solomon_consumer_key": result[0][0],
@@ -72,7 +76,7 @@ class DBService:
                 FROM dbo.solConnectUsers
                 WHERE customer_email = :email
             """
-            result = db_connector.execute_query(query, {"email": email})
+            result = db_connector.execute_query(query, {"email": email}, method="get_workspace_names_by_email")
             if result:
                 return [row[0] for row in result]  # Just return the workspace names
             return []
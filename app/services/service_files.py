@@ -1,7 +1,10 @@
 import requests
 import logging
-from models.models_files import UploadFileResponse, ListFilesResponse, FileContentUploadResponse, FileResponse
+from models.models_files import UploadFileResponse, ListFilesResponse, FileContentUploadResponse, FileResponse, DeleteFileResponse
 from typing import Optional
+from services.pagination import paginate, DEFAULT_PAGE_SIZE
+from services.http_client import OpenAIClient
+from services.resilience import resilient_request
 
 def upload_file(file_path: str, openai_api_key: str, purpose: str = "assistants") -> UploadFileResponse:
     url = "https://api.openai.com/v1/files"
@@ -11,13 +14,13 @@ def upload_file(file_path: str, openai_api_key: str, purpose: str = "assistants"
         "Authorization": f"Bearer {openai_api_key}"
     }
     
-    files = {
-        'file': open(file_path, 'rb'),
-        'purpose': (None, purpose)
-    }
-
     try:
-        response = requests.post(url, headers=headers, files=files)
+        with open(file_path, 'rb') as f:
+            files = {
+                'file': f,
+                'purpose': (None, purpose)
+            }
+            response = resilient_request("openai", "post", url, headers=headers, files=files)
         response.raise_for_status()
         return UploadFileResponse(**response.json())
     except requests.exceptions.HTTPError as errh:
@@ -46,7 +49,7 @@ def list_files(purpose: Optional[str] = None, openai_api_key: str = None) -> Lis
         params['purpose'] = purpose
 
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = resilient_request("openai", "get", url, headers=headers, params=params)
         response.raise_for_status()
         return ListFilesResponse(**response.json())
     except requests.exceptions.HTTPError as errh:
@@ -62,6 +65,10 @@ def list_files(purpose: Optional[str] = None, openai_api_key: str = None) -> Lis
         logging.error(f"Request Error: {err}")
         raise
 
+def iter_files(client: OpenAIClient, purpose: Optional[str] = None, order: str = "desc", page_size: int = DEFAULT_PAGE_SIZE):
+    """Async iterator over all files, fetching pages as needed."""
+    return paginate(client, "files", {"purpose": purpose, "order": order}, page_size=page_size)
+
 def upload_file_content(file_path: str, file_name: str, openai_api_key: str, purpose: str = "assistants") -> FileContentUploadResponse:
     url = "https://api.openai.com/v1/files"
     
@@ -76,7 +83,7 @@ def upload_file_content(file_path: str, file_name: str, openai_api_key: str, pur
         }
         
         try:
-            response = requests.post(url, headers=headers, files=files)
+            response = resilient_request("openai", "post", url, headers=headers, files=files)
             response.raise_for_status()
             return FileContentUploadResponse(**response.json())
         except requests.exceptions.RequestException as err:
@@ -102,7 +109,7 @@ def get_file(file_id: str, openai_api_key: str) -> FileResponse:
     url = f"https://api.openai.com/v1/files/{file_id}"
     
     try:
-        response = requests.get(url, headers=headers)
+        response = resilient_request("openai", "get", url, headers=headers)
         response.raise_for_status()
         return FileResponse(**response.json())
     except requests.exceptions.HTTPError as errh:
@@ -116,4 +123,32 @@ def get_file(file_id: str, openai_api_key: str) -> FileResponse:
         raise
     except requests.exceptions.RequestException as err:
         logging.error(f"Request Error: {err}")
-        raise
\ No newline at end of file
+        raise
+
+def delete_file(file_id: str, openai_api_key: str) -> DeleteFileResponse:
+    """
+    Delete a file from OpenAI.
+
+    Args:
+        file_id (str): The ID of the file to delete
+        openai_api_key (str): OpenAI API key for authentication
+
+    Returns:
+        DeleteFileResponse: The deletion status from OpenAI's response
+    """
+    headers = {
+        "Authorization": f"Bearer {openai_api_key}"
+    }
+
+    url = f"https://api.openai.com/v1/files/{file_id}"
+
+    try:
+        response = resilient_request("openai", "delete", url, headers=headers)
+        response.raise_for_status()
+        return DeleteFileResponse(**response.json())
+    except requests.exceptions.HTTPError as errh:
+        logging.error(f"HTTP Error: {errh}, Response Content: {response.content}")
+        raise
+    except requests.exceptions.RequestException as err:
+        logging.error(f"Request Error: {err}")
+        raise
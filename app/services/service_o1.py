@@ -1,13 +1,18 @@
 # services/service_o1.py
-from openai import OpenAI
 from models.models_o1 import O1Request, O1Response
+from services.startup import LazyResource
 import os
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def _create_client():
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Initialize the OpenAI client on first use; o1 is rarely called, so it isn't warmed up
+client = LazyResource("openai_o1", _create_client, warm=False)
 
 async def get_o1_completion(request: O1Request) -> O1Response:
-    response = client.chat.completions.create(
+    o1_client = await client.aget()
+    response = o1_client.chat.completions.create(
         model="o1-preview",
         messages=[{"role": "user", "content": request.prompt}]
     )
@@ -10,7 +10,10 @@ from utils import get_headers
 from tools import tool_registry
 import json
 from typing import List, Dict, Any, Union, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+from services.upstream_scheduler import scheduler, api_key_from_headers, estimate_tokens, is_quota_error, UPSTREAM_MAX_RETRIES
+from services.resilience import resilient_request
+from services.metrics import track_run, tool_duration_seconds
+from services.tracing import tracer
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
@@ -26,8 +29,7 @@ def create_and_run_thread(create_thread_run_request: CreateThreadRunRequest, ope
     }
 
     try:
-        response = requests.post(url, headers=headers, json=thread_payload)
-        response.raise_for_status()
+        response = make_request(url, method='post', headers=headers, json=thread_payload)
         return RunResponse(**response.json())
     except requests.exceptions.HTTPError as errh:
         logging.error(f"HTTP Error: {errh}")
@@ -50,8 +52,7 @@ def run_thread(thread_id: str, assistant_id: str, openai_api_key: str = None) ->
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
+        response = make_request(url, method='post', headers=headers, json=payload)
         return RunResponse(**response.json())
     except requests.exceptions.HTTPError as errh:
         logging.error(f"HTTP Error: {errh}")
@@ -73,8 +74,7 @@ def get_run_status(thread_id: str, run_id: str, openai_api_key: str = None) -> R
     logging.debug(f"Headers: {headers}")
 
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = make_request(url, headers=headers)
         return RunResponse(**response.json())
     except requests.exceptions.HTTPError as errh:
         logging.error(f"HTTP Error: {errh}")
@@ -112,9 +112,16 @@ def get_thread_messages(thread_id: str, limit: int = 20, order: str = "desc", op
 #     # List the messages in the completed thread
 #     return get_thread_messages(final_response.thread_id, openai_api_key=openai_api_key)
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+# 429s are paced by the upstream scheduler; connection errors, timeouts and 5xx by the resilience layer
 def make_request(url, method='get', **kwargs):
-    response = requests.request(method, url, **kwargs)
+    api_key = api_key_from_headers(kwargs.get('headers'))
+    tokens = estimate_tokens(kwargs.get('json'))
+    for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+        scheduler.acquire_blocking(api_key, tokens)
+        response = resilient_request('openai', method, url, **kwargs)
+        scheduler.observe(api_key, response.status_code, response.headers)
+        if response.status_code != 429 or attempt == UPSTREAM_MAX_RETRIES or is_quota_error(response.text):
+            break
     response.raise_for_status()
     return response
 
@@ -144,28 +151,33 @@ def run_thread_and_list_messages(
         logger.error(f"Failed to create run: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create run")
     
-    start_time = time.time()
+    with track_run() as tracked:
+        start_time = time.time()
     
-    logger.info("Waiting for run to complete")
-    while run['status'] not in ['completed', 'failed', 'cancelled']:
-        if time.time() - start_time > timeout:
-            logger.error(f"Run timed out after {timeout} seconds")
-            raise HTTPException(status_code=504, detail="Run timed out")
-        
-        time.sleep(interval)
-        run_status_url = f"https://api.openai.com/v1/threads/{thread_id}/runs/{run['id']}"
-        try:
-            run_status_response = make_request(run_status_url, headers=headers)
-            run = run_status_response.json()
-            logger.info(f"Current run status: {run['status']}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to get run status: {str(e)}")
-            continue
+        logger.info("Waiting for run to complete")
+        while run['status'] not in ['completed', 'failed', 'cancelled']:
+            time.sleep(interval)
+            remaining = timeout - (time.time() - start_time)
+            if remaining <= 0:
+                logger.error(f"Run timed out after {timeout} seconds")
+                tracked.status = "timeout"
+                raise HTTPException(status_code=504, detail="Run timed out")
+
+            run_status_url = f"https://api.openai.com/v1/threads/{thread_id}/runs/{run['id']}"
+            try:
+                run_status_response = make_request(run_status_url, headers=headers, deadline=remaining)
+                run = run_status_response.json()
+                logger.info(f"Current run status: {run['status']}")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Failed to get run status: {str(e)}")
+                continue
         
-        if run['status'] == 'requires_action':
-            logger.info("Run requires action, handling tools")
-            run = handle_run_with_tools(run, thread_id, openai_api_key)
+            if run['status'] == 'requires_action':
+                logger.info("Run requires action, handling tools")
+                run = handle_run_with_tools(run, thread_id, openai_api_key)
     
+        tracked.status = run['status']
+
     logger.info(f"Run completed with status: {run['status']}")
 
     logger.info("Listing messages")
@@ -199,7 +211,12 @@ def execute_tool(tool_call: Dict[str, Any]) -> Dict[str, Any]:
         raise ValueError(f"Unknown tool: {tool_name}")
     
     tool = tool_class()
-    result = tool.execute(**arguments)
+    with tracer.span(f"tool {tool_name}", attributes={"tool.name": tool_name}), tool_duration_seconds.time(tool_name, "ok") as timer:
+        try:
+            result = tool.execute(**arguments)
+        except Exception:
+            timer.labels = (tool_name, "error")
+            raise
     
     logger.info(f"Tool {tool_name} execution completed")
     
@@ -232,18 +249,14 @@ def handle_run_with_tools(run: Dict[str, Any], thread_id: str, openai_api_key: s
         logger.info(f"Executed {len(tool_outputs)} tools")
         
         url = f"https://api.openai.com/v1/threads/{thread_id}/runs/{run['id']}/submit_tool_outputs"
-        response = requests.post(url, headers=headers, json={"tool_outputs": tool_outputs})
-        response.raise_for_status()
+        response = make_request(url, method='post', headers=headers, json={"tool_outputs": tool_outputs})
         run = response.json()
         logger.info(f"Submitted tool outputs, new run status: {run['status']}")
     
     return run
 
 def create_run_and_list_messages(create_thread_run_request: Dict[str, Any], openai_api_key: str = None) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
-    # Log the API key (partially masked)
-    if openai_api_key:
-        logger.info(f"Using OpenAI API key: {openai_api_key}")
-    else:
+    if not openai_api_key:
         logger.warning("No OpenAI API key provided")
 
     headers = get_headers(openai_api_key)
@@ -251,12 +264,11 @@ def create_run_and_list_messages(create_thread_run_request: Dict[str, Any], open
     logger.info("Creating thread")
     thread_url = "https://api.openai.com/v1/threads"
     thread_payload = {"messages": create_thread_run_request['thread']['messages']}
-    thread_response = requests.post(thread_url, headers=headers, json=thread_payload)
     try:
-        thread_response.raise_for_status()
+        thread_response = make_request(thread_url, method='post', headers=headers, json=thread_payload)
     except requests.exceptions.HTTPError as e:
         logger.error(f"HTTP error when creating thread: {e}")
-        logger.error(f"Response content: {thread_response.text}")
+        logger.error(f"Response content: {e.response.text}")
         raise
 
     thread_id = thread_response.json()['id']
@@ -274,53 +286,55 @@ def create_run_and_list_messages(create_thread_run_request: Dict[str, Any], open
         logger.info(f"Added {len(create_thread_run_request['tools'])} tools to run payload")
     
     logger.debug(f"Run payload: {run_payload}")
-    run_response = requests.post(run_url, headers=headers, json=run_payload)
     try:
-        run_response.raise_for_status()
+        run_response = make_request(run_url, method='post', headers=headers, json=run_payload)
     except requests.exceptions.HTTPError as e:
         logger.error(f"HTTP error when creating run: {e}")
-        logger.error(f"Response content: {run_response.text}")
+        logger.error(f"Response content: {e.response.text}")
         raise
 
     run = run_response.json()
     logger.info(f"Run created with ID: {run['id']}")
     
-    start_time = time.time()
-    timeout = 600  # 10 minutes timeout
+    with track_run() as tracked:
+        start_time = time.time()
+        timeout = 600  # 10 minutes timeout
     
-    logger.info("Waiting for run to complete")
-    while run['status'] not in ['completed', 'failed', 'cancelled']:
-        if time.time() - start_time > timeout:
-            logger.error(f"Run timed out after {timeout} seconds")
-            raise HTTPException(status_code=504, detail="Run timed out")
-        
-        time.sleep(5)
-        run_status_url = f"https://api.openai.com/v1/threads/{thread_id}/runs/{run['id']}"
-        run_status_response = requests.get(run_status_url, headers=headers)
-        try:
-            run_status_response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error when checking run status: {e}")
-            logger.error(f"Response content: {run_status_response.text}")
-            raise
+        logger.info("Waiting for run to complete")
+        while run['status'] not in ['completed', 'failed', 'cancelled']:
+            time.sleep(5)
+            remaining = timeout - (time.time() - start_time)
+            if remaining <= 0:
+                logger.error(f"Run timed out after {timeout} seconds")
+                tracked.status = "timeout"
+                raise HTTPException(status_code=504, detail="Run timed out")
 
-        run = run_status_response.json()
-        logger.info(f"Current run status: {run['status']}")
+            run_status_url = f"https://api.openai.com/v1/threads/{thread_id}/runs/{run['id']}"
+            try:
+                run_status_response = make_request(run_status_url, headers=headers, deadline=remaining)
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"HTTP error when checking run status: {e}")
+                logger.error(f"Response content: {e.response.text}")
+                raise
+
+            run = run_status_response.json()
+            logger.info(f"Current run status: {run['status']}")
         
-        if run['status'] == 'requires_action':
-            logger.info("Run requires action, handling tools")
-            run = handle_run_with_tools(run, thread_id, openai_api_key)
+            if run['status'] == 'requires_action':
+                logger.info("Run requires action, handling tools")
+                run = handle_run_with_tools(run, thread_id, openai_api_key)
     
+        tracked.status = run['status']
+
     logger.info(f"Run completed with status: {run['status']}")
 
     logger.info("Listing messages")
     messages_url = f"https://api.openai.com/v1/threads/{thread_id}/messages"
-    messages_response = requests.get(messages_url, headers=headers)
     try:
-        messages_response.raise_for_status()
+        messages_response = make_request(messages_url, headers=headers)
     except requests.exceptions.HTTPError as e:
         logger.error(f"HTTP error when listing messages: {e}")
-        logger.error(f"Response content: {messages_response.text}")
+        logger.error(f"Response content: {e.response.text}")
         raise
 
     messages = messages_response.json()
@@ -3,8 +3,10 @@ import logging
 from models.models_vector_store_files import CreateVectorStoreFileRequest, VectorStoreFileResponse, ListVectorStoreFilesResponse, DeleteVectorStoreFileResponse, CreateVectorStoreFileWorkatoRequest
 from typing import Optional
 from utils import get_headers
-import tempfile
-import os
+from services.http_client import OpenAIClient, OpenAIHTTPError
+from services.upload_dedup import dedup_index
+from services.upload_stream import upload_content
+from services.pagination import paginate, DEFAULT_PAGE_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +57,23 @@ def list_vector_store_files(
         logging.error(f"Request Error: {e}")
         raise
 
+async def fetch_vector_store_files(
+    client: OpenAIClient,
+    vector_store_id: str,
+    limit: int = 20,
+    order: str = "desc",
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    filter: Optional[str] = None
+) -> bytes:
+    """One page of vector store files as the raw upstream JSON, for :func:`proxy_response`."""
+    params = {"limit": limit, "order": order, "after": after, "before": before, "filter": filter}
+    return await client.get_bytes(f"vector_stores/{vector_store_id}/files", params=params)
+
+def iter_vector_store_files(client: OpenAIClient, vector_store_id: str, order: str = "desc", filter: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE):
+    """Async iterator over all files of a vector store, fetching pages as needed."""
+    return paginate(client, f"vector_stores/{vector_store_id}/files", {"order": order, "filter": filter}, page_size=page_size)
+
 def delete_vector_store_file(vector_store_id: str, file_id: str, openai_api_key: str) -> DeleteVectorStoreFileResponse:
     url = f"https://api.openai.com/v1/vector_stores/{vector_store_id}/files/{file_id}"
     headers = get_headers(openai_api_key)
@@ -79,28 +98,46 @@ def retrieve_vector_store_file(vector_store_id: str, file_id: str, openai_api_ke
         logging.error(f"Request Error: {e}")
         raise
 
-def create_vector_store_file_workato(
+def workato_file_name(request: CreateVectorStoreFileWorkatoRequest) -> str:
+    """File name for Workato content, with the extension vector stores use to pick a parser."""
+    if request.file_name.lower().endswith(f".{request.file_type.value}"):
+        return request.file_name
+    return f"{request.file_name}.{request.file_type.value}"
+
+async def create_vector_store_file_workato(
     vector_store_id: str,
     request: CreateVectorStoreFileWorkatoRequest,
-    openai_api_key: str
+    openai_api_key: Optional[str] = None,
+    client: Optional[OpenAIClient] = None,
+    owner: Optional[str] = None
 ) -> VectorStoreFileResponse:
-    url = f"https://api.openai.com/v1/vector_stores/{vector_store_id}/files"
-    headers = get_headers(openai_api_key)
+    """
+    Upload Workato content as a file and attach it to a vector store.
+
+    The content is spooled in memory (spilling to an unnamed temp file only
+    past ``UPLOAD_SPOOL_MAX_BYTES``) and posted asynchronously. With an
+    ``owner``, content already uploaded and attached to this vector store is
+    returned as is.
+    """
+    client = client or OpenAIClient(openai_api_key)
+    file_name = workato_file_name(request)
 
-    with tempfile.NamedTemporaryFile(mode='w+', suffix=f'.{request.file_type}', delete=False) as temp_file:
-        temp_file.write(request.content)
-        temp_file.flush()
-        
-        file_path = temp_file.name
-        files = {'file': (request.file_name, open(file_path, 'rb'))}
-        
+    uploaded = await upload_content(client, request.content, filename=file_name, purpose="assistants", owner=owner)
+    file_id = uploaded["id"]
+
+    if owner and dedup_index.has_vector_store_file(owner, vector_store_id, file_id):
         try:
-            response = requests.post(url, headers=headers, files=files)
-            response.raise_for_status()
-            os.remove(file_path)
-            return VectorStoreFileResponse(**response.json())
-        except requests.exceptions.RequestException as err:
-            logging.error(f"Request Error: {err}")
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            raise
\ No newline at end of file
+            existing = await client.get(f"vector_stores/{vector_store_id}/files/{file_id}")
+            if existing.get("status") != "failed":
+                logger.info(f"{file_name} is already in vector store {vector_store_id} as {file_id}")
+                return VectorStoreFileResponse(**existing)
+        except OpenAIHTTPError as e:
+            if e.status != 404:
+                raise
+        dedup_index.forget_vector_store_file(owner, vector_store_id, file_id)
+
+    logger.info(f"Uploaded {file_name} as {file_id}, attaching to vector store {vector_store_id}")
+    response_json = await client.post(f"vector_stores/{vector_store_id}/files", json_body={"file_id": file_id})
+    if owner:
+        dedup_index.record_vector_store_file(owner, vector_store_id, file_id)
+    return VectorStoreFileResponse(**response_json)
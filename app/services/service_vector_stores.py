@@ -3,6 +3,8 @@ import logging
 from models.models_vector_stores import CreateVectorStoreRequest, VectorStoreResponse, ListVectorStoresResponse, DeleteVectorStoreResponse
 from typing import Optional
 from utils import get_headers
+from services.pagination import paginate, DEFAULT_PAGE_SIZE
+from services.http_client import OpenAIClient
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,10 @@ def list_vector_stores(limit: int = 20, order: str = "desc", after: Optional[str
         logger.error(f"Request Error: {e}")
         raise
 
+def iter_vector_stores(client: OpenAIClient, order: str = "desc", page_size: int = DEFAULT_PAGE_SIZE):
+    """Async iterator over all vector stores, fetching pages as needed."""
+    return paginate(client, "vector_stores", {"order": order}, page_size=page_size)
+
 def retrieve_vector_store(vector_store_id: str, openai_api_key: str) -> VectorStoreResponse:
     url = f"https://api.openai.com/v1/vector_stores/{vector_store_id}"
     headers = get_headers(openai_api_key)
@@ -0,0 +1,92 @@
+"""
+Request coalescing for identical concurrent reads.
+
+When many clients of one tenant load the same page at once, each request would
+otherwise make its own OpenAI or SQL Server call. A :class:`SingleFlight`
+group lets the first caller for a key run the upstream call while every
+concurrent caller with the same key awaits that same result. Nothing is kept
+once the call finishes; combine with :mod:`metadata_cache` for caching.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() not in ("0", "false", "no")
+
+KeyFunc = Callable[..., Hashable]
+Loader = Callable[[], Awaitable[Any]]
+
+
+def default_key(*args: Hashable, **kwargs: Hashable) -> Hashable:
+    return (args, tuple(sorted(kwargs.items())))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    Args:
+        name: Group name reported in stats
+        key_func: Builds the key from the arguments passed to :meth:`do`
+            after the loader. Keys must include the tenant.
+    """
+
+    def __init__(self, name: str, key_func: KeyFunc = default_key, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.name = name
+        self.key_func = key_func
+        self.enabled = enabled
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        flight_groups[name] = self
+
+    async def do(self, loader: Loader, *key_args: Hashable, **key_kwargs: Hashable) -> Any:
+        """
+        Return ``await loader()``, sharing one in-flight call per key.
+
+        The shared call runs as its own task, so one caller disconnecting
+        does not cancel it for the others. Errors reach every waiter.
+        """
+        self.calls += 1
+        if not self.enabled:
+            self.executions += 1
+            return await loader()
+
+        key = self.key_func(*key_args, **key_kwargs)
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.create_task(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._done(key, done))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so an unawaited failure isn't logged as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, *key_args: Hashable, **key_kwargs: Hashable) -> None:
+        """Let the next call for this key start a fresh upstream call, e.g. after a write."""
+        self._inflight.pop(self.key_func(*key_args, **key_kwargs), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "inflight": len(self._inflight)
+        }
+
+
+flight_groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: group.stats() for name, group in flight_groups.items()}
@@ -0,0 +1,135 @@
+"""
+Startup timing and lazily created clients.
+
+Heavy clients (Cognito's boto3 client, the database engine, OpenAI SDK
+clients) are wrapped in :class:`LazyResource` and built on first use instead
+of at import, so a cold container starts serving sooner. Once the app is up,
+the lifespan handler in ``main.py`` builds them in a background thread
+(:func:`warm_up`), so the first request that needs one usually finds it ready.
+
+How long each startup phase and each resource took is kept in
+:data:`startup_stats`, served at ``GET /startup/stats`` and exported as the
+``startup_phase_seconds`` gauge.
+
+Configuration:
+    STARTUP_WARMUP: ``false`` to build resources only on first use (default ``true``)
+    STARTUP_WARMUP_MODULES: Comma-separated modules imported during warm-up
+        (default ``services.assistant_bridge``, which the first WebSocket
+        chat would otherwise import, along with the agents SDK)
+"""
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() not in ("0", "false", "no")
+STARTUP_WARMUP_MODULES = [
+    name.strip()
+    for name in os.getenv("STARTUP_WARMUP_MODULES", "services.assistant_bridge").split(",")
+    if name.strip()
+]
+
+startup_phase_seconds = registry.gauge(
+    "startup_phase_seconds", "Duration of application startup phases and lazy resource builds", ("phase",)
+)
+
+
+class StartupStats:
+    """Durations of startup phases, in the order they were recorded."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = seconds
+        startup_phase_seconds.set(seconds, phase)
+
+    def failed(self, phase: str, error: BaseException) -> None:
+        with self._lock:
+            self.errors[phase] = str(error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+                "errors": dict(self.errors),
+                "resources": {resource.name: resource.loaded for resource in _resources},
+            }
+
+
+startup_stats = StartupStats()
+_resources: List["LazyResource"] = []
+
+
+class LazyResource(Generic[T]):
+    """
+    A client built by ``factory`` the first time it is needed, once per process.
+
+    ``get()`` blocks while another thread is building it; async code should
+    use ``aget()`` so a slow build never stalls the event loop. A failed build
+    is not cached and is retried by the next caller. Resources created with
+    ``warm=False`` are left to their first use.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T], warm: bool = True):
+        self.name = name
+        self.factory = factory
+        self.warm = warm
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        _resources.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    started = time.perf_counter()
+                    self._value = self.factory()
+                    self._loaded = True
+                    startup_stats.record(f"resource:{self.name}", time.perf_counter() - started)
+        return self._value
+
+    async def aget(self) -> T:
+        if self._loaded:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+
+def warm_up() -> None:
+    """Build the registered resources and import ``STARTUP_WARMUP_MODULES``. Runs in a thread."""
+    started = time.perf_counter()
+    # Clients used by REST requests first; the modules only matter to WebSocket chats
+    for resource in [resource for resource in _resources if resource.warm]:
+        try:
+            resource.get()
+        except Exception as e:
+            # Left unbuilt; the first request that needs it tries again
+            logger.warning(f"Warm-up of {resource.name} failed: {str(e)}")
+            startup_stats.failed(f"resource:{resource.name}", e)
+    for module in STARTUP_WARMUP_MODULES:
+        module_started = time.perf_counter()
+        try:
+            importlib.import_module(module)
+            startup_stats.record(f"import:{module}", time.perf_counter() - module_started)
+        except Exception as e:
+            logger.warning(f"Warm-up import of {module} failed: {str(e)}")
+            startup_stats.failed(f"import:{module}", e)
+    startup_stats.record("warmup", time.perf_counter() - started)
+    logger.info(f"Startup warm-up finished in {(time.perf_counter() - started) * 1000:.0f}ms")
@@ -0,0 +1,127 @@
+"""
+Streaming reverse proxy for OpenAI endpoints that are passed through unchanged.
+
+:func:`stream_proxy` opens the upstream response and forwards its body to the
+client chunk by chunk as it arrives, so a large listing is never held in
+memory, decoded or re-encoded. Only an allowlist of upstream headers is
+forwarded. Upstream errors are raised before the response starts, so they
+still map to a proper status code.
+
+Fields can be redacted on the way through without parsing the JSON: the
+string values of the named fields are replaced with ``"[REDACTED]"``.
+
+Configuration:
+    PROXY_STREAMING: ``false`` to buffer pass-through responses instead
+        (default ``true``; only takes effect when ``PROXY_RESPONSE_VALIDATION``
+        is ``off``, since validating needs the whole body)
+    PROXY_REDACT_FIELDS: Comma-separated JSON field names whose string values
+        are redacted in streamed responses (default none)
+    PROXY_CHUNK_SIZE: Largest chunk forwarded at once, in bytes (default 65536)
+"""
+from typing import AsyncIterator, Dict, FrozenSet, Iterable, Optional, Any
+import logging
+import os
+import re
+
+import aiohttp
+from fastapi.responses import StreamingResponse
+
+from .http_client import OpenAIClient
+from .json_response import PROXY_RESPONSE_VALIDATION
+
+logger = logging.getLogger(__name__)
+
+STREAMING_ENABLED = (
+    os.getenv("PROXY_STREAMING", "true").lower() not in ("0", "false", "no")
+    and PROXY_RESPONSE_VALIDATION == "off"
+)
+PROXY_REDACT_FIELDS = frozenset(
+    name.strip() for name in os.getenv("PROXY_REDACT_FIELDS", "").split(",") if name.strip()
+)
+PROXY_CHUNK_SIZE = int(os.getenv("PROXY_CHUNK_SIZE", "65536"))
+
+# Upstream headers passed on to the client; everything else (cookies, rate
+# limit and organization headers, content-length/encoding) is dropped
+FORWARDED_HEADERS = ("openai-processing-ms", "x-request-id")
+
+REDACTED = b'"[REDACTED]"'
+# Points after which a new token starts, so no "field": "value" pair is cut
+_SAFE_BREAKS = (b",\n", b"{\n", b"[\n")
+
+
+class FieldRedactor:
+    """
+    Replaces the string values of the named fields in a stream of JSON bytes.
+
+    A chunk is only rewritten up to the last line break that follows ``,``,
+    ``{`` or ``[``, which can never fall inside a string or between a field
+    and its value; the rest is held back for the next chunk. OpenAI
+    pretty-prints its responses, so the held-back tail stays a line or two.
+    Compact JSON is held back until the end of the body.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        names = b"|".join(re.escape(name.encode()) for name in sorted(fields))
+        self.pattern = re.compile(rb'("(?:' + names + rb')"\s*:\s*)"(?:[^"\\]|\\.)*"')
+        self.pending = b""
+        self.redacted = 0
+
+    def _sub(self, data: bytes) -> bytes:
+        data, count = self.pattern.subn(rb"\1" + REDACTED, data)
+        self.redacted += count
+        return data
+
+    def feed(self, chunk: bytes) -> bytes:
+        data = self.pending + chunk
+        cut = max(data.rfind(marker) for marker in _SAFE_BREAKS)
+        if cut < 0:
+            self.pending = data
+            return b""
+        cut += 2
+        self.pending = data[cut:]
+        return self._sub(data[:cut])
+
+    def flush(self) -> bytes:
+        data, self.pending = self.pending, b""
+        return self._sub(data) if data else b""
+
+
+async def _forward(response: aiohttp.ClientResponse, redactor: Optional[FieldRedactor]) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in response.content.iter_chunked(PROXY_CHUNK_SIZE):
+            if redactor is not None:
+                chunk = redactor.feed(chunk)
+            if chunk:
+                yield chunk
+        if redactor is not None:
+            tail = redactor.flush()
+            if tail:
+                yield tail
+    finally:
+        # Also runs when the client disconnects mid-body
+        response.release()
+
+
+async def stream_proxy(
+    client: OpenAIClient,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    redact: Optional[FrozenSet[str]] = None,
+) -> StreamingResponse:
+    """
+    Forward ``GET path`` from OpenAI to the client as it arrives.
+
+    Args:
+        client: Tenant OpenAI client
+        path: Upstream path, e.g. ``"threads/thread_abc/messages"``
+        params: Query parameters; ``None`` values are dropped
+        redact: Field names to redact; defaults to ``PROXY_REDACT_FIELDS``
+
+    Raises:
+        OpenAIHTTPError: OpenAI answered with an error status.
+    """
+    response = await client.open_stream("GET", path, params=params)
+    fields = PROXY_REDACT_FIELDS if redact is None else redact
+    headers = {name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers}
+    media_type = response.headers.get("content-type", "application/json")
+    return StreamingResponse(_forward(response, FieldRedactor(fields) if fields else None), media_type=media_type, headers=headers)
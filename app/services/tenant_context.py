@@ -0,0 +1,155 @@
+"""
+Request-scoped tenant context.
+
+Routers depend on :func:`get_tenant_context` instead of looking up the OpenAI
+API key themselves. FastAPI resolves it once per request. Consumer records
+are read in a worker thread on one shared database connector and cached per
+key for ``TENANT_CACHE_TTL`` seconds (default 60), so most requests don't
+touch the database at all.
+
+Per-plan rate limits are configured with ``TENANT_RATE_LIMITS``, a JSON object
+mapping ``plan_level`` to requests per minute. ``"*"`` sets the limit for plans
+without their own entry. Plans without a limit are not throttled::
+
+    TENANT_RATE_LIMITS='{"free": 60, "pro": 600, "*": 120}'
+"""
+from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+
+from fastapi import Header, HTTPException
+from rds_db_connection import DatabaseConnector
+
+from .http_client import OpenAIClient
+from .metadata_cache import MetadataCache
+from .service_db import DBService
+from .startup import LazyResource
+
+logger = logging.getLogger(__name__)
+
+TENANT_CACHE_TTL = float(os.getenv("TENANT_CACHE_TTL", "60"))
+CONSUMER_INFO = "consumer_info"
+
+tenant_database = LazyResource("tenant_database", DatabaseConnector)
+consumer_info_cache = MetadataCache(ttl=TENANT_CACHE_TTL, stale_ttl=0, max_entries=10000, enabled=True, name="tenant_consumers")
+
+
+def _load_plan_rate_limits() -> Dict[str, float]:
+    raw = os.getenv("TENANT_RATE_LIMITS")
+    if not raw:
+        return {}
+    try:
+        return {str(plan): float(limit) for plan, limit in json.loads(raw).items()}
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Ignoring invalid TENANT_RATE_LIMITS: {str(e)}")
+        return {}
+
+
+PLAN_RATE_LIMITS: Dict[str, float] = _load_plan_rate_limits()
+
+
+@dataclass
+class TenantContext:
+    """Everything a router needs to act on behalf of one Solomon consumer."""
+    solomon_consumer_key: str
+    openai_api_key: str
+    plan_level: Optional[str] = None
+    customer_name: Optional[str] = None
+    _client: Optional[OpenAIClient] = field(default=None, repr=False)
+
+    @property
+    def client(self) -> OpenAIClient:
+        """OpenAI client for this tenant on the shared connection pool."""
+        if self._client is None:
+            self._client = OpenAIClient(self.openai_api_key)
+        return self._client
+
+
+class PlanRateLimiter:
+    """
+    Token bucket per consumer key, sized from the consumer's plan.
+
+    Each bucket holds up to one minute of requests and refills continuously.
+    """
+
+    def __init__(self, plan_limits: Dict[str, float]):
+        self.plan_limits = plan_limits
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def limit_for(self, plan_level: Optional[str]) -> Optional[float]:
+        if plan_level is not None and str(plan_level) in self.plan_limits:
+            return self.plan_limits[str(plan_level)]
+        return self.plan_limits.get("*")
+
+    def acquire(self, consumer_key: str, plan_level: Optional[str]) -> Optional[float]:
+        """
+        Take one token for ``consumer_key``.
+
+        Returns:
+            None if the request may proceed, otherwise seconds until a token is available.
+        """
+        per_minute = self.limit_for(plan_level)
+        if not per_minute:
+            return None
+
+        rate = per_minute / 60.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(consumer_key, (per_minute, now))
+        tokens = min(per_minute, tokens + (now - updated) * rate)
+
+        if tokens < 1:
+            self._buckets[consumer_key] = (tokens, now)
+            return (1 - tokens) / rate
+
+        self._buckets[consumer_key] = (tokens - 1, now)
+        return None
+
+
+rate_limiter = PlanRateLimiter(PLAN_RATE_LIMITS)
+
+
+async def get_consumer_info(solomon_consumer_key: str) -> Optional[Dict[str, Any]]:
+    """Cached consumer record, or None for an unknown key."""
+    def load():
+        return DBService.read_consumer_info(tenant_database.get(), solomon_consumer_key)
+
+    return await consumer_info_cache.get_or_load(
+        solomon_consumer_key, CONSUMER_INFO, (), lambda: asyncio.to_thread(load)
+    )
+
+
+async def get_tenant_context(
+    solomon_consumer_key: str = Header(..., description="Solomon Consumer Key for authentication")
+) -> TenantContext:
+    """
+    FastAPI dependency resolving the tenant for the current request.
+
+    Raises:
+        HTTPException: 401 for an unknown consumer key, 429 when the plan's rate limit is exceeded.
+    """
+    consumer_info = await get_consumer_info(solomon_consumer_key)
+    if not consumer_info or not consumer_info.get("openai_api_key"):
+        raise HTTPException(status_code=401, detail="Invalid Solomon Consumer Key")
+
+    tenant = TenantContext(
+        solomon_consumer_key=solomon_consumer_key,
+        openai_api_key=consumer_info["openai_api_key"],
+        plan_level=consumer_info.get("plan_level"),
+        customer_name=consumer_info.get("customer_name")
+    )
+
+    retry_after = rate_limiter.acquire(solomon_consumer_key, tenant.plan_level)
+    if retry_after is not None:
+        logger.warning(f"Rate limit exceeded for plan {tenant.plan_level}")
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+    return tenant
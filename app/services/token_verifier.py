@@ -0,0 +1,181 @@
+"""
+Local verification of Cognito tokens.
+
+Instead of calling Cognito ``GetUser`` for every authenticated request, tokens
+are verified in-process against the user pool's JWKS: RS256 signature, expiry,
+issuer, ``token_use`` and audience (``client_id`` for access tokens, ``aud``
+for ID tokens). The JWKS is cached and refreshed every ``COGNITO_JWKS_REFRESH``
+seconds, or sooner when a token is signed with an unknown key.
+
+Profile data that access tokens don't carry (email, name) is fetched from
+Cognito once per user and cached for ``AUTH_PROFILE_TTL`` seconds. Consumer
+keys looked up by email are cached for ``AUTH_CONSUMER_KEY_TTL`` seconds.
+
+Set ``AUTH_LOCAL_JWT=false`` to fall back to a ``GetUser`` call per request.
+Otherwise, when the Cognito region, user pool and client id are all set,
+``PyJWT[crypto]`` must be importable, or startup fails.
+A token revoked with global sign-out stays valid locally until it expires.
+"""
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import asyncio
+import json
+import logging
+import os
+import time
+
+from .http_client import get_http_session
+from .metadata_cache import MetadataCache
+
+try:
+    import jwt
+    from jwt.algorithms import RSAAlgorithm
+    JWT_AVAILABLE = jwt.algorithms.has_crypto
+except ImportError:
+    JWT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+AUTH_LOCAL_JWT = os.getenv("AUTH_LOCAL_JWT", "true").lower() not in ("0", "false", "no")
+COGNITO_JWKS_REFRESH = float(os.getenv("COGNITO_JWKS_REFRESH", "3600"))
+# Minimum gap between refetches triggered by an unknown key id
+COGNITO_JWKS_MIN_REFETCH = float(os.getenv("COGNITO_JWKS_MIN_REFETCH", "60"))
+AUTH_CLOCK_SKEW = float(os.getenv("AUTH_CLOCK_SKEW", "30"))
+AUTH_PROFILE_TTL = float(os.getenv("AUTH_PROFILE_TTL", "300"))
+AUTH_CONSUMER_KEY_TTL = float(os.getenv("AUTH_CONSUMER_KEY_TTL", "60"))
+# Already verified tokens skip the signature check until they expire
+AUTH_VERIFIED_TOKENS = int(os.getenv("AUTH_VERIFIED_TOKENS", "10000"))
+
+PROFILE = "profile"
+CONSUMER_KEY = "consumer_key"
+
+
+class TokenVerificationError(Exception):
+    """Raised when a token is malformed, expired, or not issued for this app."""
+    pass
+
+
+class CognitoTokenVerifier:
+    """
+    Verifies Cognito JWTs against the user pool's cached JWKS.
+
+    Args:
+        region: AWS region of the user pool
+        user_pool_id: Cognito user pool id
+        client_id: App client id tokens must be issued for
+    """
+
+    def __init__(self, region: Optional[str], user_pool_id: Optional[str], client_id: Optional[str]):
+        self.client_id = client_id
+        self.issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+        self.jwks_url = f"{self.issuer}/.well-known/jwks.json"
+        self.enabled = AUTH_LOCAL_JWT and JWT_AVAILABLE and bool(region and user_pool_id and client_id)
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._verified: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.verified = 0
+        self.verified_cached = 0
+        self.rejected = 0
+        self.jwks_fetches = 0
+        configured = bool(region and user_pool_id and client_id)
+        if AUTH_LOCAL_JWT and configured and not JWT_AVAILABLE:
+            # A broken install would otherwise silently send every request to Cognito
+            raise RuntimeError(
+                "AUTH_LOCAL_JWT is on but PyJWT with crypto support can't be imported "
+                "(install PyJWT[crypto] and not the unrelated 'jwt' package, or set AUTH_LOCAL_JWT=false)"
+            )
+        if AUTH_LOCAL_JWT and not self.enabled:
+            logger.warning("Local JWT verification unavailable (Cognito settings missing); using Cognito GetUser")
+
+    async def _refresh_keys(self, force: bool = False) -> None:
+        async with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if self._keys and age < (COGNITO_JWKS_MIN_REFETCH if force else COGNITO_JWKS_REFRESH):
+                return
+            session = await get_http_session()
+            async with session.get(self.jwks_url) as response:
+                response.raise_for_status()
+                jwks = await response.json()
+            self._keys = {key["kid"]: RSAAlgorithm.from_jwk(json.dumps(key)) for key in jwks.get("keys", [])}
+            self._fetched_at = time.monotonic()
+            self.jwks_fetches += 1
+            logger.info(f"Loaded {len(self._keys)} Cognito signing keys")
+
+    async def _signing_key(self, kid: Optional[str]) -> Any:
+        if time.monotonic() - self._fetched_at >= COGNITO_JWKS_REFRESH:
+            await self._refresh_keys()
+        key = self._keys.get(kid)
+        if key is None:
+            # Cognito may have rotated its keys
+            await self._refresh_keys(force=True)
+            key = self._keys.get(kid)
+        if key is None:
+            raise TokenVerificationError("Invalid or expired token")
+        return key
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Return the token's claims.
+
+        Raises:
+            TokenVerificationError: The token fails any check.
+        """
+        claims = self._verified.get(token)
+        if claims is not None:
+            if claims["exp"] + AUTH_CLOCK_SKEW > time.time():
+                self.verified_cached += 1
+                self._verified.move_to_end(token)
+                return claims
+            del self._verified[token]
+
+        try:
+            header = jwt.get_unverified_header(token)
+            key = await self._signing_key(header.get("kid"))
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                issuer=self.issuer,
+                leeway=AUTH_CLOCK_SKEW,
+                # Access tokens carry the app client in client_id rather than aud
+                options={"verify_aud": False, "require": ["exp", "iss", "sub", "token_use"]}
+            )
+        except jwt.PyJWTError as e:
+            self.rejected += 1
+            raise TokenVerificationError("Invalid or expired token") from e
+        except TokenVerificationError:
+            self.rejected += 1
+            raise
+
+        token_use = claims.get("token_use")
+        audience = claims.get("client_id") if token_use == "access" else claims.get("aud")
+        if token_use not in ("access", "id") or audience != self.client_id:
+            self.rejected += 1
+            raise TokenVerificationError("Invalid or expired token")
+        self.verified += 1
+        self._verified[token] = claims
+        while len(self._verified) > AUTH_VERIFIED_TOKENS:
+            self._verified.popitem(last=False)
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "verified": self.verified,
+            "verified_cached": self.verified_cached,
+            "rejected": self.rejected,
+            "jwks_keys": len(self._keys),
+            "jwks_fetches": self.jwks_fetches
+        }
+
+
+token_verifier = CognitoTokenVerifier(
+    os.getenv("AWS_REGION"),
+    os.getenv("COGNITO_USER_POOL_ID"),
+    os.getenv("COGNITO_APP_CLIENT_ID")
+)
+
+# Per-user profile and email -> consumer key lookups; entries are never served stale
+profile_cache = MetadataCache(ttl=AUTH_PROFILE_TTL, stale_ttl=0, max_entries=10000, enabled=True, name="auth_profiles")
+consumer_key_cache = MetadataCache(ttl=AUTH_CONSUMER_KEY_TTL, stale_ttl=0, max_entries=10000, enabled=True, name="auth_consumer_keys")
@@ -0,0 +1,333 @@
+"""
+Lightweight distributed tracing with W3C Trace Context propagation.
+
+Spans follow the OpenTelemetry data model (trace/span ids, parent, kind,
+attributes, status) and are propagated with the standard ``traceparent``
+header, so traces join up with any OpenTelemetry-instrumented caller or
+callee. Incoming ``traceparent`` headers are honoured by the HTTP middleware,
+and outgoing calls to our own services and Workato carry one.
+
+The active span lives in a context variable, so it follows ``await``,
+``asyncio`` tasks and ``asyncio.to_thread`` automatically.
+
+Configuration:
+    TRACING_ENABLED: ``true`` to record spans (default ``false``)
+    TRACING_EXPORTER: ``console`` (one JSON line per span on the ``tracing``
+        logger) or ``memory`` (kept in ``tracer.exporter.spans``, for tests)
+    TRACING_SAMPLE_RATE: Fraction of new traces that are recorded; child spans
+        follow their parent's decision
+    TRACE_PROPAGATE_UPSTREAMS: Upstreams that receive ``traceparent``
+        (default ``workato,solomon_api``)
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Mapping, MutableMapping, NamedTuple, Optional
+import json
+import logging
+import os
+import random
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "console").lower()
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+TRACE_PROPAGATE_UPSTREAMS = frozenset(
+    name.strip() for name in os.getenv("TRACE_PROPAGATE_UPSTREAMS", "workato,solomon_api").split(",") if name.strip()
+)
+# Spans kept by the in-memory exporter
+TRACING_MEMORY_SPANS = int(os.getenv("TRACING_MEMORY_SPANS", "10000"))
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+INTERNAL = "internal"
+SERVER = "server"
+CLIENT = "client"
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+@dataclass
+class Span:
+    """One timed operation. Ended spans are handed to the tracer's exporter."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = INTERNAL
+    sampled: bool = True
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    status: str = "unset"
+    status_message: Optional[str] = None
+    tracer: Optional["Tracer"] = field(default=None, repr=False)
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id, self.sampled)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns is not None else None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, e: BaseException) -> None:
+        self.attributes["exception.type"] = type(e).__name__
+        self.attributes["exception.message"] = str(e)[:500]
+        self.set_status("error", type(e).__name__)
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled and self.tracer is not None:
+            self.tracer.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP-like JSON representation."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration_ms, 3) if self.end_ns is not None else None,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message}
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is disabled; accepts and discards everything."""
+    name = ""
+    trace_id = span_id = parent_id = None
+    sampled = False
+    traceparent = None
+    attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        pass
+
+    def record_exception(self, e: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class InMemoryExporter:
+    """Keeps the most recent ended spans; meant for tests."""
+
+    def __init__(self, max_spans: int = TRACING_MEMORY_SPANS):
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        return [span for span in self.spans if span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class ConsoleExporter:
+    """Writes each ended span as a JSON line to the ``tracing`` logger."""
+
+    def __init__(self):
+        self.span_logger = logging.getLogger("tracing")
+
+    def export(self, span: Span) -> None:
+        self.span_logger.info("%s", _SpanLine(span))
+
+
+class _SpanLine:
+    """Serialized only when the log record is rendered."""
+    __slots__ = ("span",)
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __str__(self) -> str:
+        return json.dumps(self.span.to_dict(), default=str, separators=(",", ":"))
+
+
+def _make_exporter(name: str):
+    if name == "memory":
+        return InMemoryExporter()
+    if name != "console":
+        logger.warning(f"Unknown TRACING_EXPORTER {name!r}; using console")
+    return ConsoleExporter()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C ``traceparent`` header; invalid values are ignored."""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+class Tracer:
+    """
+    Creates spans and tracks the active one.
+
+    Args:
+        enabled: Record spans; when False every span is a no-op
+        exporter: Receives each sampled span when it ends
+        sample_rate: Fraction of root spans that are sampled
+    """
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, exporter: Any = None, sample_rate: float = TRACING_SAMPLE_RATE):
+        self.enabled = enabled
+        self.exporter = exporter if exporter is not None else _make_exporter(TRACING_EXPORTER)
+        self.sample_rate = sample_rate
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+        self.exported = 0
+        self.export_errors = 0
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(self, name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None,
+                   parent: Optional[SpanContext] = None):
+        """
+        Start a span without making it current. ``parent`` defaults to the
+        active span; with neither, the span starts a new trace.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None:
+            current = self._current.get()
+            parent = current.context if current is not None else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        return Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent_id,
+            kind=kind,
+            sampled=sampled,
+            attributes=dict(attributes) if attributes else {},
+            tracer=self
+        )
+
+    @contextmanager
+    def span(self, name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None,
+             parent: Optional[SpanContext] = None) -> Iterator[Any]:
+        """Run the block inside a new active span; exceptions mark it as failed."""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        span = self.start_span(name, kind, attributes, parent)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+
+    def inject(self, headers: Optional[MutableMapping[str, str]] = None) -> MutableMapping[str, str]:
+        """Add ``traceparent`` for the active span to a copy of ``headers``."""
+        headers = dict(headers or {})
+        current = self._current.get() if self.enabled else None
+        if current is not None:
+            headers[TRACEPARENT] = current.traceparent
+        return headers
+
+    def extract(self, headers: Optional[Mapping[str, str]]) -> Optional[SpanContext]:
+        """Parent context from incoming headers, if they carry a valid ``traceparent``."""
+        if not self.enabled or not headers:
+            return None
+        return parse_traceparent(headers.get(TRACEPARENT))
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+            self.exported += 1
+        except Exception as e:
+            self.export_errors += 1
+            logger.warning(f"Span export failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "exporter": type(self.exporter).__name__,
+            "sample_rate": self.sample_rate,
+            "exported": self.exported,
+            "export_errors": self.export_errors
+        }
+
+
+tracer = Tracer()
+
+
+def instrument_engine(engine: Any) -> None:
+    """Record a client span for every statement executed through a SQLAlchemy engine."""
+    if not tracer.enabled:
+        return
+    from sqlalchemy import event
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "QUERY"
+        context._trace_span = tracer.start_span(f"db {operation}", CLIENT, {
+            "db.system": engine.dialect.name,
+            "db.statement": statement[:500]
+        })
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.end()
+
+    def handle_error(exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
@@ -0,0 +1,156 @@
+"""
+Content-hash index for uploaded files.
+
+Maps ``(tenant, sha256, purpose)`` to the OpenAI file id created for that
+content, and records which files are attached to which vector stores, so a
+re-upload of the same document can reuse the existing file instead of creating
+and embedding a new one. The index lives in a local SQLite database
+(``UPLOAD_DEDUP_DB``); set ``UPLOAD_DEDUP_ENABLED=false`` to turn it off.
+
+Tenants are stored as a hash of the consumer key, never the key itself.
+"""
+from typing import Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DEDUP_ENABLED = os.getenv("UPLOAD_DEDUP_ENABLED", "true").lower() not in ("0", "false", "no")
+UPLOAD_DEDUP_DB = os.getenv("UPLOAD_DEDUP_DB", "/tmp/solomon_upload_dedup.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    tenant TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    purpose TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    bytes INTEGER,
+    filename TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (tenant, sha256, purpose)
+);
+CREATE INDEX IF NOT EXISTS ix_file_hashes_file ON file_hashes (tenant, file_id);
+CREATE TABLE IF NOT EXISTS vector_store_files (
+    tenant TEXT NOT NULL,
+    vector_store_id TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (tenant, vector_store_id, file_id)
+);
+CREATE INDEX IF NOT EXISTS ix_vector_store_files_file ON vector_store_files (tenant, file_id);
+"""
+
+
+def tenant_id(solomon_consumer_key: str) -> str:
+    return hashlib.sha256(solomon_consumer_key.encode("utf-8")).hexdigest()[:32]
+
+
+class UploadDedupIndex:
+    """
+    SQLite-backed content-hash index.
+
+    Lookups are single indexed reads on a local file, cheap enough to run on
+    the event loop. One connection is shared behind a lock.
+    """
+
+    def __init__(self, path: str = UPLOAD_DEDUP_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, consumer_key: str, sha256: str, purpose: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT file_id FROM file_hashes WHERE tenant = ? AND sha256 = ? AND purpose = ?",
+                (tenant_id(consumer_key), sha256, purpose)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, consumer_key: str, sha256: str, purpose: str, file_id: str,
+               size: Optional[int] = None, filename: Optional[str] = None) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO file_hashes (tenant, sha256, purpose, file_id, bytes, filename, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (tenant_id(consumer_key), sha256, purpose, file_id, size, filename, time.time())
+            )
+
+    def forget_file(self, consumer_key: str, file_id: str) -> None:
+        """Drop every entry for a deleted file, including vector store memberships."""
+        tenant = tenant_id(consumer_key)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM file_hashes WHERE tenant = ? AND file_id = ?", (tenant, file_id))
+            conn.execute("DELETE FROM vector_store_files WHERE tenant = ? AND file_id = ?", (tenant, file_id))
+
+    def has_vector_store_file(self, consumer_key: str, vector_store_id: str, file_id: str) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM vector_store_files WHERE tenant = ? AND vector_store_id = ? AND file_id = ?",
+                (tenant_id(consumer_key), vector_store_id, file_id)
+            ).fetchone()
+        return row is not None
+
+    def record_vector_store_file(self, consumer_key: str, vector_store_id: str, file_id: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO vector_store_files (tenant, vector_store_id, file_id, created_at) VALUES (?, ?, ?, ?)",
+                (tenant_id(consumer_key), vector_store_id, file_id, time.time())
+            )
+
+    def forget_vector_store_file(self, consumer_key: str, vector_store_id: str, file_id: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM vector_store_files WHERE tenant = ? AND vector_store_id = ? AND file_id = ?",
+                (tenant_id(consumer_key), vector_store_id, file_id)
+            )
+
+    def forget_vector_store(self, consumer_key: str, vector_store_id: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM vector_store_files WHERE tenant = ? AND vector_store_id = ?",
+                (tenant_id(consumer_key), vector_store_id)
+            )
+
+
+class _DisabledIndex(UploadDedupIndex):
+    """Stand-in used when deduplication is turned off; remembers nothing."""
+
+    def lookup(self, *args, **kwargs) -> Optional[str]:
+        return None
+
+    def record(self, *args, **kwargs) -> None:
+        pass
+
+    def forget_file(self, *args, **kwargs) -> None:
+        pass
+
+    def has_vector_store_file(self, *args, **kwargs) -> bool:
+        return False
+
+    def record_vector_store_file(self, *args, **kwargs) -> None:
+        pass
+
+    def forget_vector_store_file(self, *args, **kwargs) -> None:
+        pass
+
+    def forget_vector_store(self, *args, **kwargs) -> None:
+        pass
+
+
+dedup_index: UploadDedupIndex = UploadDedupIndex() if UPLOAD_DEDUP_ENABLED else _DisabledIndex()
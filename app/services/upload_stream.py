@@ -0,0 +1,322 @@
+"""
+Streaming file uploads to OpenAI.
+
+Incoming bytes are piped through a bounded queue into an async multipart POST,
+so an upload never sits in memory or on disk as a whole. At most
+``UPLOAD_QUEUE_CHUNKS`` chunks of ``UPLOAD_CHUNK_SIZE`` bytes are buffered;
+when OpenAI reads slower than the client sends, the reader waits.
+
+Progress of uploads is kept in ``active_uploads`` by upload id. Finished and
+failed uploads stay there for ``UPLOAD_PROGRESS_TTL`` seconds (default 300),
+so a client polling for progress sees the final status instead of a 404.
+
+Content that arrives as a string (the Workato endpoints) is encoded into a
+``SpooledTemporaryFile``: it stays in memory up to ``UPLOAD_SPOOL_MAX_BYTES``
+and only larger payloads spill to an unnamed temp file, which the OS removes
+as soon as it is closed.
+
+Uploads made on behalf of a consumer (``owner``) are hashed while they stream
+and recorded in the content-hash index (see ``upload_dedup``). When the hash
+is known up front, an existing file with the same content is returned instead
+of uploading again.
+"""
+from typing import Any, AsyncIterator, Callable, Dict, IO, Optional, Tuple, Union
+from dataclasses import dataclass, field
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+import aiohttp
+from aiohttp.payload import AsyncIterablePayload
+
+from .http_client import OpenAIClient, OpenAIHTTPError
+from .upload_dedup import dedup_index
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+UPLOAD_QUEUE_CHUNKS = int(os.getenv("UPLOAD_QUEUE_CHUNKS", "8"))
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+UPLOAD_PROGRESS_TTL = float(os.getenv("UPLOAD_PROGRESS_TTL", "300"))
+
+
+@dataclass
+class UploadProgress:
+    """Byte counts and outcome of one upload."""
+    upload_id: str
+    filename: str
+    total_bytes: Optional[int] = None
+    bytes_sent: int = 0
+    started_at: float = field(default_factory=time.time)
+    done: bool = False
+    status: str = "uploading"
+    error: Optional[str] = None
+    finished_at: Optional[float] = None
+    owner: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.total_bytes:
+            return None
+        return round(100.0 * self.bytes_sent / self.total_bytes, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "total_bytes": self.total_bytes,
+            "bytes_sent": self.bytes_sent,
+            "percent": self.percent,
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 3),
+            "done": self.done,
+            "status": self.status,
+            "error": self.error
+        }
+
+
+active_uploads: Dict[str, UploadProgress] = {}
+
+
+def _prune_uploads(now: float) -> None:
+    for upload_id, progress in list(active_uploads.items()):
+        if progress.finished_at is not None and now - progress.finished_at > UPLOAD_PROGRESS_TTL:
+            active_uploads.pop(upload_id, None)
+
+
+def get_upload_progress(upload_id: str) -> Optional[UploadProgress]:
+    """Progress of a running upload, or of one that ended less than ``UPLOAD_PROGRESS_TTL`` seconds ago."""
+    _prune_uploads(time.time())
+    return active_uploads.get(upload_id)
+
+_END = object()
+
+
+async def upload_file_chunks(file: Any, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read an ``UploadFile`` (or any object with async ``read``) in chunks."""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def spool_content(content: Union[str, bytes], max_size: int = UPLOAD_SPOOL_MAX_BYTES) -> Tuple[IO[bytes], int, str]:
+    """
+    Encode ``content`` into a spooled buffer, a slice at a time.
+
+    Returns:
+        The buffer rewound to the start, its size in bytes and its SHA-256.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for start in range(0, len(content), UPLOAD_CHUNK_SIZE):
+            piece = content[start:start + UPLOAD_CHUNK_SIZE]
+            if isinstance(piece, str):
+                piece = piece.encode("utf-8")
+            spool.write(piece)
+            digest.update(piece)
+            size += len(piece)
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+    return spool, size, digest.hexdigest()
+
+
+async def hash_upload_file(file: Any, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    """SHA-256 of an ``UploadFile``'s spooled content; the file is rewound afterwards."""
+    def _hash() -> str:
+        digest = hashlib.sha256()
+        file.file.seek(0)
+        for chunk in iter(lambda: file.file.read(chunk_size), b""):
+            digest.update(chunk)
+        file.file.seek(0)
+        return digest.hexdigest()
+
+    return await asyncio.to_thread(_hash)
+
+
+async def find_uploaded_file(client: OpenAIClient, owner: str, content_sha256: str, purpose: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the existing OpenAI file with this content, if the index knows one.
+
+    The file is re-fetched so entries for files deleted outside this API are
+    dropped instead of being handed out.
+    """
+    file_id = dedup_index.lookup(owner, content_sha256, purpose)
+    if not file_id:
+        return None
+    try:
+        existing = await client.get(f"files/{file_id}")
+    except OpenAIHTTPError as e:
+        if e.status == 404:
+            dedup_index.forget_file(owner, file_id)
+        else:
+            logger.warning(f"Could not verify deduplicated file {file_id}: {str(e)}")
+        return None
+    logger.info(f"Reusing file {file_id} for identical content")
+    return existing
+
+
+async def spooled_chunks(spool: IO[bytes], on_disk: bool, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read a spooled buffer in chunks; disk reads run in a worker thread."""
+    while True:
+        chunk = await asyncio.to_thread(spool.read, chunk_size) if on_disk else spool.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def bounded_chunks(source: AsyncIterator[bytes], max_chunks: int = UPLOAD_QUEUE_CHUNKS) -> AsyncIterator[bytes]:
+    """
+    Re-yield ``source`` through a queue of at most ``max_chunks`` items.
+
+    Reading the client and writing upstream overlap, while the queue bounds
+    how much is held in memory between the two.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)
+
+    async def produce():
+        try:
+            async for chunk in source:
+                if chunk:
+                    await queue.put(chunk)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+
+async def _track(chunks: AsyncIterator[bytes], progress: UploadProgress, digest: Any,
+                 on_progress: Optional[Callable[[UploadProgress], None]]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        yield chunk
+        digest.update(chunk)
+        progress.bytes_sent += len(chunk)
+        if on_progress:
+            on_progress(progress)
+
+
+async def stream_upload_file(
+    client: OpenAIClient,
+    chunks: AsyncIterator[bytes],
+    filename: str,
+    purpose: str = "assistants",
+    content_type: str = "application/octet-stream",
+    total_bytes: Optional[int] = None,
+    upload_id: Optional[str] = None,
+    owner: Optional[str] = None,
+    content_sha256: Optional[str] = None,
+    on_progress: Optional[Callable[[UploadProgress], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Upload ``chunks`` to ``/files`` as a streamed multipart request.
+
+    Args:
+        client: Tenant OpenAI client
+        chunks: Async iterator with the file body
+        filename: File name reported to OpenAI
+        purpose: OpenAI file purpose
+        content_type: MIME type of the file part
+        total_bytes: Expected size, if known, for progress percentages
+        upload_id: Key in ``active_uploads``; generated when omitted
+        owner: Consumer key allowed to read the progress; also scopes deduplication
+        content_sha256: Hash of the content, if known, to reuse an identical file
+        on_progress: Called after every chunk handed to the connection
+
+    Returns:
+        The OpenAI file object.
+    """
+    if owner and content_sha256:
+        existing = await find_uploaded_file(client, owner, content_sha256, purpose)
+        if existing:
+            return existing
+
+    progress = UploadProgress(
+        upload_id=upload_id or str(uuid.uuid4()),
+        filename=filename,
+        total_bytes=total_bytes,
+        owner=owner
+    )
+    _prune_uploads(progress.started_at)
+    active_uploads[progress.upload_id] = progress
+
+    writer = aiohttp.MultipartWriter("form-data")
+    purpose_part = writer.append(purpose)
+    purpose_part.set_content_disposition("form-data", name="purpose")
+
+    buffered = bounded_chunks(chunks)
+    digest = hashlib.sha256()
+    body = AsyncIterablePayload(
+        _track(buffered, progress, digest, on_progress),
+        content_type=content_type
+    )
+    body.set_content_disposition("form-data", name="file", filename=filename)
+    writer.append_payload(body)
+
+    try:
+        response = await client.post("files", data=writer)
+        progress.done = True
+        progress.status = "completed"
+        if owner:
+            dedup_index.record(owner, digest.hexdigest(), purpose, response["id"], progress.bytes_sent, filename)
+        logger.info(f"Streamed upload {progress.upload_id} ({filename}): {progress.bytes_sent} bytes")
+        return response
+    except BaseException as e:
+        progress.status = "failed"
+        progress.error = str(e) or type(e).__name__
+        raise
+    finally:
+        # Stops the reader task if the upload failed part way
+        await buffered.aclose()
+        progress.finished_at = time.time()
+
+
+async def upload_content(
+    client: OpenAIClient,
+    content: Union[str, bytes],
+    filename: str,
+    purpose: str = "assistants",
+    content_type: str = "application/octet-stream",
+    owner: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Upload in-memory content to ``/files`` without a named temp file.
+
+    The spool is closed on every path, so nothing is left on disk. With an
+    ``owner``, identical content uploaded before is reused.
+
+    Returns:
+        The OpenAI file object.
+    """
+    spool, size, content_sha256 = spool_content(content)
+    try:
+        return await stream_upload_file(
+            client,
+            spooled_chunks(spool, on_disk=size > UPLOAD_SPOOL_MAX_BYTES),
+            filename=filename,
+            purpose=purpose,
+            content_type=content_type,
+            total_bytes=size,
+            owner=owner,
+            content_sha256=content_sha256
+        )
+    finally:
+        spool.close()
@@ -0,0 +1,423 @@
+"""
+Rate-limit-aware scheduling of upstream OpenAI calls, per API key.
+
+Every tenant brings its own OpenAI key, each with its own request and token
+limits. :class:`UpstreamScheduler` keeps a request bucket and a token bucket
+per key, learned from the ``x-ratelimit-*`` headers of each response, and
+holds calls back while a key is out of capacity or inside a ``retry-after``
+window. Queued calls are released by priority, so interactive WebSocket
+traffic goes ahead of batch and Workato jobs on the same key.
+
+Three transports report to it:
+
+* :class:`~.http_client.OpenAIClient` (aiohttp) acquires and observes around
+  each request and retries 429s itself.
+* The OpenAI SDK, through :func:`get_openai_http_client`, whose httpx
+  transport does the same; the SDK's own retries then wait on the scheduler.
+* Blocking ``requests`` code in worker threads calls
+  :meth:`UpstreamScheduler.acquire_blocking`, which waits in the same
+  priority queue on the event loop, and :meth:`UpstreamScheduler.observe`
+  (see ``make_request``).
+
+Keys are tracked by a hash, never stored.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+import asyncio
+import hashlib
+import heapq
+import importlib
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from .metrics import upstream_request_seconds, endpoint_label, status_label
+from .tracing import tracer, CLIENT
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_SCHEDULER_ENABLED = os.getenv("UPSTREAM_SCHEDULER_ENABLED", "true").lower() not in ("0", "false", "no")
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+# Pause applied after a 429 that carries neither retry-after nor reset headers
+UPSTREAM_DEFAULT_BACKOFF = float(os.getenv("UPSTREAM_DEFAULT_BACKOFF", "1"))
+UPSTREAM_MAX_BACKOFF = float(os.getenv("UPSTREAM_MAX_BACKOFF", "60"))
+# Longest a queued call sleeps before re-checking its key
+_MAX_TICK = 0.5
+
+
+class Priority(IntEnum):
+    """Lower values are released first."""
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BATCH = 2
+
+
+_priority: ContextVar[Optional[Priority]] = ContextVar("upstream_priority", default=None)
+
+
+def current_priority(default: Priority = Priority.DEFAULT) -> Priority:
+    value = _priority.get()
+    return default if value is None else value
+
+
+@contextmanager
+def upstream_priority(priority: Priority) -> Iterator[None]:
+    """Run the enclosed upstream calls at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+async def batch_priority() -> None:
+    """FastAPI dependency marking a route's upstream calls as batch traffic."""
+    _priority.set(Priority.BATCH)
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset durations such as ``"1s"``, ``"6m0s"`` or ``"20ms"`` into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    retry_after_ms = _header_float(headers, "retry-after-ms")
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    # HTTP-date values are rare from OpenAI; they fall through to the reset headers
+    return _header_float(headers, "retry-after")
+
+
+def is_quota_error(body: Optional[str]) -> bool:
+    """True for 429s caused by an exhausted billing quota, which retrying won't fix."""
+    return bool(body) and "insufficient_quota" in body
+
+
+def api_key_from_headers(headers: Optional[Mapping[str, str]]) -> Optional[str]:
+    authorization = (headers or {}).get("Authorization") or (headers or {}).get("authorization") or ""
+    return authorization[7:] if authorization.startswith("Bearer ") else None
+
+
+def estimate_tokens(json_body: Any) -> int:
+    """
+    Rough token cost of a request: prompt size at ~4 bytes per token plus the
+    requested completion budget. Only used to pace calls against the token bucket.
+    """
+    if not isinstance(json_body, dict):
+        return 0
+    try:
+        prompt = len(json.dumps(json_body)) // 4
+    except (TypeError, ValueError):
+        prompt = 0
+    completion = json_body.get("max_completion_tokens") or json_body.get("max_tokens") or json_body.get("max_output_tokens") or 0
+    return prompt + int(completion)
+
+
+def key_id(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class _Bucket:
+    """Token bucket whose capacity and level follow the upstream headers. Unknown until first synced."""
+
+    def __init__(self):
+        self.limit: Optional[float] = None
+        self.level = 0.0
+        self.rate = 0.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.limit is not None:
+            self.level = min(self.limit, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.limit is None or amount <= 0:
+            return 0.0
+        amount = min(amount, self.limit)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate if self.rate > 0 else _MAX_TICK
+
+    def take(self, amount: float) -> None:
+        if self.limit is not None:
+            self.level -= min(amount, self.limit)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float], now: float) -> None:
+        if limit is None or remaining is None or limit <= 0:
+            return
+        self.limit = limit
+        self.level = remaining
+        if reset and remaining < limit:
+            self.rate = (limit - remaining) / reset
+        else:
+            # OpenAI limits are per minute and replenish continuously
+            self.rate = limit / 60
+        self.updated = now
+
+
+class _KeyState:
+    def __init__(self, key_id: str):
+        self.key_id = key_id
+        self.requests = _Bucket()
+        self.tokens = _Bucket()
+        self.blocked_until = 0.0
+        self.waiters: List[Tuple[int, int, int, asyncio.Future]] = []
+        self.pump: Optional[asyncio.Task] = None
+        self.admitted = 0
+        self.queued_total = 0
+        self.throttled = 0
+
+    def reserve(self, tokens: int, now: float) -> float:
+        """Consume capacity for one call and return 0, or return how long to wait."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if wait > 0:
+            return wait
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.admitted += 1
+        return 0.0
+
+
+class UpstreamScheduler:
+    """Per-API-key request/token buckets with a priority queue in front of them."""
+
+    def __init__(self, enabled: bool = UPSTREAM_SCHEDULER_ENABLED):
+        self.enabled = enabled
+        self._states: Dict[str, _KeyState] = {}
+        # Bucket updates come from the event loop and from worker threads
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        # Shared httpx clients for the OpenAI SDK, by default priority
+        self.http_clients: Dict[Priority, Any] = {}
+        # Loop running the priority queues, so worker threads can join them
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _state(self, api_key: str) -> _KeyState:
+        kid = key_id(api_key)
+        state = self._states.get(kid)
+        if state is None:
+            with self._lock:
+                state = self._states.setdefault(kid, _KeyState(kid))
+        return state
+
+    def _reserve(self, state: _KeyState, tokens: int) -> float:
+        with self._lock:
+            return state.reserve(tokens, time.monotonic())
+
+    async def acquire(self, api_key: Optional[str], tokens: int = 0, priority: Optional[Priority] = None) -> None:
+        """Wait until ``api_key`` has capacity for one call costing about ``tokens``."""
+        if not self.enabled or not api_key:
+            return
+        self._loop = asyncio.get_running_loop()
+        state = self._state(api_key)
+        if not state.waiters and self._reserve(state, tokens) <= 0:
+            return
+
+        priority = current_priority() if priority is None else priority
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiters, (int(priority), next(self._sequence), tokens, future))
+        state.queued_total += 1
+        if state.pump is None or state.pump.done():
+            state.pump = asyncio.create_task(self._pump(state))
+        await future
+
+    async def _pump(self, state: _KeyState) -> None:
+        # Release queued calls in priority order as capacity returns
+        while state.waiters:
+            _, _, tokens, future = state.waiters[0]
+            if future.done():
+                heapq.heappop(state.waiters)
+                continue
+            wait = self._reserve(state, tokens)
+            if wait <= 0:
+                heapq.heappop(state.waiters)
+                future.set_result(None)
+                continue
+            await asyncio.sleep(min(wait, _MAX_TICK))
+
+    def acquire_blocking(self, api_key: Optional[str], tokens: int = 0, priority: Optional[Priority] = None) -> None:
+        """
+        Blocking variant of :meth:`acquire` for ``requests`` code running in worker threads.
+
+        When the event loop is known the call waits in the key's priority queue
+        like any other; it must not be made from the loop itself.
+        """
+        if not self.enabled or not api_key:
+            return
+        priority = current_priority() if priority is None else priority
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                raise RuntimeError("acquire_blocking called on the event loop; run the caller with asyncio.to_thread")
+            asyncio.run_coroutine_threadsafe(self.acquire(api_key, tokens, priority), loop).result()
+            return
+        # No loop has queued calls yet, so there is no queue to respect
+        state = self._state(api_key)
+        while True:
+            wait = self._reserve(state, tokens)
+            if wait <= 0:
+                return
+            time.sleep(min(wait, _MAX_TICK))
+
+    def observe(self, api_key: Optional[str], status: int, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Update the key's buckets from a response.
+
+        Returns:
+            For a 429, the seconds the key is now paused for; otherwise None.
+        """
+        if not self.enabled or not api_key:
+            return None
+        state = self._state(api_key)
+        now = time.monotonic()
+        reset_requests = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        reset_tokens = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        with self._lock:
+            state.requests.sync(
+                _header_float(headers, "x-ratelimit-limit-requests"),
+                _header_float(headers, "x-ratelimit-remaining-requests"),
+                reset_requests, now
+            )
+            state.tokens.sync(
+                _header_float(headers, "x-ratelimit-limit-tokens"),
+                _header_float(headers, "x-ratelimit-remaining-tokens"),
+                reset_tokens, now
+            )
+            if status != 429:
+                return None
+            state.throttled += 1
+            pause = retry_after_seconds(headers)
+            if pause is None:
+                resets = [r for r in (reset_requests, reset_tokens) if r]
+                pause = max(resets) if resets else UPSTREAM_DEFAULT_BACKOFF
+            pause = min(pause, UPSTREAM_MAX_BACKOFF)
+            state.blocked_until = max(state.blocked_until, now + pause)
+        logger.warning(f"OpenAI key {state.key_id} rate limited; pausing it for {pause:.2f}s")
+        return pause
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        keys = {}
+        for kid, state in list(self._states.items()):
+            keys[kid] = {
+                "queued": sum(1 for *_, future in state.waiters if not future.done()),
+                "paused_for": round(max(0.0, state.blocked_until - now), 3),
+                "requests_limit": state.requests.limit,
+                "requests_available": round(state.requests.level, 1) if state.requests.limit is not None else None,
+                "tokens_limit": state.tokens.limit,
+                "tokens_available": round(state.tokens.level) if state.tokens.limit is not None else None,
+                "admitted": state.admitted,
+                "queued_total": state.queued_total,
+                "throttled": state.throttled
+            }
+        return {"enabled": self.enabled, "keys": keys}
+
+
+scheduler = UpstreamScheduler()
+
+
+def _request_body(request) -> Any:
+    if not request.headers.get("content-type", "").startswith("application/json"):
+        return None
+    try:
+        return json.loads(request.content)
+    except Exception:
+        return None
+
+
+def _scheduled_transport(priority: Priority):
+    """httpx transport that paces requests through the scheduler and traces them."""
+    from openai import DEFAULT_CONNECTION_LIMITS, DefaultAsyncHttpxClient
+    # The httpx flavour the SDK is built on (httpx, or httpx2 in newer releases)
+    httpx = importlib.import_module(DefaultAsyncHttpxClient.__mro__[1].__module__.partition(".")[0])
+
+    class ScheduledTransport(httpx.AsyncBaseTransport):
+        def __init__(self):
+            self._transport = httpx.AsyncHTTPTransport(limits=DEFAULT_CONNECTION_LIMITS)
+
+        async def handle_async_request(self, request):
+            api_key = api_key_from_headers(request.headers)
+            await scheduler.acquire(api_key, estimate_tokens(_request_body(request)), current_priority(priority))
+            endpoint = endpoint_label(request.url.path)
+            span = tracer.start_span(f"openai {request.method} {endpoint}", CLIENT, {
+                "http.method": request.method, "http.url": f"{request.url.scheme}://{request.url.host}{request.url.path}"
+            })
+            sent_at = time.perf_counter()
+            status = None
+            try:
+                response = await self._transport.handle_async_request(request)
+                status = response.status_code
+                span.set_attribute("http.status_code", status)
+                scheduler.observe(api_key, status, response.headers)
+                return response
+            except BaseException as e:
+                # Connection errors, timeouts and cancellation end the span too
+                span.record_exception(e)
+                raise
+            finally:
+                span.end()
+                # Time to response headers; streamed bodies keep arriving after this
+                upstream_request_seconds.observe(time.perf_counter() - sent_at, "openai", endpoint, status_label(status))
+
+        async def aclose(self) -> None:
+            await self._transport.aclose()
+
+    return ScheduledTransport()
+
+
+def get_openai_http_client(priority: Priority = Priority.DEFAULT):
+    """
+    Shared httpx client for ``AsyncOpenAI(http_client=...)`` that routes SDK
+    calls through the scheduler. ``priority`` applies when the caller hasn't set one.
+    """
+    client = scheduler.http_clients.get(priority)
+    if client is not None and not client.is_closed:
+        return client
+
+    from openai import DefaultAsyncHttpxClient
+
+    client = DefaultAsyncHttpxClient(transport=_scheduled_transport(priority))
+    scheduler.http_clients[priority] = client
+    return client
+
+
+async def close_openai_http_clients() -> None:
+    for client in list(scheduler.http_clients.values()):
+        await client.aclose()
+    scheduler.http_clients.clear()
@@ -0,0 +1,258 @@
+"""
+Bulk ingestion of documents into a vector store.
+
+Files are uploaded concurrently (bounded by a semaphore), attached with the
+vector store ``file_batches`` API, and the batches are then polled in the
+background. Each ingestion is an :class:`IngestJob` that callers poll by id.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from .http_client import OpenAIClient
+from .pagination import paginate
+from .run_waiter import BackoffPolicy
+from .upload_dedup import dedup_index
+
+logger = logging.getLogger(__name__)
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "8"))
+INGEST_MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", "32"))
+INGEST_JOB_TTL = float(os.getenv("INGEST_JOB_TTL", "3600"))
+INGEST_TIMEOUT = float(os.getenv("INGEST_TIMEOUT", "1800"))
+# Upper bound on file_ids per file_batches call
+FILE_BATCH_MAX_FILES = 500
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+# "partial": every batch finished, but some uploads or files failed
+JOB_TERMINAL_STATUSES = BATCH_TERMINAL_STATUSES | {"partial"}
+
+UploadFactory = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class IngestJob:
+    """State of one bulk ingestion."""
+    vector_store_id: str
+    owner: Optional[str] = field(default=None, repr=False)
+    job_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "uploading"
+    batch_ids: List[str] = field(default_factory=list)
+    files: List[Dict[str, Optional[str]]] = field(default_factory=list)
+    file_counts: Dict[str, int] = field(default_factory=dict)
+    # file_ids attached by each batch, for the dedup index once it finishes
+    batch_files: Dict[str, List[str]] = field(default_factory=dict, repr=False)
+    created_at: int = field(default_factory=lambda: int(time.time()))
+    updated_at: int = field(default_factory=lambda: int(time.time()))
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JOB_TERMINAL_STATUSES
+
+    @property
+    def upload_errors(self) -> int:
+        return sum(1 for f in self.files if f["error"])
+
+    def touch(self) -> None:
+        self.updated_at = int(time.time())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "vector_store_id": self.vector_store_id,
+            "status": self.status,
+            "batch_ids": list(self.batch_ids),
+            "files": list(self.files),
+            "file_counts": dict(self.file_counts),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+ingest_jobs: Dict[str, IngestJob] = {}
+# Keeps the background pollers referenced until they finish
+_pollers: Set[asyncio.Task] = set()
+
+
+def get_ingest_job(job_id: str, owner: Optional[str] = None) -> Optional[IngestJob]:
+    """Look up a job; jobs of another consumer are not visible."""
+    job = ingest_jobs.get(job_id)
+    if job is None or (owner is not None and job.owner != owner):
+        return None
+    return job
+
+
+def _prune_jobs() -> None:
+    cutoff = time.time() - INGEST_JOB_TTL
+    for job_id, job in list(ingest_jobs.items()):
+        if job.finished and job.updated_at < cutoff:
+            del ingest_jobs[job_id]
+
+
+async def upload_many(uploads: List[Tuple[str, UploadFactory]], concurrency: int = INGEST_CONCURRENCY) -> List[Dict[str, Optional[str]]]:
+    """
+    Run upload factories with at most ``concurrency`` in flight.
+
+    A failed upload does not stop the others; it is reported with its error.
+
+    Returns:
+        One ``{"filename", "file_id", "error"}`` entry per upload, in input order.
+    """
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, INGEST_MAX_CONCURRENCY)))
+
+    async def _upload(filename: str, factory: UploadFactory) -> Dict[str, Optional[str]]:
+        async with semaphore:
+            try:
+                uploaded = await factory()
+                return {"filename": filename, "file_id": uploaded["id"], "error": None}
+            except Exception as e:
+                logger.error(f"Upload of {filename} failed: {str(e)}")
+                return {"filename": filename, "file_id": None, "error": str(e)}
+
+    return list(await asyncio.gather(*(_upload(name, factory) for name, factory in uploads)))
+
+
+async def ingest_files(
+    client: OpenAIClient,
+    vector_store_id: str,
+    uploads: List[Tuple[str, UploadFactory]],
+    concurrency: int = INGEST_CONCURRENCY,
+    owner: Optional[str] = None,
+) -> IngestJob:
+    """
+    Upload files concurrently, attach them as file batches and start tracking.
+
+    Returns once the batches are created; indexing progress is polled in the
+    background and reflected on the returned job.
+    """
+    _prune_jobs()
+    job = IngestJob(vector_store_id=vector_store_id, owner=owner)
+    ingest_jobs[job.job_id] = job
+
+    job.files = await upload_many(uploads, concurrency)
+    file_ids = list(dict.fromkeys(f["file_id"] for f in job.files if f["file_id"]))
+    logger.info(f"Ingest job {job.job_id}: uploaded {len(file_ids)}/{len(uploads)} files")
+
+    if not file_ids:
+        job.status = "failed"
+        job.touch()
+        return job
+
+    if owner:
+        # Identical content already attached to this store needs no new batch
+        file_ids = [f for f in file_ids if not dedup_index.has_vector_store_file(owner, vector_store_id, f)]
+        if not file_ids:
+            job.status = "partial" if job.upload_errors else "completed"
+            job.touch()
+            return job
+
+    batch_failed = False
+    try:
+        for start in range(0, len(file_ids), FILE_BATCH_MAX_FILES):
+            chunk = file_ids[start:start + FILE_BATCH_MAX_FILES]
+            batch = await client.post(
+                f"vector_stores/{vector_store_id}/file_batches",
+                json_body={"file_ids": chunk}
+            )
+            job.batch_ids.append(batch["id"])
+            job.batch_files[batch["id"]] = chunk
+    except Exception as e:
+        logger.error(f"Ingest job {job.job_id}: creating file batch failed: {str(e)}")
+        batch_failed = True
+        if not job.batch_ids:
+            job.status = "failed"
+            job.touch()
+            raise
+
+    job.status = "in_progress"
+    job.touch()
+
+    poller = asyncio.create_task(_track_batches(client, job, failed=batch_failed))
+    _pollers.add(poller)
+    poller.add_done_callback(_pollers.discard)
+    return job
+
+
+async def _track_batches(client: OpenAIClient, job: IngestJob, failed: bool = False) -> None:
+    """Poll the job's file batches until all of them are terminal."""
+    backoff = BackoffPolicy(initial=1.0, maximum=15.0)
+    interval = backoff.initial
+    deadline = time.monotonic() + INGEST_TIMEOUT
+    pending = set(job.batch_ids)
+    counts: Dict[str, Dict[str, int]] = {}
+
+    try:
+        while pending:
+            await asyncio.sleep(interval)
+            for batch_id in list(pending):
+                try:
+                    batch = await client.get(f"vector_stores/{job.vector_store_id}/file_batches/{batch_id}")
+                except Exception as e:
+                    logger.warning(f"Ingest job {job.job_id}: polling batch {batch_id} failed: {str(e)}")
+                    continue
+                counts[batch_id] = batch.get("file_counts") or {}
+                if batch.get("status") in BATCH_TERMINAL_STATUSES:
+                    pending.discard(batch_id)
+                    failed = failed or batch.get("status") != "completed"
+                    if job.owner:
+                        await _record_indexed(client, job, batch_id, batch)
+
+            job.file_counts = _sum_counts(counts.values())
+            job.touch()
+
+            if pending and time.monotonic() > deadline:
+                logger.warning(f"Ingest job {job.job_id}: gave up waiting after {INGEST_TIMEOUT} seconds")
+                failed = True
+                break
+            interval = backoff.next(interval)
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        job.touch()
+        raise
+
+    if failed:
+        job.status = "failed"
+    elif job.file_counts.get("failed") or job.upload_errors:
+        job.status = "partial"
+    else:
+        job.status = "completed"
+    job.touch()
+    logger.info(f"Ingest job {job.job_id} {job.status}: {job.file_counts}")
+
+
+async def _record_indexed(client: OpenAIClient, job: IngestJob, batch_id: str, batch: Dict[str, Any]) -> None:
+    """
+    Add a finished batch's indexed files to the dedup index.
+
+    Files that failed or were cancelled are left out, so a later ingest
+    attaches them again instead of skipping them.
+    """
+    file_ids = job.batch_files.get(batch_id, [])
+    if batch.get("status") == "completed" and not (batch.get("file_counts") or {}).get("failed"):
+        indexed = file_ids
+    else:
+        try:
+            indexed = [
+                item["id"] async for item in paginate(
+                    client, f"vector_stores/{job.vector_store_id}/file_batches/{batch_id}/files", params={"filter": "completed"}
+                )
+            ]
+        except Exception as e:
+            # Recording nothing only costs a duplicate batch on the next ingest
+            logger.warning(f"Ingest job {job.job_id}: listing indexed files of batch {batch_id} failed: {str(e)}")
+            return
+    for file_id in indexed:
+        dedup_index.record_vector_store_file(job.owner, job.vector_store_id, file_id)
+
+
+def _sum_counts(counts: Any) -> Dict[str, int]:
+    total: Dict[str, int] = {}
+    for batch_counts in counts:
+        for key, value in batch_counts.items():
+            if isinstance(value, int):
+                total[key] = total.get(key, 0) + value
+    return total
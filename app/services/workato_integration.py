@@ -4,6 +4,9 @@ import json
 import aiohttp
 from dataclasses import dataclass
 
+from .access_log import redact_headers
+from .tracing import tracer
+
 try:
     from agents import Tool, function_tool
     AGENTS_SDK_AVAILABLE = True
@@ -78,10 +81,10 @@ class WorkatoIntegration:
                         }
 
                 async with aiohttp.ClientSession() as session:
-                    headers = {
+                    headers = tracer.inject({
                         "API-TOKEN": self.config.api_token,
                         "Content-Type": "application/json"
-                    }
+                    })
                     
                     # Format the payload according to Workato's expected structure
                     request_payload = {
@@ -94,7 +97,7 @@ class WorkatoIntegration:
                     # Log the complete request details
                     logger.info("=== Workato API Request Details ===")
                     logger.info(f"Endpoint URL: {self.config.endpoint_url}")
-                    logger.info(f"Headers: {json.dumps(headers, indent=2)}")
+                    logger.info(f"Headers: {json.dumps(redact_headers(headers), indent=2)}")
                     logger.info(f"Request Payload: {json.dumps(request_payload, indent=2)}")
                     logger.info("================================")
                     
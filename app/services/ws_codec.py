@@ -0,0 +1,177 @@
+"""
+Frame encodings for the assistant WebSocket protocol.
+
+Protocol version 1 is the original JSON format::
+
+    {"type": "content_chunk", "data": {"content": "Hel"}, "conversation_id": "a"}
+
+Protocol version 2 lets the client pick a compact encoding when it connects
+(``?protocol_version=2&encoding=compact`` or ``encoding=msgpack``). Compact
+frames are flat and use short keys and type codes::
+
+    {"t": "c", "c": "Hel", "i": "a"}
+
+``msgpack`` sends the same compact frames as binary messages. It needs the
+optional ``msgpack`` package; without it the server falls back to compact JSON
+and reports the encoding it actually chose in ``connection_established``.
+"""
+from typing import Any, Dict, Optional, Union
+import json
+import logging
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION_LEGACY = 1
+PROTOCOL_VERSION_COMPACT = 2
+LATEST_PROTOCOL_VERSION = PROTOCOL_VERSION_COMPACT
+
+ENCODING_JSON = "json"
+ENCODING_COMPACT = "compact"
+ENCODING_MSGPACK = "msgpack"
+
+FRAME_TYPE_CODES: Dict[str, str] = {
+    "connection_established": "hi",
+    "initialize": "in",
+    "initialized": "ok",
+    "chat_message": "cm",
+    "processing_started": "ps",
+    "content_chunk": "c",
+    "tool_usage": "tu",
+    "processing_complete": "pc",
+    "processing_stopped": "px",
+    "stop": "st",
+    "clear_history": "ch",
+    "history_cleared": "hc",
+    "close_conversation": "cc",
+    "conversation_closed": "cx",
+    "error": "er",
+}
+
+FIELD_CODES: Dict[str, str] = {
+    "type": "t",
+    "conversation_id": "i",
+    "content": "c",
+    "message": "m",
+    "assistant_id": "a",
+    "solomon_consumer_key": "k",
+    "vector_store_ids": "v",
+    "max_conversations": "n",
+    "protocol_version": "pv",
+    "encoding": "en",
+}
+
+_FRAME_TYPES = {code: name for name, code in FRAME_TYPE_CODES.items()}
+_FIELDS = {code: name for name, code in FIELD_CODES.items()}
+
+_JSON_SEPARATORS = (",", ":")
+
+
+class FrameDecodeError(Exception):
+    """Raised when an incoming frame cannot be decoded."""
+    pass
+
+
+class JsonCodec:
+    """Protocol version 1: the original nested JSON frames."""
+    encoding = ENCODING_JSON
+    protocol_version = PROTOCOL_VERSION_LEGACY
+    binary = False
+
+    def encode(self, frame: Dict[str, Any]) -> Union[str, bytes]:
+        return json.dumps(frame, separators=_JSON_SEPARATORS, ensure_ascii=False)
+
+    def decode(self, raw: Union[str, bytes]) -> Dict[str, Any]:
+        try:
+            frame = json.loads(raw)
+        except ValueError as e:
+            raise FrameDecodeError(f"Invalid JSON frame: {str(e)}")
+        if not isinstance(frame, dict):
+            raise FrameDecodeError("Frame must be an object")
+        return frame
+
+
+class CompactJsonCodec(JsonCodec):
+    """Protocol version 2: flat frames with short keys and type codes."""
+    encoding = ENCODING_COMPACT
+    protocol_version = PROTOCOL_VERSION_COMPACT
+
+    def encode(self, frame: Dict[str, Any]) -> Union[str, bytes]:
+        return json.dumps(self.compact(frame), separators=_JSON_SEPARATORS, ensure_ascii=False)
+
+    def decode(self, raw: Union[str, bytes]) -> Dict[str, Any]:
+        return self.expand(super().decode(raw))
+
+    @staticmethod
+    def compact(frame: Dict[str, Any]) -> Dict[str, Any]:
+        frame_type = frame.get("type")
+        compacted = {"t": FRAME_TYPE_CODES.get(frame_type, frame_type)}
+        for key, value in frame.items():
+            if key == "type":
+                continue
+            if key == "data" and isinstance(value, dict):
+                for data_key, data_value in value.items():
+                    compacted[FIELD_CODES.get(data_key, data_key)] = data_value
+            else:
+                compacted[FIELD_CODES.get(key, key)] = value
+        return compacted
+
+    @staticmethod
+    def expand(frame: Dict[str, Any]) -> Dict[str, Any]:
+        """Expand a compact client frame to the flat v1 request format."""
+        expanded = {_FIELDS.get(key, key): value for key, value in frame.items()}
+        frame_type = expanded.get("type")
+        expanded["type"] = _FRAME_TYPES.get(frame_type, frame_type)
+        return expanded
+
+
+class MsgpackCodec(CompactJsonCodec):
+    """Protocol version 2: compact frames packed with msgpack, sent as binary."""
+    encoding = ENCODING_MSGPACK
+    binary = True
+
+    def encode(self, frame: Dict[str, Any]) -> Union[str, bytes]:
+        return msgpack.packb(self.compact(frame), use_bin_type=True)
+
+    def decode(self, raw: Union[str, bytes]) -> Dict[str, Any]:
+        if isinstance(raw, str):
+            # Allow text frames on a msgpack socket, e.g. from debugging tools
+            return super().decode(raw)
+        try:
+            frame = msgpack.unpackb(raw, raw=False)
+        except Exception as e:
+            raise FrameDecodeError(f"Invalid msgpack frame: {str(e)}")
+        if not isinstance(frame, dict):
+            raise FrameDecodeError("Frame must be a map")
+        return self.expand(frame)
+
+
+def negotiate_codec(protocol_version: Optional[Union[int, str]] = None, encoding: Optional[str] = None) -> JsonCodec:
+    """
+    Pick the codec for a connection from the client's requested version and encoding.
+
+    Anything below protocol version 2, or an unknown encoding, keeps the v1 JSON format.
+    """
+    try:
+        version = int(protocol_version) if protocol_version is not None else PROTOCOL_VERSION_LEGACY
+    except (TypeError, ValueError):
+        version = PROTOCOL_VERSION_LEGACY
+
+    if version < PROTOCOL_VERSION_COMPACT:
+        return JsonCodec()
+
+    if encoding == ENCODING_MSGPACK:
+        if MSGPACK_AVAILABLE:
+            return MsgpackCodec()
+        logger.warning("msgpack encoding requested but msgpack is not installed; using compact JSON")
+        return CompactJsonCodec()
+
+    if encoding in (ENCODING_COMPACT, None):
+        return CompactJsonCodec()
+
+    return JsonCodec()
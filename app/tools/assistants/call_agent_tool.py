@@ -1,5 +1,5 @@
 from typing import Dict, Any
-import requests
+from services.resilience import resilient_request
 from .base_assistant import BaseTool
 
 class CallAgentTool(BaseTool):
@@ -34,7 +34,7 @@ class CallAgentTool(BaseTool):
             }
         }
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = resilient_request("solomon_api", "post", url, headers=headers, json=payload)
         response.raise_for_status()
         return response.json()
 
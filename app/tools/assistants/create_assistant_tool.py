@@ -1,11 +1,9 @@
 from typing import Dict, Any
-import requests
+from services.resilience import resilient_request
+from helpers.aws_helpers import secrets
 from .base_assistant import BaseTool
 
 class CreateAssistantTool(BaseTool):
-    # Hardcoded API token
-    API_TOKEN = '3cb323833ca87933cf00c6cf1b12a25e14acc1309d8ad544b850f17deaac24b5'
-
     def execute(self, name: str, instructions: str, description: str, solomon_consumer_key: str, thread_id: str) -> Dict[str, Any]:
         """
         Creates a new assistant using the Workato endpoint.
@@ -21,7 +19,7 @@ class CreateAssistantTool(BaseTool):
         
         headers = {
             'solomon-consumer-key': solomon_consumer_key,
-            'api-token': self.API_TOKEN,
+            'api-token': secrets.get('WORKATO_ASSISTANT_BUILDER_TOKEN'),
             'thread_id': thread_id,
             'Content-Type': 'application/json'
         }
@@ -32,7 +30,7 @@ class CreateAssistantTool(BaseTool):
             'instructions': instructions
         }
         
-        response = requests.post(url, headers=headers, json=data)
+        response = resilient_request("workato", "post", url, headers=headers, json=data)
         return response.json()
 
     def get_definition(self) -> Dict[str, Any]:
@@ -1,5 +1,5 @@
 from typing import Dict, Any
-import requests
+from services.resilience import resilient_request
 
 class DeleteAssistantTool:
     def execute(self, assistant_id: str) -> Dict[str, Any]:
@@ -14,7 +14,7 @@ class DeleteAssistantTool:
             'Content-Type': 'application/json'
         }
         
-        response = requests.delete(url, headers=headers)
+        response = resilient_request("solomon_api", "delete", url, headers=headers)
         return response.json()
 
     def get_definition(self) -> Dict[str, Any]:
@@ -1,5 +1,5 @@
 from typing import Dict, Any
-import requests
+from services.resilience import resilient_request
 from .base_assistant import BaseTool
 
 class ListAssistantsTool(BaseTool):
@@ -18,7 +18,7 @@ class ListAssistantsTool(BaseTool):
             'limit': limit,
             'order': order
         }
-        response = requests.get(url, params=params, headers=headers)
+        response = resilient_request("solomon_api", "get", url, params=params, headers=headers)
         return response.json()
 
     def get_definition(self) -> Dict[str, Any]:
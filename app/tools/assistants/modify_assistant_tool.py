@@ -1,5 +1,5 @@
 from typing import Dict, Any, Optional, List
-import requests
+from services.resilience import resilient_request
 
 class ModifyAssistantTool:
     def execute(self, assistant_id: str, name: Optional[str] = None, 
@@ -70,7 +70,7 @@ class ModifyAssistantTool:
             if processed_tool_resources:
                 payload['tool_resources'] = processed_tool_resources
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = resilient_request("solomon_api", "post", url, idempotent=True, json=payload, headers=headers)
         return response.json()
 
     def get_definition(self) -> Dict[str, Any]:
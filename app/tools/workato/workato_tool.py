@@ -1,5 +1,6 @@
 from typing import Dict, Any
-import requests
+from services.resilience import resilient_request
+from helpers.aws_helpers import secrets
 import json
 
 class WorkatoAssistantFunctionTool:
@@ -13,11 +14,11 @@ class WorkatoAssistantFunctionTool:
         """
         url = 'https://apim.workato.com/jayc0/workato_assistant_function'
         headers = {
-            'API-TOKEN': 'af1d16385d51a386e715e3867b747a928c048bd3b9c7f03f5bc61aa606368e03',
+            'API-TOKEN': secrets.get('WORKATO_ASSISTANT_FUNCTION_TOKEN'),
             'Content-Type': 'application/json'
         }
         data = {'data_type': data_type, 'info': info}
-        response = requests.post(url, json=data, headers=headers)
+        response = resilient_request("workato", "post", url, json=data, headers=headers)
         return response.text
 
     def get_definition(self) -> Dict[str, Any]:
@@ -1,5 +1,6 @@
 from typing import Dict, Any, Optional
-import requests
+from services.resilience import resilient_request
+from helpers.aws_helpers import secrets
 import json
 
 class WorkatoActionTool:
@@ -14,7 +15,7 @@ class WorkatoActionTool:
         """
         url = 'https://apim.workato.com/solconsult/assistant-tools-v1/workato-root-tool'
         headers = {
-            'API-TOKEN': '0c95440824af817055b784c1e87bd31e36f21066df49f4d863e574cbf6e3b4d6',
+            'API-TOKEN': secrets.get('WORKATO_ACTION_TOKEN'),
             'Content-Type': 'application/json'
         }
         data = {
@@ -22,7 +23,7 @@ class WorkatoActionTool:
             'parameters': parameters or {},
             'schema': schema or {}
         }
-        response = requests.post(url, json=data, headers=headers)
+        response = resilient_request("workato", "post", url, json=data, headers=headers)
         return response.text
 
     def get_definition(self) -> Dict[str, Any]:
@@ -20,7 +20,6 @@ def get_headers(openai_api_key: str = None) -> dict:
     If openai_api_key is provided, it will use that, otherwise it will use the environment variable.
     """
     api_key = openai_api_key or OPENAI_API_KEY_env
-    print(api_key)
     if not api_key:
         raise ValueError("OpenAI API key must be provided either as an argument or set as an environment variable.")
 
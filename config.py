@@ -1,5 +1,35 @@
 from functools import lru_cache
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Any, Dict, Optional, Tuple, Type
+from pydantic.fields import FieldInfo
+from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
+
+
+class AWSSettings(BaseSettings):
+    """Where to find the application secret; read from the environment and .env only."""
+    aws_secret_name: Optional[str] = None
+    aws_default_region: Optional[str] = None
+    aws_region: Optional[str] = None
+    aws_access_key_id: Optional[str] = None
+    aws_secret_access_key: Optional[str] = None
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+class SecretsManagerSettingsSource(PydanticBaseSettingsSource):
+    """Reads settings from the cached application secret, keyed by the upper-cased field name."""
+
+    def get_field_value(self, field: FieldInfo, field_name: str) -> Tuple[Any, str, bool]:
+        # Imported here: the secrets provider itself is configured from AWSSettings
+        from helpers.aws_helpers import secrets
+        return secrets.get(field_name.upper(), default=None, cast=lambda value: value), field_name, False
+
+    def __call__(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for field_name, field in self.settings_cls.model_fields.items():
+            value, key, _ = self.get_field_value(field, field_name)
+            if value is not None:
+                data[key] = value
+        return data
 
 
 class Settings(BaseSettings):
@@ -11,6 +41,22 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env")
 
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        # Environment and .env win; the secret fills in whatever they leave out
+        return init_settings, env_settings, dotenv_settings, SecretsManagerSettingsSource(settings_cls), file_secret_settings
+
 @lru_cache
 def get_settings():
-    return Settings()
\ No newline at end of file
+    return Settings()
+
+@lru_cache
+def get_aws_settings():
+    return AWSSettings()
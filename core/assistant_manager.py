@@ -8,9 +8,17 @@ class AssistantManager:
     def __init__(self, client):
         self.client = client
 
+    async def iter_assistants(self, page_size: int = 100):
+        """
+        Iterate over all assistants.
+
+        The SDK paginator requests the following pages as the loop advances.
+        """
+        async for assistant in self.client.beta.assistants.list(limit=page_size):
+            yield assistant
+
     async def list_assistants(self):
-        response = await self.client.beta.assistants.list()
-        return {assistant.name: assistant.id for assistant in response.data}
+        return {assistant.name: assistant.id async for assistant in self.iter_assistants()}
 
     async def retrieve_assistant(self, assistant_id: str):
         return await self.client.beta.assistants.retrieve(assistant_id)
@@ -58,5 +66,8 @@ class AssistantManager:
         Returns:
             str: The ID of the assistant if found, otherwise None.
         """
-        assistants = await self.list_assistants()
-        return assistants.get(name)
\ No newline at end of file
+        # Stop paging as soon as the assistant is found
+        async for assistant in self.iter_assistants():
+            if assistant.name == name:
+                return assistant.id
+        return None
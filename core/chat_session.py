@@ -1,17 +1,29 @@
 import asyncio
+import time
+from typing import Any, Callable, Optional
 from thread_manager import ThreadManager
 from assistant_manager import AssistantManager
+from tool_function_executor import ToolFunctionExecutor
+
+# Statuses at which the fallback poll stops; without a waiter, tool calls are left to the caller
+STOP_STATUSES = {"completed", "failed", "cancelled", "expired", "incomplete", "requires_action"}
 
 
 class ChatSession:
     def __init__(self, thread_manager: ThreadManager, assistant_manager: AssistantManager, assistant_name: str,
-                 model_name: str, assistant_id: str = None, thread_id: str = None):
+                 model_name: str, assistant_id: str = None, thread_id: str = None,
+                 tool_executor: Optional[ToolFunctionExecutor] = None, run_timeout: float = 300.0,
+                 run_waiter: Optional[Callable[..., Any]] = None):
         self.thread_manager = thread_manager
         self.assistant_manager = assistant_manager
         self.assistant_name = assistant_name
         self.model_name = model_name
         self.assistant_id = assistant_id
         self.thread_id = thread_id
+        self.tool_executor = tool_executor
+        self.run_timeout = run_timeout
+        # Built as run_waiter(client, tool_handler=..., timeout=...), e.g. the API service's RunWaiter
+        self.run_waiter = run_waiter
 
     async def start_session(self):
         if self.thread_id is None:
@@ -103,10 +115,10 @@ class ChatSession:
         await self.send_message(user_input)
 
         # Create a new run for the assistant to respond
-        await self.create_run()
+        run = await self.create_run()
 
         # Wait for the assistant's response
-        await self.wait_for_assistant()
+        await self.wait_for_assistant(run.id)
 
         # Retrieve the latest response
         return await self.retrieve_latest_response()
@@ -114,13 +126,31 @@ class ChatSession:
     async def create_run(self):
         return await self.thread_manager.create_run(self.thread_id, self.assistant_id)
 
-    async def wait_for_assistant(self):
-        while True:
+    async def wait_for_assistant(self, run_id: Optional[str] = None):
+        if run_id is None:
             runs = await self.thread_manager.list_runs(self.thread_id)
-            latest_run = runs.data[0]
-            if latest_run.status in ["completed", "failed"]:
-                break
-            await asyncio.sleep(2)  # Wait for 2 seconds before checking again
+            run_id = runs.data[0].id
+
+        if self.run_waiter is None:
+            return await self.poll_run(run_id)
+
+        tool_handler = None
+        if self.tool_executor:
+            async def tool_handler(tool_calls):
+                return await self.tool_executor.execute_tool_functions({"tool_calls": tool_calls})
+
+        waiter = self.run_waiter(self.thread_manager.client, tool_handler=tool_handler, timeout=self.run_timeout)
+        return await waiter.wait(self.thread_id, run_id)
+
+    async def poll_run(self, run_id: str, interval: float = 2.0):
+        deadline = time.monotonic() + self.run_timeout
+        while True:
+            run = await self.thread_manager.retrieve_run(self.thread_id, run_id)
+            if run.status in STOP_STATUSES:
+                return run
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Run {run_id} did not complete within {self.run_timeout} seconds")
+            await asyncio.sleep(interval)
 
     async def retrieve_latest_response(self):
         response = await self.thread_manager.list_messages(self.thread_id)
@@ -47,6 +47,9 @@ class ThreadManager:
     async def list_runs(self, thread_id: str):
         return await self.client.beta.threads.runs.list(thread_id=thread_id)
 
+    async def retrieve_run(self, thread_id: str, run_id: str):
+        return await self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+
     @staticmethod
     def count_tokens(text: str):
         # Placeholder for the actual token counting logic
@@ -1 +1 @@
-from .aws_helpers import get_secret_value
\ No newline at end of file
+from .aws_helpers import SecretsProvider, SecretNotFoundError, SecretUnavailableError, get_secret_value, secrets
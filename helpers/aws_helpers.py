@@ -1,37 +1,217 @@
-import boto3
-from botocore.exceptions import ClientError
+"""
+Cached access to the application's AWS Secrets Manager secret.
+
+``SecretsProvider`` fetches a secret once, keeps the parsed JSON in memory and
+refreshes it in a background thread once it is older than ``AWS_SECRETS_TTL``
+seconds, so reading a key costs a dict lookup. The provider is configured from
+``AWS_SECRET_NAME``, ``AWS_DEFAULT_REGION`` and the AWS access keys in the
+environment or ``.env`` (see ``config.AWSSettings``); without keys it uses the
+standard boto3 credential chain. An environment variable named like a key
+overrides that key of the secret.
+
+``get_secret_value`` raises when the secret can't be fetched; ``get`` raises
+:class:`SecretNotFoundError` for a missing key without a default.
+"""
+from typing import Any, Callable, Dict, Optional
 import json
+import logging
+import os
+import threading
+import time
 
-from config import Settings, get_settings
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
 
-settings: Settings = get_settings()
+from config import AWSSettings, get_aws_settings
 
-def get_secret_value(key_name: str):
-    secret_name = settings.aws_secret_name
-    region_name = settings.aws_default_region
-
-    # Create a Secrets Manager client
-    session = boto3.session.Session(
-        aws_access_key_id=settings.aws_access_key_id,
-        aws_secret_access_key=settings.aws_secret_access_key,
-        region_name=region_name
+logger = logging.getLogger(__name__)
+
+AWS_SECRETS_TTL = float(os.getenv("AWS_SECRETS_TTL", "300"))
+# After a failed fetch, wait this long before calling Secrets Manager again
+AWS_SECRETS_RETRY_AFTER = float(os.getenv("AWS_SECRETS_RETRY_AFTER", "60"))
+
+_MISSING = object()
+
+
+class SecretNotFoundError(KeyError):
+    """Raised when a required key is neither in the secret nor given a default."""
+
+    def __str__(self) -> str:
+        return f"{self.args[0]} is not set in the environment or the application secret"
+
+
+class SecretUnavailableError(RuntimeError):
+    """Raised when the application secret is not configured or can't be fetched."""
+    pass
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class SecretsProvider:
+    """
+    In-memory cache of one or more Secrets Manager secrets.
+
+    Args:
+        secret_name: Default secret id for lookups
+        region_name: AWS region of the secret
+        ttl: Seconds a fetched secret is served before being refreshed in the background
+        access_key_id: AWS access key; the default credential chain is used without one
+        secret_access_key: AWS secret key matching ``access_key_id``
+    """
+
+    def __init__(self, secret_name: Optional[str], region_name: Optional[str], ttl: float = AWS_SECRETS_TTL,
+                 access_key_id: Optional[str] = None, secret_access_key: Optional[str] = None):
+        self.secret_name = secret_name
+        self.region_name = region_name
+        self.ttl = ttl
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self._client = None
+        self._secrets: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret_name)
+
+    def _secrets_client(self):
+        if self._client is None:
+            session = boto3.session.Session(
+                aws_access_key_id=self.access_key_id,
+                aws_secret_access_key=self.secret_access_key,
+                region_name=self.region_name
+            )
+            self._client = session.client(service_name="secretsmanager")
+        return self._client
+
+    def _fetch(self, secret_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self._secrets_client().get_secret_value(SecretId=secret_id)
+            secret = json.loads(response["SecretString"])
+        except (ClientError, BotoCoreError, KeyError, ValueError) as e:
+            logger.error(f"Error fetching secret {secret_id}: {e}")
+            with self._lock:
+                self.errors += 1
+                self._failed_at[secret_id] = time.monotonic()
+            return None
+        with self._lock:
+            self.fetches += 1
+            self._secrets[secret_id] = secret
+            self._fetched_at[secret_id] = time.monotonic()
+            self._failed_at.pop(secret_id, None)
+        return secret
+
+    def _refresh_in_background(self, secret_id: str) -> None:
+        with self._lock:
+            if secret_id in self._refreshing:
+                return
+            self._refreshing.add(secret_id)
+
+        def refresh():
+            try:
+                self._fetch(secret_id)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(secret_id)
+
+        threading.Thread(target=refresh, name="secret-refresh", daemon=True).start()
+
+    def get_secret(self, secret_id: Optional[str] = None, required: bool = False) -> Dict[str, Any]:
+        """
+        Return the parsed secret, fetching it on first use.
+
+        A stale secret is returned as-is while a refresh runs in the background.
+        Returns an empty dict when the secret can't be fetched, or raises
+        :class:`SecretUnavailableError` if ``required``.
+        """
+        secret_id = secret_id or self.secret_name
+        if not secret_id:
+            if required:
+                raise SecretUnavailableError("AWS_SECRET_NAME is not set")
+            return {}
+
+        now = time.monotonic()
+        secret = self._secrets.get(secret_id)
+        if secret is not None:
+            if now - self._fetched_at[secret_id] >= self.ttl:
+                self._refresh_in_background(secret_id)
+            return secret
+
+        failed_at = self._failed_at.get(secret_id)
+        if failed_at is None or now - failed_at >= AWS_SECRETS_RETRY_AFTER:
+            secret = self._fetch(secret_id)
+            if secret is not None:
+                return secret
+        if required:
+            raise SecretUnavailableError(f"Secret {secret_id} could not be fetched")
+        return {}
+
+    def get(self, key: str, default: Any = _MISSING, cast: Callable[[Any], Any] = str, secret_id: Optional[str] = None) -> Any:
+        """
+        Typed accessor for one key of the secret; an environment variable named ``key`` wins.
+
+        Args:
+            key: Key inside the secret's JSON
+            default: Returned when the key is absent; without one a missing key raises
+            cast: Converts the raw value, e.g. ``int``, ``float`` or ``bool``
+            secret_id: Secret to read instead of the default one
+
+        Raises:
+            SecretNotFoundError: The key is missing and no default was given.
+        """
+        value = os.environ.get(key)
+        if value is None:
+            value = self.get_secret(secret_id).get(key)
+        if value is None:
+            if default is _MISSING:
+                raise SecretNotFoundError(key)
+            return default
+        if cast is bool:
+            return _to_bool(value)
+        return cast(value)
+
+    def preload(self, *secret_ids: str) -> bool:
+        """Fetch secrets ahead of the first request. Returns False if any fetch failed."""
+        ids = secret_ids or ((self.secret_name,) if self.secret_name else ())
+        return all(self._fetch(secret_id) is not None for secret_id in ids)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "secrets": {secret_id: {"keys": len(secret), "age_seconds": round(now - self._fetched_at[secret_id], 1)}
+                        for secret_id, secret in self._secrets.items()}
+        }
+
+
+def _provider_from_settings(settings: AWSSettings) -> SecretsProvider:
+    return SecretsProvider(
+        settings.aws_secret_name,
+        settings.aws_default_region or settings.aws_region,
+        access_key_id=settings.aws_access_key_id,
+        secret_access_key=settings.aws_secret_access_key
     )
-    client = session.client(service_name='secretsmanager')
-
-    try:
-        get_secret_value_response = client.get_secret_value(
-            SecretId=secret_name
-        )
-    except ClientError as e:
-        # Log and re-raise the exception
-        print(f"Error fetching secret: {e}")
-        raise e
-
-    # Parse the secret value
-    secret = get_secret_value_response['SecretString']
-    
-    # Convert the secret string to a dictionary
-    secret_dict = json.loads(secret)
-
-    # Return the value associated with the provided key
-    return secret_dict.get(key_name)
\ No newline at end of file
+
+
+secrets = _provider_from_settings(get_aws_settings())
+
+
+def get_secret_value(key_name: str):
+    """
+    Return one key of the application secret, or None if the secret lacks it.
+
+    Raises:
+        SecretUnavailableError: The secret is not configured or can't be fetched.
+    """
+    return secrets.get_secret(required=True).get(key_name)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Run the real FastAPI app against the local stand-ins.
+
+OpenAI SDK clients are pointed at the mock with ``OPENAI_BASE_URL``; the
+hardcoded OpenAI, Workato and API Gateway URLs used with ``requests`` are
+rewritten to the mock (or to this server) at the session level; and
+``DatabaseConnector`` is bound to the SQLite stand-in. Nothing else in the
+app is changed, so routing, auth, retries, scheduling and logging all run as
+in production.
+
+    python tests/load/app_server.py --port 8901 --mock-url http://127.0.0.1:8900 --db /tmp/load.db
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "app"), os.path.dirname(os.path.abspath(__file__))]
+
+from sqlite_db import create_sqlite_engine, create_database, LOAD_OPENAI_API_KEY
+
+REAL_GATEWAY = "https://55gdlc2st8.execute-api.us-east-1.amazonaws.com"
+
+
+def configure_environment(mock_url: str) -> None:
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ.setdefault("OPENAI_API_KEY", LOAD_OPENAI_API_KEY)
+    os.environ["OPENAI_BASE_URL"] = f"{mock_url}/v1"
+    os.environ["OPENAI_API_BASE"] = f"{mock_url}/v1"
+    # Keep the load run from reaching AWS for secrets (an empty value also masks .env)
+    os.environ["AWS_SECRET_NAME"] = ""
+    for token in ("WORKATO_API_TOKEN", "WORKATO_ASSISTANT_FUNCTION_TOKEN", "WORKATO_ACTION_TOKEN", "WORKATO_ASSISTANT_BUILDER_TOKEN"):
+        os.environ.setdefault(token, "load-test-token")
+
+
+def redirect_requests(rewrites: dict) -> None:
+    """Rewrite URL prefixes for every call made through ``requests``."""
+    import requests
+
+    original = requests.Session.request
+
+    def request(self, method, url, *args, **kwargs):
+        for prefix, target in rewrites.items():
+            if url.startswith(prefix):
+                url = target + url[len(prefix):]
+                break
+        return original(self, method, url, *args, **kwargs)
+
+    requests.Session.request = request
+
+
+def use_sqlite(path: str) -> None:
+    """Bind every ``DatabaseConnector`` to the SQLite stand-in at ``path``."""
+    from sqlalchemy.orm import sessionmaker
+    import rds_db_connection
+
+    def _create_connection_string(self):
+        self.connection_string = f"sqlite:///{path}"
+
+    def _create_engine(self):
+        self.engine = create_sqlite_engine(path)
+        rds_db_connection.instrument_engine(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+    rds_db_connection.DatabaseConnector._create_connection_string = _create_connection_string
+    rds_db_connection.DatabaseConnector._create_engine = _create_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the app against local OpenAI/Workato/DB stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8900")
+    parser.add_argument("--db", default=os.path.join(ROOT, "tests", "load", "load.db"))
+    parser.add_argument("--app", default="app.main:app", help="ASGI app to serve, e.g. app.api.websocket.websocket_server:app")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    configure_environment(args.mock_url)
+    if not os.path.exists(args.db):
+        create_database(args.db)
+    redirect_requests({
+        "https://api.openai.com": args.mock_url,
+        "https://apim.workato.com": f"{args.mock_url}/workato",
+        REAL_GATEWAY: f"http://{args.host}:{args.port}",
+    })
+    use_sqlite(args.db)
+
+    import importlib
+    import uvicorn
+
+    module_name, _, attribute = args.app.partition(":")
+    app = getattr(importlib.import_module(module_name), attribute or "app")
+    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
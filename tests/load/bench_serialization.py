@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+"""
+Micro-benchmarks for response serialization on the REST request path.
+
+Each payload is a realistic OpenAI object (a 100-message thread page, an
+assistant with large tool_resources, 100 vector store files, a run, ...). For
+every payload two things are measured:
+
+    components  json.loads, Model(**data), model_validate_json,
+                model_dump_json, json.dumps and orjson.dumps on their own
+    endpoints   a full in-process ASGI request through FastAPI for each
+                response path:
+                  current      Model(**data) returned with response_model
+                               (validated again and encoded by FastAPI)
+                  once         proxy_response(..., validation="on")
+                  passthrough  proxy_response(..., validation="off")
+
+Endpoint figures have the cost of an empty route subtracted (floored at
+zero), so they show serialization only. ``current`` and ``once`` responses are checked for
+equality.
+
+    python tests/load/bench_serialization.py
+    python tests/load/bench_serialization.py --messages 100 --iterations 200 --json serialization.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "app")]
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from models.models_messages import ListMessagesResponse
+from models.models_assistants import AssistantResponse, ListAssistantsResponse
+from models.models_vector_store_files import ListVectorStoreFilesResponse
+from models.models_runs import RunResponse
+from services.json_response import proxy_response, FastJSONResponse, ORJSON_AVAILABLE
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+LOREM = ("The quarterly report shows revenue growth across all regions, with the strongest results in "
+         "EMEA. Operating costs were flat and headcount grew by four percent. ")
+
+
+# --- Payloads ------------------------------------------------------------------
+
+def message(i: int, thread_id: str) -> Dict[str, Any]:
+    return {
+        "id": f"msg_{i:024d}", "object": "thread.message", "created_at": 1717000000 + i,
+        "assistant_id": "asst_abc123" if i % 2 else None, "thread_id": thread_id,
+        "run_id": f"run_{i:024d}" if i % 2 else None, "role": "assistant" if i % 2 else "user",
+        "status": "completed", "incomplete_details": None, "completed_at": 1717000000 + i, "incomplete_at": None,
+        "content": [{"type": "text", "text": {"value": LOREM * 4, "annotations": [
+            {"type": "file_citation", "text": f"【{i}:0†source】", "start_index": 10, "end_index": 24,
+             "file_citation": {"file_id": f"file-{i:024d}"}}
+        ] if i % 3 == 0 else []}}],
+        "attachments": [], "metadata": {"source": "bench", "index": str(i)},
+    }
+
+
+def messages_page(count: int) -> Dict[str, Any]:
+    data = [message(i, "thread_abc123") for i in range(count)]
+    return {"object": "list", "data": data, "first_id": data[0]["id"], "last_id": data[-1]["id"], "has_more": True}
+
+
+def function_tool(i: int) -> Dict[str, Any]:
+    return {"type": "function", "function": {
+        "name": f"workato_action_{i}", "description": LOREM,
+        "parameters": {"type": "object", "properties": {
+            f"field_{j}": {"type": "string", "description": f"Field {j} of the action"} for j in range(8)
+        }, "required": ["field_0"]}
+    }}
+
+
+def assistant(i: int) -> Dict[str, Any]:
+    return {
+        "id": f"asst_{i:024d}", "object": "assistant", "created_at": 1717000000, "name": f"Assistant {i}",
+        "description": LOREM, "model": "gpt-4o", "instructions": LOREM * 20,
+        "tools": [{"type": "file_search"}, {"type": "code_interpreter"}] + [function_tool(j) for j in range(30)],
+        "tool_resources": {
+            "file_search": {"vector_store_ids": [f"vs_{i:024d}"]},
+            "code_interpreter": {"file_ids": [f"file-{j:024d}" for j in range(20)]},
+        },
+        "metadata": {f"key_{j}": f"value_{j}" for j in range(16)}, "top_p": 1.0, "temperature": 0.7,
+        "response_format": "auto",
+    }
+
+
+def assistants_page(count: int) -> Dict[str, Any]:
+    data = [assistant(i) for i in range(count)]
+    return {"object": "list", "data": data, "first_id": data[0]["id"], "last_id": data[-1]["id"], "has_more": False}
+
+
+def vector_store_files_page(count: int) -> Dict[str, Any]:
+    data = [{"id": f"file-{i:024d}", "object": "vector_store.file", "created_at": 1717000000 + i, "usage_bytes": 1024 * i,
+             "vector_store_id": "vs_abc123", "status": "completed", "last_error": None} for i in range(count)]
+    return {"object": "list", "data": data, "first_id": data[0]["id"], "last_id": data[-1]["id"], "has_more": True}
+
+
+def run() -> Dict[str, Any]:
+    return {
+        "id": "run_abc123", "object": "thread.run", "created_at": 1717000000, "assistant_id": "asst_abc123",
+        "thread_id": "thread_abc123", "status": "completed", "required_action": None, "last_error": None,
+        "expires_at": None, "started_at": 1717000001, "cancelled_at": None, "failed_at": None,
+        "completed_at": 1717000009, "incomplete_details": None, "model": "gpt-4o", "instructions": LOREM * 20,
+        "tools": [{"type": "function"} for _ in range(30)], "metadata": {},
+        "usage": {"prompt_tokens": 1200, "completion_tokens": 300, "total_tokens": 1500},
+        "temperature": 1.0, "top_p": 1.0, "max_prompt_tokens": None, "max_completion_tokens": None,
+        "truncation_strategy": {"type": "auto", "last_messages": None}, "response_format": "auto", "tool_choice": "auto",
+    }
+
+
+def payloads(messages: int) -> List[Tuple[str, Type[BaseModel], Dict[str, Any]]]:
+    return [
+        (f"list_messages[{messages}]", ListMessagesResponse, messages_page(messages)),
+        ("get_assistant", AssistantResponse, assistant(0)),
+        ("list_assistants[20]", ListAssistantsResponse, assistants_page(20)),
+        ("list_vector_store_files[100]", ListVectorStoreFilesResponse, vector_store_files_page(100)),
+        ("run", RunResponse, run()),
+    ]
+
+
+# --- Measurement ---------------------------------------------------------------
+
+def time_sync(fn: Callable[[], Any], iterations: int, repeat: int) -> float:
+    """Median over ``repeat`` rounds of the mean time per call, in microseconds."""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        rounds.append((time.perf_counter() - started) / iterations * 1e6)
+    return round(statistics.median(rounds), 1)
+
+
+async def time_async(fn: Callable[[], Any], iterations: int, repeat: int) -> float:
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await fn()
+        rounds.append((time.perf_counter() - started) / iterations * 1e6)
+    return round(statistics.median(rounds), 1)
+
+
+async def asgi_request(app: FastAPI, method: str, path: str) -> bytes:
+    """Run one request through the ASGI app in-process and return the body."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "", "headers": [],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    chunks = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+def build_app(cases: List[Tuple[str, Type[BaseModel], Dict[str, Any]]]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/noop")
+    async def noop():
+        return Response(b"{}", media_type="application/json")
+
+    for name, model, payload in cases:
+        body = json.dumps(payload).encode()
+
+        def register(name=name, model=model, body=body):
+            @app.get(f"/{name}/current", response_model=model)
+            async def current():
+                return model(**json.loads(body))
+
+            @app.get(f"/{name}/once", response_model=model)
+            async def once():
+                return proxy_response(body, model, validation="on")
+
+            @app.get(f"/{name}/passthrough", response_model=model)
+            async def passthrough():
+                return proxy_response(body, model, validation="off")
+
+        register()
+
+    # Run endpoints return plain upstream dicts
+    run_messages = [message(i, "thread_abc123") for i in range(20)]
+
+    @app.post("/run_messages/current", response_model=List[Dict[str, Any]])
+    async def run_messages_current():
+        return run_messages
+
+    @app.post("/run_messages/fast", response_model=List[Dict[str, Any]])
+    async def run_messages_fast():
+        return FastJSONResponse(run_messages)
+
+    return app
+
+
+def component_timings(model: Type[BaseModel], payload: Dict[str, Any], iterations: int, repeat: int) -> Dict[str, float]:
+    body = json.dumps(payload).encode()
+    data = json.loads(body)
+    instance = model(**data)
+    timings = {
+        "json.loads": time_sync(lambda: json.loads(body), iterations, repeat),
+        "Model(**data)": time_sync(lambda: model(**data), iterations, repeat),
+        "model_validate_json": time_sync(lambda: model.model_validate_json(body), iterations, repeat),
+        "model_dump_json": time_sync(lambda: instance.model_dump_json(by_alias=True), iterations, repeat),
+        "json.dumps": time_sync(lambda: json.dumps(data, ensure_ascii=False, separators=(",", ":")), iterations, repeat),
+    }
+    if ORJSON_AVAILABLE:
+        timings["orjson.dumps"] = time_sync(lambda: orjson.dumps(data), iterations, repeat)
+    return timings
+
+
+async def endpoint_timings(app: FastAPI, name: str, iterations: int, repeat: int, overhead: float) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for mode in ("current", "once", "passthrough"):
+        path = f"/{name}/{mode}"
+        results[mode] = max(0.0, round(await time_async(lambda: asgi_request(app, "GET", path), iterations, repeat) - overhead, 1))
+    current = json.loads(await asgi_request(app, "GET", f"/{name}/current"))
+    once = json.loads(await asgi_request(app, "GET", f"/{name}/once"))
+    results["once_matches_current"] = current == once
+    results["size_bytes"] = len(await asgi_request(app, "GET", f"/{name}/passthrough"))
+    return results
+
+
+async def run_messages_timings(app: FastAPI, iterations: int, repeat: int, overhead: float) -> Dict[str, float]:
+    results = {}
+    for mode in ("current", "fast"):
+        path = f"/run_messages/{mode}"
+        results[mode] = max(0.0, round(await time_async(lambda: asgi_request(app, "POST", path), iterations, repeat) - overhead, 1))
+    return results
+
+
+async def main_async(args) -> Dict[str, Any]:
+    cases = payloads(args.messages)
+    app = build_app(cases)
+    overhead = await time_async(lambda: asgi_request(app, "GET", "/noop"), args.iterations, args.repeat)
+    report: Dict[str, Any] = {"orjson": ORJSON_AVAILABLE, "framework_overhead_us": overhead, "payloads": {}}
+
+    print(f"Empty-route overhead {overhead}us (subtracted below); orjson {'on' if ORJSON_AVAILABLE else 'not installed'}\n")
+    print(f"{'endpoint (us/request)':<30} {'size':>8} {'current':>9} {'once':>9} {'passthru':>9}  match")
+    for name, model, payload in cases:
+        endpoints = await endpoint_timings(app, name, args.iterations, args.repeat, overhead)
+        components = component_timings(model, payload, args.iterations, args.repeat)
+        report["payloads"][name] = {"endpoints": endpoints, "components": components}
+        print(f"{name:<30} {endpoints['size_bytes']:>8} {endpoints['current']:>9} {endpoints['once']:>9} "
+              f"{endpoints['passthrough']:>9}  {'yes' if endpoints['once_matches_current'] else 'NO'}")
+
+    run_messages = await run_messages_timings(app, args.iterations, args.repeat, overhead)
+    report["run_messages[20]"] = run_messages
+    print(f"{'run_messages[20] (POST)':<30} {'':>8} {run_messages['current']:>9} {'':>9} {run_messages['fast']:>9}")
+
+    print(f"\n{'component (us/call)':<30} " + " ".join(f"{key:>19}" for key in report["payloads"][cases[0][0]]["components"]))
+    for name, result in report["payloads"].items():
+        print(f"{name:<30} " + " ".join(f"{value:>19}" for value in result["components"].values()))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization micro-benchmarks for the REST response path")
+    parser.add_argument("--messages", type=int, default=100, help="Messages in the thread page payload")
+    parser.add_argument("--iterations", type=int, default=100, help="Calls per timing round")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing rounds; the median is reported")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
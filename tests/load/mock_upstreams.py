@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the OpenAI and Workato APIs used by the load tests.
+
+Emulates the Assistants endpoints the service calls (threads, messages, runs
+with status transitions and ``requires_action``, streamed runs), Chat
+Completions (plain and streamed) and Workato recipe endpoints. Every response
+waits ``--latency-ms`` (plus up to ``--jitter-ms``), and every Nth OpenAI call
+can be answered with a 429 to exercise the rate-limit path.
+
+    python tests/load/mock_upstreams.py --port 8900 --latency-ms 50 --rate-limit-every 20
+
+``GET /_mock/stats`` returns request counts per route.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from aiohttp import web
+
+REPLY = "This is a canned reply from the load-test stand-in. It has a few sentences. Each one is streamed separately."
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    # Answer every Nth OpenAI request with a 429 (0 disables)
+    rate_limit_every: int = 0
+    # Status polls before a run completes
+    run_polls: int = 2
+    # Runs ask for one tool call before completing
+    requires_action: bool = False
+    tool_name: str = "send_workato_assistant_request"
+    stream_chunk_delay_ms: float = 5.0
+
+
+@dataclass
+class _RunState:
+    thread_id: str
+    assistant_id: str
+    polls: int = 0
+    tool_outputs_submitted: bool = False
+    status: str = "queued"
+
+
+@dataclass
+class MockState:
+    config: MockConfig
+    runs: Dict[str, _RunState] = field(default_factory=dict)
+    requests: Counter = field(default_factory=Counter)
+    openai_calls: int = 0
+    rate_limited: int = 0
+    ids: Any = field(default_factory=lambda: itertools.count(1))
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self.ids):012d}"
+
+
+def _rate_limit_headers() -> Dict[str, str]:
+    return {
+        "x-ratelimit-limit-requests": "10000",
+        "x-ratelimit-remaining-requests": "9999",
+        "x-ratelimit-reset-requests": "6ms",
+        "x-ratelimit-limit-tokens": "2000000",
+        "x-ratelimit-remaining-tokens": "1999000",
+        "x-ratelimit-reset-tokens": "30ms",
+    }
+
+
+def _run_object(run_id: str, run: _RunState, config: MockConfig) -> Dict[str, Any]:
+    body = {
+        "id": run_id,
+        "object": "thread.run",
+        "created_at": int(time.time()),
+        "thread_id": run.thread_id,
+        "assistant_id": run.assistant_id,
+        "status": run.status,
+        "model": "gpt-4o",
+        "instructions": "",
+        "tools": [],
+        "metadata": {},
+        "required_action": None,
+    }
+    if run.status == "requires_action":
+        body["required_action"] = {
+            "type": "submit_tool_outputs",
+            "submit_tool_outputs": {"tool_calls": [{
+                "id": f"call_{run_id[-8:]}",
+                "type": "function",
+                "function": {"name": config.tool_name, "arguments": json.dumps({"data_type": "load_test", "info": "ping"})}
+            }]}
+        }
+    return body
+
+
+def _message_object(state: MockState, thread_id: str, role: str, text: str) -> Dict[str, Any]:
+    return {
+        "id": state.new_id("msg"),
+        "object": "thread.message",
+        "created_at": int(time.time()),
+        "thread_id": thread_id,
+        "role": role,
+        "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+        "attachments": [],
+        "metadata": {},
+    }
+
+
+def _advance(run: _RunState, config: MockConfig) -> None:
+    """Move a run one step along queued -> in_progress -> [requires_action] -> completed."""
+    if run.status in ("completed", "cancelled", "requires_action"):
+        return
+    run.polls += 1
+    if run.polls < config.run_polls:
+        run.status = "in_progress"
+    elif config.requires_action and not run.tool_outputs_submitted:
+        run.status = "requires_action"
+    else:
+        run.status = "completed"
+
+
+def build_app(config: MockConfig) -> web.Application:
+    state = MockState(config)
+
+    @web.middleware
+    async def latency_and_limits(request: web.Request, handler):
+        state.requests[f"{request.method} {request.match_info.route.resource.canonical if request.match_info.route.resource else request.path}"] += 1
+        if request.path.startswith("/_mock"):
+            return await handler(request)
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+        if request.path.startswith("/v1/"):
+            state.openai_calls += 1
+            if config.rate_limit_every and state.openai_calls % config.rate_limit_every == 0:
+                state.rate_limited += 1
+                return web.json_response(
+                    {"error": {"message": "Rate limit reached (load test)", "type": "requests", "code": "rate_limit_exceeded"}},
+                    status=429,
+                    headers={**_rate_limit_headers(), "x-ratelimit-remaining-requests": "0", "retry-after-ms": "50"}
+                )
+        response = await handler(request)
+        if request.path.startswith("/v1/") and not response.prepared:
+            response.headers.update(_rate_limit_headers())
+        return response
+
+    async def body_of(request: web.Request) -> Dict[str, Any]:
+        if not request.can_read_body:
+            return {}
+        try:
+            return await request.json()
+        except ValueError:
+            return {}
+
+    # --- Assistants ---------------------------------------------------------
+
+    async def list_assistants(request: web.Request) -> web.Response:
+        data = [{"id": f"asst_load{i:04d}", "object": "assistant", "created_at": 0, "name": f"Load {i}", "model": "gpt-4o",
+                 "instructions": "", "tools": [], "metadata": {}} for i in range(int(request.query.get("limit", 20)))]
+        return web.json_response({"object": "list", "data": data, "first_id": data[0]["id"] if data else None,
+                                  "last_id": data[-1]["id"] if data else None, "has_more": False})
+
+    async def get_assistant(request: web.Request) -> web.Response:
+        return web.json_response({"id": request.match_info["assistant_id"], "object": "assistant", "created_at": 0,
+                                  "name": "Load test", "model": "gpt-4o", "instructions": "", "tools": [], "metadata": {}})
+
+    async def create_thread(request: web.Request) -> web.Response:
+        return web.json_response({"id": state.new_id("thread"), "object": "thread", "created_at": int(time.time()), "metadata": {}})
+
+    async def create_message(request: web.Request) -> web.Response:
+        body = await body_of(request)
+        content = body.get("content")
+        text = content if isinstance(content, str) else json.dumps(content)
+        return web.json_response(_message_object(state, request.match_info["thread_id"], body.get("role", "user"), text))
+
+    async def list_messages(request: web.Request) -> web.Response:
+        message = _message_object(state, request.match_info["thread_id"], "assistant", REPLY)
+        return web.json_response({"object": "list", "data": [message], "first_id": message["id"],
+                                  "last_id": message["id"], "has_more": False})
+
+    async def stream_run(request: web.Request, run_id: str, run: _RunState) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", **_rate_limit_headers()})
+        await response.prepare(request)
+
+        async def send(event: str, data: Any) -> None:
+            await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+
+        run.status = "in_progress"
+        await send("thread.run.created", _run_object(run_id, run, config))
+        message_id = state.new_id("msg")
+        for word in REPLY.split(" "):
+            await asyncio.sleep(config.stream_chunk_delay_ms / 1000)
+            await send("thread.message.delta", {"id": message_id, "object": "thread.message.delta", "delta": {
+                "content": [{"index": 0, "type": "text", "text": {"value": word + " ", "annotations": []}}]}})
+        run.status = "completed"
+        await send("thread.run.completed", _run_object(run_id, run, config))
+        await response.write(b"event: done\ndata: [DONE]\n\n")
+        return response
+
+    async def create_run(request: web.Request) -> web.StreamResponse:
+        body = await body_of(request)
+        thread_id = request.match_info.get("thread_id") or state.new_id("thread")
+        run_id = state.new_id("run")
+        run = state.runs[run_id] = _RunState(thread_id, body.get("assistant_id", "asst_load"))
+        if body.get("stream"):
+            return await stream_run(request, run_id, run)
+        return web.json_response(_run_object(run_id, run, config))
+
+    async def get_run(request: web.Request) -> web.Response:
+        run_id = request.match_info["run_id"]
+        run = state.runs.get(run_id)
+        if run is None:
+            return web.json_response({"error": {"message": f"No run found with id '{run_id}'."}}, status=404)
+        _advance(run, config)
+        return web.json_response(_run_object(run_id, run, config))
+
+    async def submit_tool_outputs(request: web.Request) -> web.Response:
+        run_id = request.match_info["run_id"]
+        run = state.runs[run_id]
+        run.tool_outputs_submitted = True
+        run.status = "in_progress"
+        return web.json_response(_run_object(run_id, run, config))
+
+    async def cancel_run(request: web.Request) -> web.Response:
+        run_id = request.match_info["run_id"]
+        run = state.runs[run_id]
+        run.status = "cancelled"
+        return web.json_response(_run_object(run_id, run, config))
+
+    # --- Chat Completions ---------------------------------------------------
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await body_of(request)
+        completion_id = state.new_id("chatcmpl")
+        model = body.get("model", "gpt-4o")
+        if not body.get("stream"):
+            return web.json_response({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}
+            })
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", **_rate_limit_headers()})
+        await response.prepare(request)
+        for word in REPLY.split(" "):
+            await asyncio.sleep(config.stream_chunk_delay_ms / 1000)
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    # --- Workato ------------------------------------------------------------
+
+    async def workato(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "recipe": request.match_info["recipe"], "received": await body_of(request)})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({"requests": dict(state.requests), "openai_calls": state.openai_calls,
+                                  "rate_limited": state.rate_limited, "runs": len(state.runs)})
+
+    app = web.Application(middlewares=[latency_and_limits])
+    app.router.add_get("/v1/assistants", list_assistants)
+    app.router.add_get("/v1/assistants/{assistant_id}", get_assistant)
+    app.router.add_post("/v1/threads", create_thread)
+    app.router.add_post("/v1/threads/runs", create_run)
+    app.router.add_post("/v1/threads/{thread_id}/messages", create_message)
+    app.router.add_get("/v1/threads/{thread_id}/messages", list_messages)
+    app.router.add_post("/v1/threads/{thread_id}/runs", create_run)
+    app.router.add_get("/v1/threads/{thread_id}/runs/{run_id}", get_run)
+    app.router.add_post("/v1/threads/{thread_id}/runs/{run_id}/submit_tool_outputs", submit_tool_outputs)
+    app.router.add_post("/v1/threads/{thread_id}/runs/{run_id}/cancel", cancel_run)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/workato/{recipe:.*}", workato)
+    app.router.add_get("/_mock/stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI/Workato stand-in for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth OpenAI call with 429 (0 disables)")
+    parser.add_argument("--run-polls", type=int, default=2, help="Status polls before a run completes")
+    parser.add_argument("--requires-action", action="store_true", help="Runs request one tool call before completing")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_every=args.rate_limit_every,
+        run_polls=args.run_polls,
+        requires_action=args.requires_action
+    )
+    web.run_app(build_app(config), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+"""
+Offline load test for the REST, completions and WebSocket paths.
+
+Starts the OpenAI/Workato stand-in and the app (see ``mock_upstreams.py`` and
+``app_server.py``) as subprocesses, drives each scenario with a fixed number
+of concurrent workers for a fixed duration, and reports throughput and
+latency percentiles. With ``--baseline`` the run fails (exit code 1) when a
+scenario's p99 or throughput regresses by more than ``--max-regression``.
+
+    python tests/load/run_load.py --concurrency 20 --duration 30 --json results.json
+    python tests/load/run_load.py --baseline results.json --max-regression 0.2
+
+Scenarios:
+    rest_runs    POST /api/v2/runs/run_thread_and_list_messages
+    completions  POST /api/v3/agent/request
+    websocket    chat_message on /ws/assistant/{id}; also reports time to first chunk
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from sqlite_db import create_database, LOAD_CONSUMER_KEY
+
+ASSISTANT_ID = "asst_load0001"
+SCENARIOS = ("rest_runs", "completions", "websocket")
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    duration: float
+    latencies: List[float] = field(default_factory=list)
+    first_chunk: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def summary(self) -> Dict[str, float]:
+        ok = len(self.latencies)
+        summary = {
+            "requests": ok,
+            "errors": sum(self.errors.values()),
+            "rps": round(ok / self.duration, 2) if self.duration else 0.0,
+            "p50_ms": percentile(self.latencies, 50),
+            "p95_ms": percentile(self.latencies, 95),
+            "p99_ms": percentile(self.latencies, 99),
+            "max_ms": round(max(self.latencies) * 1000, 1) if self.latencies else 0.0,
+        }
+        if self.first_chunk:
+            summary["first_chunk_p50_ms"] = percentile(self.first_chunk, 50)
+            summary["first_chunk_p99_ms"] = percentile(self.first_chunk, 99)
+        return summary
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (seconds), in milliseconds."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[index] * 1000, 1)
+
+
+# --- Scenarios -----------------------------------------------------------------
+
+async def rest_runs(session: aiohttp.ClientSession, app_url: str, result: ScenarioResult, deadline: float) -> None:
+    headers = {"solomon-consumer-key": LOAD_CONSUMER_KEY}
+    body = {"thread_id": "thread_load0001", "assistant_id": ASSISTANT_ID}
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        async with session.post(f"{app_url}/api/v2/runs/run_thread_and_list_messages", json=body, headers=headers) as response:
+            await response.read()
+            if response.status != 200:
+                result.error(str(response.status))
+                continue
+        result.latencies.append(time.perf_counter() - started)
+
+
+async def completions(session: aiohttp.ClientSession, app_url: str, result: ScenarioResult, deadline: float) -> None:
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        async with session.post(f"{app_url}/api/v3/agent/request", json={"prompt": "Say hello"}) as response:
+            await response.read()
+            if response.status != 200:
+                result.error(str(response.status))
+                continue
+        result.latencies.append(time.perf_counter() - started)
+
+
+async def websocket(session: aiohttp.ClientSession, app_url: str, result: ScenarioResult, deadline: float) -> None:
+    ws_url = app_url.replace("http", "ws", 1) + f"/ws/assistant/{ASSISTANT_ID}"
+    async with session.ws_connect(ws_url) as ws:
+        await ws.receive_json()  # connection_established
+        await ws.send_json({"type": "initialize", "solomon_consumer_key": LOAD_CONSUMER_KEY})
+        frame = await ws.receive_json()
+        if frame.get("type") != "initialized":
+            result.error(f"initialize:{frame.get('type')}")
+            return
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            first_chunk = None
+            await ws.send_json({"type": "chat_message", "message": "Say hello"})
+            while True:
+                frame = await ws.receive_json()
+                if frame["type"] == "content_chunk" and first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+                elif frame["type"] in ("processing_complete", "error"):
+                    break
+            if frame["type"] == "error":
+                result.error("error_frame")
+                continue
+            result.latencies.append(time.perf_counter() - started)
+            if first_chunk is not None:
+                result.first_chunk.append(first_chunk)
+
+
+SCENARIO_FUNCS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "rest_runs": rest_runs,
+    "completions": completions,
+    "websocket": websocket,
+}
+
+
+async def run_scenario(name: str, app_url: str, concurrency: int, duration: float) -> ScenarioResult:
+    scenario = SCENARIO_FUNCS[name]
+    result = ScenarioResult(name, duration)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=120)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        deadline = time.monotonic() + duration
+        started = time.monotonic()
+
+        async def worker():
+            try:
+                await scenario(session, app_url, result, deadline)
+            except Exception as e:
+                result.error(type(e).__name__)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        # In-flight requests finish after the deadline; count the real elapsed time
+        result.duration = time.monotonic() - started
+    return result
+
+
+# --- Processes -----------------------------------------------------------------
+
+def start_process(args: List[str], log_path: Optional[str]) -> subprocess.Popen:
+    """Run a helper script; its output goes to ``log_path`` unless that is None."""
+    output = open(log_path, "w") if log_path else None
+    return subprocess.Popen([sys.executable, *args], cwd=HERE, stdout=output, stderr=subprocess.STDOUT if output else None)
+
+
+async def wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], max_regression: float) -> List[str]:
+    """Regressions of p99 latency or throughput beyond ``max_regression``."""
+    failures = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous.get("p99_ms") and current["p99_ms"] > previous["p99_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p99 {current['p99_ms']}ms vs baseline {previous['p99_ms']}ms")
+        if previous.get("rps") and current["rps"] < previous["rps"] * (1 - max_regression):
+            failures.append(f"{name}: {current['rps']} req/s vs baseline {previous['rps']} req/s")
+    return failures
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{'scenario':<12} {'reqs':>6} {'errs':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, s in results.items():
+        print(f"{name:<12} {s['requests']:>6} {s['errors']:>5} {s['rps']:>8} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9} {s['max_ms']:>9}")
+        if "first_chunk_p50_ms" in s:
+            print(f"{'':<12} first chunk p50 {s['first_chunk_p50_ms']}ms, p99 {s['first_chunk_p99_ms']}ms")
+
+
+async def main_async(args) -> int:
+    processes = []
+    app_url = args.app_url
+    try:
+        if not app_url:
+            mock_url = f"http://127.0.0.1:{args.mock_port}"
+            work_dir = tempfile.mkdtemp(prefix="solomon-load-")
+            db_path = os.path.join(work_dir, "load.db")
+            create_database(db_path)
+            log_dir = None if args.verbose else work_dir
+            processes.append(start_process([
+                "mock_upstreams.py", "--port", str(args.mock_port),
+                "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+                "--rate-limit-every", str(args.rate_limit_every), "--run-polls", str(args.run_polls),
+                *(["--requires-action"] if args.requires_action else [])
+            ], log_dir and os.path.join(log_dir, "mock.log")))
+            processes.append(start_process(
+                ["app_server.py", "--port", str(args.app_port), "--mock-url", mock_url, "--db", db_path],
+                log_dir and os.path.join(log_dir, "app.log")
+            ))
+            if log_dir:
+                print(f"Server logs in {log_dir}")
+            app_url = f"http://127.0.0.1:{args.app_port}"
+            await wait_ready(f"{mock_url}/_mock/stats")
+            await wait_ready(f"{app_url}/health")
+
+        results = {}
+        for name in args.scenarios:
+            print(f"Running {name}: {args.concurrency} workers for {args.duration:.0f}s")
+            result = await run_scenario(name, app_url, args.concurrency, args.duration)
+            results[name] = result.summary()
+            if result.errors:
+                print(f"  errors: {result.errors}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against local OpenAI/Workato/DB stand-ins")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), type=lambda value: [s for s in value.split(",") if s])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per scenario")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Mock returns 429 on every Nth OpenAI call")
+    parser.add_argument("--run-polls", type=int, default=2)
+    parser.add_argument("--requires-action", action="store_true", help="Mock runs request a Workato tool call")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--app-port", type=int, default=8901)
+    parser.add_argument("--app-url", help="Load an already running app instead of starting one")
+    parser.add_argument("--verbose", action="store_true", help="Show mock and app output instead of writing it to log files")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed fractional regression (default 0.2)")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+SQLite stand-in for the ``dbo.solConnect*`` SQL Server tables.
+
+The database file is attached under the name ``dbo`` so the service's
+queries run unchanged, and T-SQL ``SELECT TOP n`` is rewritten to ``LIMIT n``.
+"""
+import re
+import sqlite3
+
+from sqlalchemy import create_engine, event
+
+LOAD_CONSUMER_KEY = "load-test-consumer-key"
+LOAD_OPENAI_API_KEY = "sk-load-test-0000000000000000"
+LOAD_EMAIL = "load@example.com"
+LOAD_WORKSPACE = "load"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solConnectConsumers (
+    solomon_consumer_key TEXT PRIMARY KEY,
+    customer_name TEXT,
+    aws_key TEXT,
+    create_date TEXT DEFAULT CURRENT_TIMESTAMP,
+    modified_on TEXT DEFAULT CURRENT_TIMESTAMP,
+    plan_level TEXT,
+    customer_email TEXT,
+    openai_api_key TEXT,
+    workspace_name TEXT,
+    assistant_builder_id TEXT
+);
+CREATE TABLE IF NOT EXISTS solConnectUsers (
+    customer_email TEXT,
+    workspace_name TEXT,
+    solomon_consumer_key TEXT
+);
+CREATE TABLE IF NOT EXISTS solConnectThreads (
+    thread_id TEXT PRIMARY KEY,
+    thread_name TEXT,
+    solomon_consumer_key TEXT
+);
+CREATE TABLE IF NOT EXISTS solConnect_AssistantBuilderThreads (
+    thread_id TEXT PRIMARY KEY,
+    thread_name TEXT,
+    solomon_consumer_key TEXT,
+    assistant_id TEXT
+);
+CREATE TABLE IF NOT EXISTS solConnectTeams (
+    solomon_consumer_key TEXT,
+    origin_assistant_id TEXT,
+    callable_assistant_id TEXT,
+    callable_assistant_reason TEXT
+);
+"""
+
+_TOP = re.compile(r"^(\s*SELECT\s+)TOP\s+(\d+)\s+", re.IGNORECASE)
+
+
+def create_database(path: str, threads: int = 20) -> None:
+    """Create the tables and seed one load-test consumer with a few threads."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.execute(
+            "INSERT OR REPLACE INTO solConnectConsumers (solomon_consumer_key, customer_name, plan_level, customer_email,"
+            " openai_api_key, workspace_name, assistant_builder_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (LOAD_CONSUMER_KEY, "Load Test", "pro", LOAD_EMAIL, LOAD_OPENAI_API_KEY, LOAD_WORKSPACE, "asst_builder0001")
+        )
+        conn.execute("DELETE FROM solConnectUsers WHERE customer_email = ?", (LOAD_EMAIL,))
+        conn.execute("INSERT INTO solConnectUsers VALUES (?, ?, ?)", (LOAD_EMAIL, LOAD_WORKSPACE, LOAD_CONSUMER_KEY))
+        conn.executemany(
+            "INSERT OR REPLACE INTO solConnectThreads VALUES (?, ?, ?)",
+            [(f"thread_load{i:04d}", f"Load thread {i}", LOAD_CONSUMER_KEY) for i in range(threads)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def create_sqlite_engine(path: str):
+    """SQLAlchemy engine that serves ``dbo.*`` from ``path``."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def attach(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"ATTACH DATABASE '{path}' AS dbo")
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def rewrite_top(conn, cursor, statement, parameters, context, executemany):
+        match = _TOP.match(statement)
+        if match:
+            statement = f"{match.group(1)}{statement[match.end():].rstrip().rstrip(';')} LIMIT {match.group(2)}"
+        return statement, parameters
+
+    return engine
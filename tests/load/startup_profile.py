@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+"""
+Startup profile: what importing the app costs, and how long a cold process
+takes to serve its first requests.
+
+Import report
+    Imports ``app.main`` in a fresh interpreter under ``python -X importtime``,
+    with the environment from ``app_server.py`` (mock OpenAI URL, SQLite
+    database), and reports the total import time, the slowest modules by
+    cumulative time, and self time summed per third-party package and per
+    app module.
+
+Cold start
+    Starts the mock upstreams and ``app_server.py`` as in ``run_load.py`` and
+    measures, from process spawn, the time until the app answers, then the
+    latency of the first and second request to each probe (``--probe``). A
+    gap between the two is work done on first use. The app's own timings
+    from ``GET /startup/stats`` (import, lifespan, warm-up) are included.
+
+    python tests/load/startup_profile.py --runs 3 --json startup.json
+    python tests/load/startup_profile.py --baseline startup.json --max-regression 0.2
+
+With ``--baseline`` the run fails (exit code 1) when the import time, time to
+ready or the time from spawn to a probe's first response regresses by more
+than ``--max-regression``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+APP_DIR = os.path.join(ROOT, "app")
+sys.path.insert(0, HERE)
+
+from run_load import start_process, wait_ready
+from sqlite_db import create_database
+
+MARKER = "--- startup_profile: importing app ---"
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Imports the app the way app_server.py does, timing only the app import
+BOOTSTRAP = """
+import importlib, json, sys, time
+from app_server import configure_environment, use_sqlite
+configure_environment({mock_url!r})
+use_sqlite({db!r})
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+started = time.perf_counter()
+importlib.import_module({module!r})
+print(json.dumps({{"import_seconds": time.perf_counter() - started}}))
+"""
+
+# The completions endpoint uses a lazily built OpenAI client
+DEFAULT_PROBES = ["GET /", "POST /api/v3/agent/request"]
+PROBE_BODIES = {"/api/v3/agent/request": {"prompt": "Say hello"}}
+
+
+# --- Import report -------------------------------------------------------------
+
+def _app_modules() -> set:
+    names = set()
+    for entry in os.listdir(APP_DIR):
+        if entry.endswith(".py"):
+            names.add(entry[:-3])
+        elif os.path.isdir(os.path.join(APP_DIR, entry)) and not entry.startswith(("_", ".")):
+            # Some (e.g. models) are namespace packages
+            names.add(entry)
+    return names
+
+
+def group_name(module: str, app_modules: set) -> str:
+    """``app:routers.router_auth`` for app modules, the top-level package otherwise."""
+    parts = module.split(".")
+    if parts[0] == "app" and len(parts) > 1:
+        parts = parts[1:]
+    if parts[0] in app_modules:
+        return "app:" + ".".join(parts[:2])
+    return parts[0]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) for imports after the marker."""
+    _, _, after = stderr.partition(MARKER)
+    rows = []
+    for line in after.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), (len(match.group(3)) - 1) // 2))
+    return rows
+
+
+def profile_imports(module: str, mock_url: str, db_path: str) -> Dict[str, Any]:
+    code = BOOTSTRAP.format(mock_url=mock_url, db=db_path, marker=MARKER, module=module)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=HERE, capture_output=True, text=True)
+    if completed.returncode != 0:
+        tail = "\n".join(line for line in completed.stderr.splitlines() if not line.startswith("import time:"))
+        raise RuntimeError(f"Importing {module} failed:\n{tail[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    rows = parse_importtime(completed.stderr)
+    app_modules = _app_modules()
+    groups: Dict[str, int] = {}
+    for name, self_us, _, _ in rows:
+        key = group_name(name, app_modules)
+        groups[key] = groups.get(key, 0) + self_us
+    return {
+        "import_ms": round(result["import_seconds"] * 1000, 1),
+        "modules": len(rows),
+        "top_cumulative_ms": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(self_us / 1000, 1)}
+            for name, self_us, cumulative, _ in sorted(rows, key=lambda row: row[2], reverse=True)
+        ],
+        "groups_ms": {name: round(us / 1000, 1) for name, us in sorted(groups.items(), key=lambda item: item[1], reverse=True)},
+    }
+
+
+# --- Cold start ----------------------------------------------------------------
+
+async def _wait_answering(url: str, started: float, timeout: float = 60.0) -> float:
+    """Seconds from ``started`` until ``url`` answers; polls more finely than ``wait_ready``."""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    return time.perf_counter() - started
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.02)
+    raise RuntimeError(f"{url} did not answer within {timeout:.0f}s")
+
+
+async def _probe(session: aiohttp.ClientSession, app_url: str, probe: str) -> Tuple[float, int]:
+    method, _, path = probe.partition(" ")
+    started = time.perf_counter()
+    async with session.request(method, f"{app_url}{path}", json=PROBE_BODIES.get(path)) as response:
+        await response.read()
+        return time.perf_counter() - started, response.status
+
+
+async def cold_start(args, mock_url: str, db_path: str, log_path: Optional[str]) -> Dict[str, Any]:
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    started = time.perf_counter()
+    process = start_process(
+        ["app_server.py", "--port", str(args.app_port), "--mock-url", mock_url, "--db", db_path, "--app", args.app],
+        log_path
+    )
+    try:
+        ready = await _wait_answering(f"{app_url}/", started)
+        result: Dict[str, Any] = {"ready_ms": round(ready * 1000, 1), "probes": {}}
+        async with aiohttp.ClientSession() as session:
+            for probe in args.probe:
+                first, status = await _probe(session, app_url, probe)
+                # What a caller whose request started the container waits for
+                from_spawn = time.perf_counter() - started
+                second, _ = await _probe(session, app_url, probe)
+                result["probes"][probe] = {
+                    "status": status,
+                    "first_ms": round(first * 1000, 1),
+                    "second_ms": round(second * 1000, 1),
+                    "from_spawn_ms": round(from_spawn * 1000, 1),
+                }
+            # Give the background warm-up a moment to report
+            deadline = time.monotonic() + args.warmup_timeout
+            stats: Dict[str, Any] = {}
+            while time.monotonic() < deadline:
+                async with session.get(f"{app_url}/startup/stats") as response:
+                    stats = await response.json() if response.status == 200 else {}
+                if not stats or "warmup" in stats.get("phases_ms", {}):
+                    break
+                await asyncio.sleep(0.2)
+            result["app"] = stats
+        return result
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+# --- Report --------------------------------------------------------------------
+
+def median_run(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The first run's details, with headline figures replaced by the median over all runs."""
+    summary = dict(runs[0])
+    summary["runs"] = len(runs)
+    summary["import_ms"] = round(statistics.median(run["import_ms"] for run in runs), 1)
+    if "ready_ms" in runs[0]:
+        summary["ready_ms"] = round(statistics.median(run["ready_ms"] for run in runs), 1)
+        summary["probes"] = {
+            probe: {
+                **values,
+                "first_ms": round(statistics.median(run["probes"][probe]["first_ms"] for run in runs), 1),
+                "second_ms": round(statistics.median(run["probes"][probe]["second_ms"] for run in runs), 1),
+                "from_spawn_ms": round(statistics.median(run["probes"][probe]["from_spawn_ms"] for run in runs), 1),
+            }
+            for probe, values in runs[0]["probes"].items()
+        }
+    return summary
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    failures = []
+    pairs = [("import", current.get("import_ms"), baseline.get("import_ms")),
+             ("ready", current.get("ready_ms"), baseline.get("ready_ms"))]
+    for probe, values in current.get("probes", {}).items():
+        # Work moved from import to first use shows up in first_ms but not here
+        pairs.append((f"{probe} from spawn", values["from_spawn_ms"], baseline.get("probes", {}).get(probe, {}).get("from_spawn_ms")))
+    for name, now, before in pairs:
+        if now is not None and before and now > before * (1 + max_regression):
+            failures.append(f"{name}: {now}ms vs baseline {before}ms")
+    return failures
+
+
+def print_report(summary: Dict[str, Any], top: int) -> None:
+    print(f"\nImport of app.main: {summary['import_ms']}ms ({summary['modules']} modules, median of {summary['runs']})")
+    print(f"\n{'slowest imports (cumulative)':<60} {'cum ms':>9} {'self ms':>9}")
+    for row in summary["top_cumulative_ms"][:top]:
+        print(f"{row['module']:<60} {row['cumulative_ms']:>9} {row['self_ms']:>9}")
+    print(f"\n{'self time by package / app module':<60} {'ms':>9}")
+    for name, ms in list(summary["groups_ms"].items())[:top]:
+        print(f"{name:<60} {ms:>9}")
+    if "ready_ms" in summary:
+        print(f"\nCold start: answering after {summary['ready_ms']}ms from process spawn")
+        print(f"{'probe':<40} {'status':>6} {'first ms':>9} {'second ms':>10} {'from spawn ms':>14}")
+        for probe, values in summary["probes"].items():
+            print(f"{probe:<40} {values['status']:>6} {values['first_ms']:>9} {values['second_ms']:>10} {values['from_spawn_ms']:>14}")
+        phases = summary.get("app", {}).get("phases_ms", {})
+        if phases:
+            print("App timings: " + ", ".join(f"{name} {ms}ms" for name, ms in phases.items()))
+
+
+async def main_async(args) -> int:
+    work_dir = tempfile.mkdtemp(prefix="solomon-startup-")
+    db_path = os.path.join(work_dir, "load.db")
+    create_database(db_path)
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    module = args.app.partition(":")[0]
+    log_dir = None if args.verbose else work_dir
+
+    mock = None
+    if not args.imports_only:
+        mock = start_process(["mock_upstreams.py", "--port", str(args.mock_port), "--latency-ms", str(args.latency_ms)],
+                             log_dir and os.path.join(log_dir, "mock.log"))
+    runs = []
+    try:
+        if mock is not None:
+            await wait_ready(f"{mock_url}/_mock/stats")
+        for run in range(args.runs):
+            result = profile_imports(module, mock_url, db_path)
+            if mock is not None:
+                result.update(await cold_start(args, mock_url, db_path, log_dir and os.path.join(log_dir, f"app-{run}.log")))
+            runs.append(result)
+    finally:
+        if mock is not None:
+            mock.terminate()
+            mock.wait(timeout=10)
+
+    summary = median_run(runs)
+    print_report(summary, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(summary, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report and cold start timings for the app")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app to profile")
+    parser.add_argument("--runs", type=int, default=1, help="Repeat and report the median")
+    parser.add_argument("--top", type=int, default=25, help="Rows per table")
+    parser.add_argument("--imports-only", action="store_true", help="Skip the cold start measurement")
+    parser.add_argument("--probe", action="append", default=None,
+                        help=f"'METHOD /path' requested twice after startup (default: {', '.join(DEFAULT_PROBES)})")
+    parser.add_argument("--warmup-timeout", type=float, default=10.0, help="Seconds to wait for the app's warm-up timings")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock upstream latency")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--app-port", type=int, default=8901)
+    parser.add_argument("--verbose", action="store_true", help="Show mock and app output instead of writing it to log files")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Report file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed fractional regression (default 0.2)")
+    args = parser.parse_args()
+    args.probe = args.probe or DEFAULT_PROBES
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
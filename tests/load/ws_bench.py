@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""
+WebSocket streaming benchmark with concurrency sweeps.
+
+Opens N concurrent sessions, runs the initialize + chat protocol on each and
+records, per level of N:
+
+    connect_ready   connect until the server reports the bridge is ready
+    first_chunk     chat message sent until the first content chunk
+    chunk_gap       time between consecutive content chunks
+    completion      chat message sent until the reply is complete
+
+N is swept (``--sweep 1,2,4,8,16``) and the saturation point is the last
+level before throughput stops growing by ``--min-gain`` while completion p99
+keeps rising, or errors appear. Dividing by ``--workers`` gives the
+sessions one server worker sustains.
+
+Against a running server:
+
+    python tests/load/ws_bench.py --url ws://localhost:8000 --consumer-key KEY --assistant-id asst_... --sweep 1,4,16,64
+
+Offline, against the local stand-ins from ``run_load.py``:
+
+    python tests/load/ws_bench.py --offline --sweep 1,2,4,8,16,32 --csv ws.csv --json ws.json
+
+``--protocol legacy`` targets the standalone ``/ws`` server
+(``app.api.websocket.websocket_server``). CSV output is appended to, with a
+``label`` column (the git commit by default), so runs across commits can be
+compared in one file.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from run_load import percentile, start_process, wait_ready
+from sqlite_db import create_database, LOAD_CONSUMER_KEY
+
+# Per protocol: path, frame types marking ready / chunk / done / error
+PROTOCOLS = {
+    "assistant": {"ready": "initialized", "chunk": "content_chunk", "done": "processing_complete", "error": "error"},
+    "legacy": {"ready": "ready", "chunk": "stream", "done": "completion", "error": "error"},
+}
+APPS = {"assistant": "app.main:app", "legacy": "app.api.websocket.websocket_server:app"}
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    wall_time: float = 0.0
+    sessions_ok: int = 0
+    sessions_failed: int = 0
+    messages: int = 0
+    connect_ready: List[float] = field(default_factory=list)
+    first_chunk: List[float] = field(default_factory=list)
+    chunk_gaps: List[float] = field(default_factory=list)
+    completion: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def row(self, label: str, workers: int) -> Dict[str, Any]:
+        total_sessions = self.sessions_ok + self.sessions_failed
+        return {
+            "label": label,
+            "concurrency": self.concurrency,
+            "sessions_per_worker": round(self.concurrency / workers, 2),
+            "sessions_ok": self.sessions_ok,
+            "sessions_failed": self.sessions_failed,
+            "error_rate": round(self.sessions_failed / total_sessions, 4) if total_sessions else 0.0,
+            "messages": self.messages,
+            "messages_per_sec": round(self.messages / self.wall_time, 2) if self.wall_time else 0.0,
+            "connect_ready_p50_ms": percentile(self.connect_ready, 50),
+            "connect_ready_p99_ms": percentile(self.connect_ready, 99),
+            "first_chunk_p50_ms": percentile(self.first_chunk, 50),
+            "first_chunk_p99_ms": percentile(self.first_chunk, 99),
+            "chunk_gap_p50_ms": percentile(self.chunk_gaps, 50),
+            "chunk_gap_p99_ms": percentile(self.chunk_gaps, 99),
+            "chunk_gap_max_ms": percentile(self.chunk_gaps, 100),
+            "completion_p50_ms": percentile(self.completion, 50),
+            "completion_p99_ms": percentile(self.completion, 99),
+            "errors": json.dumps(self.errors, sort_keys=True) if self.errors else "",
+        }
+
+
+async def _receive(ws: aiohttp.ClientWebSocketResponse, timeout: float) -> Dict[str, Any]:
+    message = await ws.receive(timeout=timeout)
+    if message.type != aiohttp.WSMsgType.TEXT:
+        raise ConnectionError(f"unexpected websocket message {message.type.name}")
+    return json.loads(message.data)
+
+
+async def run_session(session: aiohttp.ClientSession, args, result: LevelResult) -> None:
+    frames = PROTOCOLS[args.protocol]
+    base = args.url.rstrip("/")
+    url = f"{base}/ws/assistant/{args.assistant_id}" if args.protocol == "assistant" else f"{base}/ws"
+
+    started = time.perf_counter()
+    async with session.ws_connect(url, heartbeat=None) as ws:
+        if args.protocol == "assistant":
+            await _receive(ws, args.timeout)  # connection_established
+            await ws.send_json({"type": "initialize", "solomon_consumer_key": args.consumer_key})
+        else:
+            await ws.send_json({"solomon_consumer_key": args.consumer_key, "assistant_id": args.assistant_id})
+        frame = await _receive(ws, args.timeout)
+        if frame.get("type") != frames["ready"]:
+            raise RuntimeError(f"initialize:{frame.get('type')}")
+        result.connect_ready.append(time.perf_counter() - started)
+
+        for _ in range(args.messages):
+            if args.protocol == "assistant":
+                await ws.send_json({"type": "chat_message", "message": args.message})
+            else:
+                await ws.send_json({"type": "message", "content": args.message, "stream": True})
+            sent = last_chunk = time.perf_counter()
+            first = True
+            while True:
+                frame = await _receive(ws, args.timeout)
+                frame_type = frame.get("type")
+                now = time.perf_counter()
+                if frame_type == frames["chunk"]:
+                    if first:
+                        result.first_chunk.append(now - sent)
+                        first = False
+                    else:
+                        result.chunk_gaps.append(now - last_chunk)
+                    last_chunk = now
+                elif frame_type == frames["done"]:
+                    result.completion.append(now - sent)
+                    result.messages += 1
+                    break
+                elif frame_type == frames["error"]:
+                    raise RuntimeError("error_frame")
+
+
+async def run_level(concurrency: int, args) -> LevelResult:
+    result = LevelResult(concurrency)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def one(index: int):
+            # Spread connection attempts over the ramp window
+            if args.ramp and concurrency > 1:
+                await asyncio.sleep(args.ramp * index / concurrency)
+            try:
+                await run_session(session, args, result)
+                result.sessions_ok += 1
+            except Exception as e:
+                result.sessions_failed += 1
+                result.error(str(e) if isinstance(e, RuntimeError) else type(e).__name__)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(concurrency)))
+        result.wall_time = time.perf_counter() - started
+    return result
+
+
+def find_saturation(rows: List[Dict[str, Any]], min_gain: float, max_error_rate: float) -> Optional[Dict[str, Any]]:
+    """
+    Last level that still scaled: the next level either failed sessions or
+    gained less than ``min_gain`` throughput while completion p99 grew.
+    None when every level scaled.
+    """
+    for previous, current in zip(rows, rows[1:]):
+        if current["error_rate"] > max_error_rate:
+            return previous
+        gain = current["messages_per_sec"] / previous["messages_per_sec"] - 1 if previous["messages_per_sec"] else 0.0
+        if gain < min_gain and current["completion_p99_ms"] > previous["completion_p99_ms"]:
+            return previous
+    return None
+
+
+def git_label() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_csv(path: str, rows: List[Dict[str, Any]]) -> None:
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        if not exists:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    print(f"\n{'N':>5} {'ok':>5} {'fail':>5} {'msg/s':>8} {'ready p99':>10} {'ttfc p50':>9} {'ttfc p99':>9} {'gap p99':>8} {'done p50':>9} {'done p99':>9}")
+    for r in rows:
+        print(f"{r['concurrency']:>5} {r['sessions_ok']:>5} {r['sessions_failed']:>5} {r['messages_per_sec']:>8} "
+              f"{r['connect_ready_p99_ms']:>10} {r['first_chunk_p50_ms']:>9} {r['first_chunk_p99_ms']:>9} "
+              f"{r['chunk_gap_p99_ms']:>8} {r['completion_p50_ms']:>9} {r['completion_p99_ms']:>9}")
+
+
+async def main_async(args) -> int:
+    processes = []
+    try:
+        if args.offline:
+            mock_url = f"http://127.0.0.1:{args.mock_port}"
+            work_dir = tempfile.mkdtemp(prefix="solomon-wsbench-")
+            db_path = os.path.join(work_dir, "load.db")
+            create_database(db_path)
+            processes.append(start_process(
+                ["mock_upstreams.py", "--port", str(args.mock_port), "--latency-ms", str(args.latency_ms)],
+                os.path.join(work_dir, "mock.log")
+            ))
+            processes.append(start_process(
+                ["app_server.py", "--port", str(args.app_port), "--mock-url", mock_url, "--db", db_path, "--app", APPS[args.protocol]],
+                os.path.join(work_dir, "app.log")
+            ))
+            print(f"Server logs in {work_dir}")
+            args.url = f"ws://127.0.0.1:{args.app_port}"
+            await wait_ready(f"{mock_url}/_mock/stats")
+            await wait_ready(f"http://127.0.0.1:{args.app_port}/docs")
+
+        rows = []
+        for concurrency in args.sweep:
+            print(f"Level {concurrency}: {concurrency} sessions x {args.messages} messages")
+            result = await run_level(concurrency, args)
+            rows.append(result.row(args.label, args.workers))
+            if result.errors:
+                print(f"  errors: {result.errors}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    print_table(rows)
+    saturation = find_saturation(rows, args.min_gain, args.max_error_rate)
+    if saturation:
+        print(f"\nSaturation at {saturation['concurrency']} sessions "
+              f"({saturation['sessions_per_worker']} per worker, {saturation['messages_per_sec']} msg/s)")
+    else:
+        print("\nNo saturation within the sweep")
+
+    if args.csv:
+        write_csv(args.csv, rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "label": args.label,
+                "protocol": args.protocol,
+                "workers": args.workers,
+                "messages_per_session": args.messages,
+                "levels": rows,
+                "saturation": saturation,
+            }, f, indent=2)
+    return 1 if rows and all(row["sessions_ok"] == 0 for row in rows) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket streaming benchmark with concurrency sweeps")
+    parser.add_argument("--url", default="ws://localhost:8000", help="Server base URL")
+    parser.add_argument("--protocol", choices=sorted(PROTOCOLS), default="assistant",
+                        help="assistant: /ws/assistant/{id} (app.main); legacy: /ws (websocket_server)")
+    parser.add_argument("--assistant-id", default="asst_load0001")
+    parser.add_argument("--consumer-key", default=LOAD_CONSUMER_KEY)
+    parser.add_argument("--message", default="Say hello")
+    parser.add_argument("--messages", type=int, default=3, help="Chat messages per session")
+    parser.add_argument("--sweep", default="1,2,4,8,16,32", type=lambda value: [int(n) for n in value.split(",") if n])
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which each level's sessions connect")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for any one frame")
+    parser.add_argument("--workers", type=int, default=1, help="Server worker processes, for per-worker figures")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="Throughput gain below which a level counts as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--label", default=None, help="Row label (default: current git commit)")
+    parser.add_argument("--csv", help="Append one row per level to this CSV file")
+    parser.add_argument("--json", help="Write the sweep to this JSON file")
+    parser.add_argument("--offline", action="store_true", help="Start the mock upstreams and app locally")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock upstream latency (--offline)")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--app-port", type=int, default=8901)
+    args = parser.parse_args()
+    args.label = args.label or git_label()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
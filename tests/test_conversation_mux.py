@@ -0,0 +1,84 @@
+"""
+Unit tests for the per-socket conversation map in app/services/conversation_mux.py.
+
+    python -m pytest tests/test_conversation_mux.py
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.conversation_mux import ConversationLimitError, ConversationMux
+
+
+def test_add_replaces_and_cancels_existing_conversation():
+    async def scenario():
+        mux = ConversationMux(max_conversations=2)
+        first = await mux.add("c1", "asst_1", bridge="old")
+        first.generation.start(asyncio.sleep(10))
+        second = await mux.add("c1", "asst_2", bridge="new")
+        return mux, first, second
+
+    mux, first, second = asyncio.run(scenario())
+    assert len(mux) == 1
+    assert mux.get("c1") is second
+    assert second.bridge == "new"
+    assert not first.generation.is_running
+
+
+def test_full_mux_evicts_least_recently_used_idle_conversation():
+    async def scenario():
+        mux = ConversationMux(max_conversations=2)
+        older = await mux.add("c1", "asst", bridge=None)
+        newer = await mux.add("c2", "asst", bridge=None)
+        older.last_used, newer.last_used = 1.0, 2.0
+        await mux.add("c3", "asst", bridge=None)
+        return mux
+
+    assert sorted(asyncio.run(scenario()).ids()) == ["c2", "c3"]
+
+
+def test_busy_conversations_are_never_evicted():
+    async def scenario():
+        mux = ConversationMux(max_conversations=2)
+        busy = await mux.add("c1", "asst", bridge=None)
+        idle = await mux.add("c2", "asst", bridge=None)
+        busy.generation.start(asyncio.sleep(10))
+        busy.last_used, idle.last_used = 1.0, 2.0
+        await mux.add("c3", "asst", bridge=None)
+        ids = sorted(mux.ids())
+        await mux.close()
+        return ids
+
+    assert asyncio.run(scenario()) == ["c1", "c3"]
+
+
+def test_full_mux_of_busy_conversations_refuses_another():
+    async def scenario():
+        mux = ConversationMux(max_conversations=1)
+        busy = await mux.add("c1", "asst", bridge=None)
+        busy.generation.start(asyncio.sleep(10))
+        try:
+            await mux.add("c2", "asst", bridge=None)
+        finally:
+            await mux.close()
+
+    with pytest.raises(ConversationLimitError):
+        asyncio.run(scenario())
+
+
+def test_close_cancels_every_generation():
+    async def scenario():
+        mux = ConversationMux()
+        conversations = [await mux.add(f"c{i}", "asst", bridge=None) for i in range(3)]
+        for conversation in conversations:
+            conversation.generation.start(asyncio.sleep(10))
+        await mux.close()
+        return mux, conversations
+
+    mux, conversations = asyncio.run(scenario())
+    assert len(mux) == 0
+    assert not any(c.generation.is_running for c in conversations)
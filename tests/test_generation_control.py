@@ -0,0 +1,88 @@
+"""
+Unit tests for the cancellable generation task in app/services/generation_control.py.
+
+    python -m pytest tests/test_generation_control.py
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.generation_control import GenerationTask
+
+
+def test_cancel_without_generation_returns_false():
+    async def scenario():
+        return await GenerationTask().cancel()
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_cancel_stops_generation_and_runs_cleanup():
+    cleaned_up = []
+
+    async def generate():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cleaned_up.append(True)
+
+    async def scenario():
+        generation = GenerationTask()
+        generation.start(generate())
+        await asyncio.sleep(0)
+        assert generation.is_running
+        stopped = await generation.cancel()
+        return stopped, generation.is_running
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert cleaned_up == [True]
+
+
+def test_start_refuses_a_second_generation():
+    async def scenario():
+        generation = GenerationTask()
+        generation.start(asyncio.sleep(10))
+        second = asyncio.sleep(0)
+        try:
+            with pytest.raises(RuntimeError):
+                generation.start(second)
+        finally:
+            second.close()
+            await generation.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_finished_generation_can_be_followed_by_another():
+    async def scenario():
+        generation = GenerationTask()
+        await generation.start(asyncio.sleep(0, result="first"))
+        assert not generation.is_running
+        return await generation.start(asyncio.sleep(0, result="second"))
+
+    assert asyncio.run(scenario()) == "second"
+
+
+def test_cancel_gives_up_on_a_generation_that_ignores_it():
+    release = []
+
+    async def stubborn():
+        while not release:
+            try:
+                await asyncio.sleep(0.01)
+            except asyncio.CancelledError:
+                continue
+
+    async def scenario():
+        generation = GenerationTask()
+        generation.start(stubborn())
+        await asyncio.sleep(0)
+        stopped = await generation.cancel(timeout=0.05)
+        release.append(True)
+        return stopped
+
+    assert asyncio.run(scenario()) is True
@@ -0,0 +1,211 @@
+"""
+Unit tests for the per-tenant metadata cache in app/services/metadata_cache.py.
+
+    python -m pytest tests/test_metadata_cache.py
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services import metadata_cache
+from services.metadata_cache import MetadataCache
+
+
+class Clock:
+    """Stands in for ``time.monotonic`` so entries can be aged."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metadata_cache.time, "monotonic", clock)
+    return clock
+
+
+def make_cache(**kwargs):
+    options = dict(ttl=30.0, stale_ttl=300.0, max_entries=100, enabled=True)
+    options.update(kwargs)
+    return MetadataCache(**options)
+
+
+class Loader:
+    """Returns ``value`` and counts calls; optionally blocks until released."""
+
+    def __init__(self, value="v1"):
+        self.value = value
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return self.value
+
+
+def test_fresh_entry_is_served_from_cache(clock):
+    cache = make_cache()
+    loader = Loader()
+
+    async def scenario():
+        first = await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+        clock.now += 29
+        second = await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+        return first, second
+
+    assert asyncio.run(scenario()) == ("v1", "v1")
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_served_while_refreshing(clock):
+    cache = make_cache()
+    loader = Loader()
+
+    async def scenario():
+        await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+        loader.value = "v2"
+        clock.now += 60
+        stale = await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+        await asyncio.sleep(0)
+        refreshed = await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+        return stale, refreshed
+
+    assert asyncio.run(scenario()) == ("v1", "v2")
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_expired_entry_is_loaded_again(clock):
+    cache = make_cache()
+    loader = Loader()
+
+    async def scenario():
+        await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+        loader.value = "v2"
+        clock.now += 331
+        return await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+
+    assert asyncio.run(scenario()) == "v2"
+    assert loader.calls == 2
+
+
+def test_tenants_do_not_share_entries(clock):
+    cache = make_cache()
+
+    async def scenario():
+        a = await cache.get_or_load("tenant-a", "assistant", ("asst_1",), Loader("a"))
+        b = await cache.get_or_load("tenant-b", "assistant", ("asst_1",), Loader("b"))
+        return a, b
+
+    assert asyncio.run(scenario()) == ("a", "b")
+
+
+def test_concurrent_misses_share_one_load(clock):
+    cache = make_cache()
+    loader = Loader()
+
+    async def scenario():
+        loader.release = asyncio.Event()
+        tasks = [asyncio.create_task(cache.get_or_load("tenant", "assistant", ("asst_1",), loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == ["v1"] * 5
+    assert loader.calls == 1
+
+
+def test_invalidate_by_param_prefix(clock):
+    cache = make_cache()
+
+    async def scenario():
+        for params in (("vs_1", "file_1"), ("vs_1", "file_2"), ("vs_2", "file_1")):
+            await cache.get_or_load("tenant", "vector_store_file", params, Loader())
+        removed = cache.invalidate("tenant", "vector_store_file", "vs_1")
+        return removed, cache.stats()["entries"]
+
+    assert asyncio.run(scenario()) == (2, 1)
+
+
+def test_lru_eviction(clock):
+    cache = make_cache(max_entries=2)
+
+    async def scenario():
+        await cache.get_or_load("tenant", "file", ("f1",), Loader())
+        await cache.get_or_load("tenant", "file", ("f2",), Loader())
+        await cache.get_or_load("tenant", "file", ("f1",), Loader())
+        await cache.get_or_load("tenant", "file", ("f3",), Loader())
+        reload = Loader()
+        await cache.get_or_load("tenant", "file", ("f2",), reload)
+        return reload.calls
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_load_started_before_invalidation_is_not_stored(clock):
+    cache = make_cache()
+    old = Loader("old")
+
+    async def scenario():
+        old.release = asyncio.Event()
+        before = asyncio.create_task(cache.get_or_load("tenant", "assistant", ("asst_1",), old))
+        await asyncio.sleep(0)
+
+        # A write lands while the read is still in flight
+        cache.invalidate("tenant", "assistant", "asst_1")
+
+        # Callers after the invalidation don't join the older load
+        new = Loader("new")
+        after = await cache.get_or_load("tenant", "assistant", ("asst_1",), new)
+
+        old.release.set()
+        stale = await before
+        cached = await cache.get_or_load("tenant", "assistant", ("asst_1",), Loader("unused"))
+        return stale, after, cached
+
+    assert asyncio.run(scenario()) == ("old", "new", "new")
+
+
+def test_refresh_started_before_invalidation_is_not_stored(clock):
+    cache = make_cache()
+
+    async def scenario():
+        await cache.get_or_load("tenant", "assistant", ("asst_1",), Loader("v1"))
+        clock.now += 60
+
+        refresh = Loader("outdated")
+        refresh.release = asyncio.Event()
+        await cache.get_or_load("tenant", "assistant", ("asst_1",), refresh)
+        await asyncio.sleep(0)
+
+        cache.invalidate("tenant", "assistant", "asst_1")
+        await cache.get_or_load("tenant", "assistant", ("asst_1",), Loader("v2"))
+
+        refresh.release.set()
+        await asyncio.sleep(0)
+        return await cache.get_or_load("tenant", "assistant", ("asst_1",), Loader("unused"))
+
+    assert asyncio.run(scenario()) == "v2"
+
+
+def test_disabled_cache_always_loads(clock):
+    cache = make_cache(enabled=False)
+    loader = Loader()
+
+    async def scenario():
+        for _ in range(3):
+            await cache.get_or_load("tenant", "assistant", ("asst_1",), loader)
+
+    asyncio.run(scenario())
+    assert loader.calls == 3
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,266 @@
+"""
+Unit tests for the circuit breaker and retry policy in app/services/resilience.py.
+
+    python -m pytest tests/test_resilience.py
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services import resilience
+from services.resilience import CircuitBreaker, CircuitOpenError, Failure, RetryPolicy, Upstream
+
+
+class Clock:
+    """Stands in for ``time.monotonic`` so breaker timeouts can be stepped through."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+    return clock
+
+
+def make_upstream(attempts=3, threshold=2, reset=10.0):
+    return Upstream(
+        name="test",
+        connect_timeout=1.0,
+        read_timeout=1.0,
+        retry=RetryPolicy(attempts=attempts, base_delay=0.0, max_delay=0.0),
+        breaker=CircuitBreaker("test", failure_threshold=threshold, reset_timeout=reset),
+    )
+
+
+def counting(classify_as=Failure(counts=True, never_sent=True)):
+    return lambda e: classify_as
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+# --- CircuitBreaker ----------------------------------------------------------------
+
+def test_opens_after_threshold_and_rejects(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_half_open_admits_a_single_trial(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_trial_success_closes(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_half_open_trial_failure_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_released_trial_lets_the_next_call_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.before_call()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+
+
+# --- Upstream.acall ----------------------------------------------------------------
+
+def test_cancelled_trial_does_not_wedge_the_circuit(clock):
+    upstream = make_upstream()
+    open_breaker(upstream.breaker)
+    clock.now += 10
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        task = asyncio.create_task(upstream.acall(hang))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async def ok():
+            return "ok"
+
+        return await upstream.acall(ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_acall_retries_then_succeeds(clock):
+    upstream = make_upstream(attempts=3, threshold=10)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("refused")
+        return "ok"
+
+    assert asyncio.run(upstream.acall(flaky, classify=counting())) == "ok"
+    assert len(calls) == 3
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_acall_non_counting_error_does_not_close_half_open_circuit(clock):
+    upstream = make_upstream()
+    open_breaker(upstream.breaker)
+    clock.now += 10
+
+    async def bad_request():
+        raise ValueError("400 Bad Request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(upstream.acall(bad_request, classify=counting(Failure(counts=False))))
+    assert upstream.breaker.state == CircuitBreaker.HALF_OPEN
+    upstream.breaker.before_call()
+
+
+# --- Upstream.call -----------------------------------------------------------------
+
+def test_non_counting_error_does_not_close_open_circuit(clock):
+    upstream = make_upstream(attempts=1, threshold=2)
+    open_breaker(upstream.breaker)
+    clock.now += 10
+
+    def bad_request():
+        raise ValueError("400 Bad Request")
+
+    with pytest.raises(ValueError):
+        upstream.call(bad_request, classify=counting(Failure(counts=False)))
+    assert upstream.breaker.state == CircuitBreaker.HALF_OPEN
+    assert upstream.breaker.failures == 2
+
+
+def test_non_counting_error_does_not_reset_failure_count(clock):
+    upstream = make_upstream(attempts=1, threshold=2)
+    with pytest.raises(ConnectionError):
+        upstream.call(lambda: (_ for _ in ()).throw(ConnectionError("refused")), classify=counting())
+    with pytest.raises(ValueError):
+        upstream.call(lambda: (_ for _ in ()).throw(ValueError("bad")), classify=counting(Failure(counts=False)))
+    with pytest.raises(ConnectionError):
+        upstream.call(lambda: (_ for _ in ()).throw(ConnectionError("refused")), classify=counting())
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+
+
+def test_call_clamps_attempt_timeout_to_deadline(clock):
+    upstream = make_upstream(attempts=3, threshold=10)
+    timeouts = []
+
+    def failing(timeout):
+        timeouts.append(timeout)
+        clock.now += 1.5
+        raise ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        upstream.call(failing, deadline=3.5, timeout=(1.0, 60.0), classify=counting())
+    assert timeouts == [(1.0, 3.5), (1.0, 2.0)]
+
+
+def test_call_with_spent_deadline_does_not_call(clock):
+    upstream = make_upstream()
+    with pytest.raises(resilience.requests.exceptions.Timeout):
+        upstream.call(lambda timeout: pytest.fail("called past the deadline"), deadline=0, timeout=5.0)
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_call_gives_up_after_attempts(clock):
+    upstream = make_upstream(attempts=2, threshold=10)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        upstream.call(failing, classify=counting())
+    assert len(calls) == 2
+
+
+def test_call_does_not_repeat_non_idempotent_request_that_may_have_been_sent(clock):
+    upstream = make_upstream(attempts=3, threshold=10)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise TimeoutError("read timed out")
+
+    with pytest.raises(TimeoutError):
+        upstream.call(failing, idempotent=False, classify=counting(Failure(counts=True)))
+    assert len(calls) == 1
+
+
+def test_call_stops_retrying_at_deadline(clock):
+    upstream = make_upstream(attempts=5, threshold=10)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        clock.now += 2
+        raise ConnectionError("refused")
+
+    # Each attempt takes 2s and the next would need the 1s connect timeout
+    with pytest.raises(ConnectionError):
+        upstream.call(failing, deadline=4.5, classify=counting())
+    assert len(calls) == 2
+
+
+def test_server_error_result_is_retried_and_returned(clock):
+    upstream = make_upstream(attempts=2, threshold=10)
+    results = iter([503, 502])
+    assert upstream.call(lambda: next(results), is_failure=lambda status: status >= 500) == 502
+
+
+def test_open_circuit_rejects_without_calling(clock):
+    upstream = make_upstream(attempts=1, threshold=1)
+    with pytest.raises(ConnectionError):
+        upstream.call(lambda: (_ for _ in ()).throw(ConnectionError("refused")), classify=counting())
+    with pytest.raises(CircuitOpenError):
+        upstream.call(lambda: pytest.fail("upstream called while open"))
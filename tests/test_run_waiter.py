@@ -0,0 +1,145 @@
+"""
+Unit tests for the run waiter in app/services/run_waiter.py.
+
+    python -m pytest tests/test_run_waiter.py
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.run_waiter import (
+    BackoffPolicy,
+    RunActionError,
+    RunCancelledError,
+    RunTimeoutError,
+    RunWaiter,
+)
+
+FAST = BackoffPolicy(initial=0.001, maximum=0.005)
+
+
+class FakeRuns:
+    """``client.beta.threads.runs`` returning scripted statuses; the last one repeats."""
+
+    def __init__(self, statuses, tool_calls=None):
+        self.statuses = list(statuses)
+        self.tool_calls = tool_calls or []
+        self.retrieved = 0
+        self.cancelled = []
+        self.submitted = []
+
+    async def retrieve(self, thread_id, run_id):
+        status = self.statuses[min(self.retrieved, len(self.statuses) - 1)]
+        self.retrieved += 1
+        run = {"id": run_id, "status": status}
+        if status == "requires_action":
+            run["required_action"] = {"submit_tool_outputs": {"tool_calls": self.tool_calls}}
+        return run
+
+    async def cancel(self, thread_id, run_id):
+        self.cancelled.append(run_id)
+
+    async def submit_tool_outputs(self, thread_id, run_id, tool_outputs):
+        self.submitted.append(tool_outputs)
+        # The run moves on once outputs are in
+        self.statuses = ["completed"]
+        self.retrieved = 0
+
+
+class FakeClient:
+    def __init__(self, runs):
+        self.beta = type("Beta", (), {})()
+        self.beta.threads = type("Threads", (), {})()
+        self.beta.threads.runs = runs
+
+
+TOOL_CALL = {"id": "call_1", "type": "function", "function": {"name": "lookup", "arguments": "{}"}}
+
+
+def test_returns_terminal_run():
+    runs = FakeRuns(["queued", "in_progress", "completed"])
+    run = asyncio.run(RunWaiter(FakeClient(runs), backoff=FAST).wait("t", "r"))
+
+    assert run["status"] == "completed"
+    assert runs.retrieved == 3
+    assert runs.cancelled == []
+
+
+def test_deadline_cancels_run_upstream():
+    runs = FakeRuns(["in_progress"])
+    waiter = RunWaiter(FakeClient(runs), timeout=0.02, backoff=FAST)
+
+    with pytest.raises(RunTimeoutError):
+        asyncio.run(waiter.wait("t", "r"))
+    assert runs.cancelled == ["r"]
+
+
+def test_cancel_event_cancels_run_upstream():
+    runs = FakeRuns(["in_progress"])
+
+    async def scenario():
+        cancel_event = asyncio.Event()
+        waiter = RunWaiter(FakeClient(runs), backoff=BackoffPolicy(initial=10.0), cancel_event=cancel_event)
+        task = asyncio.create_task(waiter.wait("t", "r"))
+        await asyncio.sleep(0.01)
+        cancel_event.set()
+        await task
+
+    with pytest.raises(RunCancelledError):
+        asyncio.run(scenario())
+    assert runs.cancelled == ["r"]
+
+
+def test_task_cancellation_cancels_run_upstream():
+    runs = FakeRuns(["in_progress"])
+
+    async def scenario():
+        task = asyncio.create_task(RunWaiter(FakeClient(runs), backoff=BackoffPolicy(initial=10.0)).wait("t", "r"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
+    assert runs.cancelled == ["r"]
+
+
+def test_requires_action_submits_tool_outputs():
+    runs = FakeRuns(["requires_action"], tool_calls=[TOOL_CALL])
+    seen = []
+
+    async def handler(tool_calls):
+        seen.extend(tool_calls)
+        return [{"tool_call_id": call["id"], "output": "42"} for call in tool_calls]
+
+    run = asyncio.run(RunWaiter(FakeClient(runs), tool_handler=handler, backoff=FAST).wait("t", "r"))
+
+    assert run["status"] == "completed"
+    assert seen == [TOOL_CALL]
+    assert runs.submitted == [[{"tool_call_id": "call_1", "output": "42"}]]
+
+
+def test_requires_action_without_handler_fails():
+    runs = FakeRuns(["requires_action"], tool_calls=[TOOL_CALL])
+
+    with pytest.raises(RunActionError):
+        asyncio.run(RunWaiter(FakeClient(runs), backoff=FAST).wait("t", "r"))
+    assert runs.cancelled == ["r"]
+    assert runs.submitted == []
+
+
+def test_slow_tool_handler_hits_deadline():
+    runs = FakeRuns(["requires_action"], tool_calls=[TOOL_CALL])
+
+    async def handler(tool_calls):
+        await asyncio.sleep(10)
+
+    waiter = RunWaiter(FakeClient(runs), tool_handler=handler, timeout=0.02, backoff=FAST)
+    with pytest.raises(RunTimeoutError):
+        asyncio.run(waiter.wait("t", "r"))
+    assert runs.cancelled == ["r"]
+    assert runs.submitted == []
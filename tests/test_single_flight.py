@@ -0,0 +1,120 @@
+"""
+Unit tests for request coalescing in app/services/single_flight.py.
+
+    python -m pytest tests/test_single_flight.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.single_flight import SingleFlight
+
+
+class Loader:
+    """Counts calls and blocks until released, so callers overlap."""
+
+    def __init__(self, result="value", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+async def overlap(flight, loader, keys):
+    loader.release = asyncio.Event()
+    tasks = [asyncio.create_task(flight.do(loader, *key)) for key in keys]
+    await asyncio.sleep(0)
+    loader.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test_share")
+    loader = Loader()
+
+    results = asyncio.run(overlap(flight, loader, [("tenant", "a")] * 5))
+
+    assert results == ["value"] * 5
+    assert loader.calls == 1
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["inflight"] == 0
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test_keys")
+    loader = Loader()
+
+    asyncio.run(overlap(flight, loader, [("tenant-a", "x"), ("tenant-b", "x")]))
+
+    assert loader.calls == 2
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flight = SingleFlight("test_errors")
+    loader = Loader(error=RuntimeError("upstream down"))
+
+    async def scenario():
+        first = await overlap(flight, loader, [("k",)] * 3)
+        loader.error = None
+        second = await overlap(flight, loader, [("k",)])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert second == ["value"]
+    assert loader.calls == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight("test_cancel")
+    loader = Loader()
+
+    async def scenario():
+        loader.release = asyncio.Event()
+        leaving = asyncio.create_task(flight.do(loader, "k"))
+        staying = asyncio.create_task(flight.do(loader, "k"))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+        return await staying, leaving.cancelled()
+
+    assert asyncio.run(scenario()) == ("value", True)
+    assert loader.calls == 1
+
+
+def test_forget_starts_a_fresh_call():
+    flight = SingleFlight("test_forget")
+    loader = Loader()
+
+    async def scenario():
+        loader.release = asyncio.Event()
+        before = asyncio.create_task(flight.do(loader, "k"))
+        await asyncio.sleep(0)
+        flight.forget("k")
+        after = asyncio.create_task(flight.do(loader, "k"))
+        await asyncio.sleep(0)
+        loader.release.set()
+        return await asyncio.gather(before, after)
+
+    assert asyncio.run(scenario()) == ["value", "value"]
+    assert loader.calls == 2
+
+
+def test_disabled_group_calls_every_time():
+    flight = SingleFlight("test_disabled", enabled=False)
+    loader = Loader()
+
+    asyncio.run(overlap(flight, loader, [("k",)] * 3))
+
+    assert loader.calls == 3
+    assert flight.stats()["coalesced"] == 0
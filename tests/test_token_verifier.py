@@ -0,0 +1,147 @@
+"""
+Unit tests for local Cognito token verification in app/services/token_verifier.py.
+
+    python -m pytest tests/test_token_verifier.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services import token_verifier as token_verifier_module
+from services.token_verifier import CognitoTokenVerifier, TokenVerificationError
+
+jwt = pytest.importorskip("jwt")
+rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+
+if not token_verifier_module.JWT_AVAILABLE:
+    pytest.skip("PyJWT with crypto support is not installed", allow_module_level=True)
+
+REGION = "eu-west-1"
+USER_POOL_ID = "eu-west-1_pool"
+CLIENT_ID = "client-123"
+ISSUER = f"https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}"
+
+SIGNING_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+ROTATED_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def make_token(key=SIGNING_KEY, kid="key-1", **overrides):
+    now = int(time.time())
+    claims = {
+        "sub": "user-1",
+        "iss": ISSUER,
+        "token_use": "access",
+        "client_id": CLIENT_ID,
+        "iat": now,
+        "exp": now + 3600,
+        "username": "alice",
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeJwks:
+    """Replaces ``_refresh_keys``: serves ``keys`` and counts fetches like the real one."""
+
+    def __init__(self, verifier, keys):
+        self.verifier = verifier
+        self.keys = keys
+        self.fetches = 0
+
+    async def __call__(self, force=False):
+        self.fetches += 1
+        self.verifier._keys = {kid: key.public_key() for kid, key in self.keys.items()}
+        self.verifier._fetched_at = time.monotonic()
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    monkeypatch.setattr(token_verifier_module, "AUTH_LOCAL_JWT", True)
+    verifier = CognitoTokenVerifier(REGION, USER_POOL_ID, CLIENT_ID)
+    jwks = FakeJwks(verifier, {"key-1": SIGNING_KEY})
+    monkeypatch.setattr(verifier, "_refresh_keys", jwks)
+    verifier.jwks = jwks
+    return verifier
+
+
+def verify(verifier, token):
+    return asyncio.run(verifier.verify(token))
+
+
+def test_valid_access_token(verifier):
+    claims = verify(verifier, make_token())
+
+    assert claims["sub"] == "user-1"
+    assert verifier.stats()["verified"] == 1
+
+
+def test_valid_id_token_checks_aud(verifier):
+    claims = verify(verifier, make_token(token_use="id", client_id=None, aud=CLIENT_ID))
+    assert claims["token_use"] == "id"
+
+
+@pytest.mark.parametrize("overrides", [
+    {"client_id": "other-client"},
+    {"iss": "https://cognito-idp.eu-west-1.amazonaws.com/other-pool"},
+    {"token_use": "refresh"},
+    {"exp": int(time.time()) - 3600},
+])
+def test_rejects_tokens_not_issued_for_this_app(verifier, overrides):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, make_token(**overrides))
+    assert verifier.stats()["rejected"] == 1
+
+
+def test_rejects_tokens_signed_with_another_key(verifier):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, make_token(key=ROTATED_KEY))
+
+
+def test_rejects_malformed_tokens(verifier):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, "not-a-jwt")
+
+
+def test_verified_tokens_are_cached(verifier):
+    token = make_token()
+    verify(verifier, token)
+    verify(verifier, token)
+
+    assert verifier.stats()["verified"] == 1
+    assert verifier.stats()["verified_cached"] == 1
+    assert verifier.jwks.fetches == 1
+
+
+def test_unknown_key_id_refetches_jwks(verifier):
+    verify(verifier, make_token())
+    verifier.jwks.keys = {"key-1": SIGNING_KEY, "key-2": ROTATED_KEY}
+
+    claims = verify(verifier, make_token(key=ROTATED_KEY, kid="key-2"))
+
+    assert claims["sub"] == "user-1"
+    assert verifier.jwks.fetches == 2
+
+
+def test_unknown_key_id_after_refetch_is_rejected(verifier):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, make_token(kid="key-9"))
+
+
+def test_disabled_without_cognito_settings(monkeypatch):
+    monkeypatch.setattr(token_verifier_module, "AUTH_LOCAL_JWT", True)
+    assert not CognitoTokenVerifier(REGION, None, CLIENT_ID).enabled
+
+
+def test_missing_pyjwt_with_cognito_settings_fails_startup(monkeypatch):
+    monkeypatch.setattr(token_verifier_module, "AUTH_LOCAL_JWT", True)
+    monkeypatch.setattr(token_verifier_module, "JWT_AVAILABLE", False)
+
+    with pytest.raises(RuntimeError):
+        CognitoTokenVerifier(REGION, USER_POOL_ID, CLIENT_ID)
+    # Without Cognito settings there's nothing to verify locally, so no error
+    assert not CognitoTokenVerifier(None, None, None).enabled
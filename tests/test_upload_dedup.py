@@ -0,0 +1,120 @@
+"""
+Unit tests for the content-hash index in app/services/upload_dedup.py.
+
+    python -m pytest tests/test_upload_dedup.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services import upload_stream
+from services.http_client import OpenAIHTTPError
+from services.upload_dedup import UploadDedupIndex, _DisabledIndex
+from services.upload_stream import find_uploaded_file
+
+
+@pytest.fixture
+def index(tmp_path):
+    return UploadDedupIndex(str(tmp_path / "nested" / "dedup.sqlite3"))
+
+
+def test_lookup_is_scoped_by_tenant_and_purpose(index):
+    index.record("consumer-a", "abc", "assistants", "file-1", size=3, filename="a.txt")
+
+    assert index.lookup("consumer-a", "abc", "assistants") == "file-1"
+    assert index.lookup("consumer-b", "abc", "assistants") is None
+    assert index.lookup("consumer-a", "abc", "fine-tune") is None
+
+
+def test_record_replaces_previous_file(index):
+    index.record("consumer", "abc", "assistants", "file-1")
+    index.record("consumer", "abc", "assistants", "file-2")
+
+    assert index.lookup("consumer", "abc", "assistants") == "file-2"
+
+
+def test_consumer_keys_are_not_stored(index):
+    index.record("secret-consumer-key", "abc", "assistants", "file-1")
+
+    conn = sqlite3.connect(index.path)
+    tenants = [row[0] for row in conn.execute("SELECT tenant FROM file_hashes")]
+    conn.close()
+    assert tenants and "secret-consumer-key" not in tenants
+
+
+def test_forget_file_drops_hashes_and_vector_store_memberships(index):
+    index.record("consumer", "abc", "assistants", "file-1")
+    index.record_vector_store_file("consumer", "vs-1", "file-1")
+
+    index.forget_file("consumer", "file-1")
+
+    assert index.lookup("consumer", "abc", "assistants") is None
+    assert not index.has_vector_store_file("consumer", "vs-1", "file-1")
+
+
+def test_vector_store_memberships(index):
+    index.record_vector_store_file("consumer", "vs-1", "file-1")
+    index.record_vector_store_file("consumer", "vs-1", "file-2")
+    index.record_vector_store_file("consumer", "vs-2", "file-1")
+
+    index.forget_vector_store_file("consumer", "vs-1", "file-2")
+    assert index.has_vector_store_file("consumer", "vs-1", "file-1")
+    assert not index.has_vector_store_file("consumer", "vs-1", "file-2")
+
+    index.forget_vector_store("consumer", "vs-1")
+    assert not index.has_vector_store_file("consumer", "vs-1", "file-1")
+    assert index.has_vector_store_file("consumer", "vs-2", "file-1")
+    assert not index.has_vector_store_file("other", "vs-2", "file-1")
+
+
+def test_disabled_index_remembers_nothing():
+    index = _DisabledIndex()
+    index.record("consumer", "abc", "assistants", "file-1")
+    index.record_vector_store_file("consumer", "vs-1", "file-1")
+
+    assert index.lookup("consumer", "abc", "assistants") is None
+    assert not index.has_vector_store_file("consumer", "vs-1", "file-1")
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.fetched = []
+
+    async def get(self, path):
+        self.fetched.append(path)
+        if self.error:
+            raise self.error
+        return {"id": path.rsplit("/", 1)[-1], "object": "file"}
+
+
+def test_find_uploaded_file_reuses_existing_file(index, monkeypatch):
+    monkeypatch.setattr(upload_stream, "dedup_index", index)
+    index.record("consumer", "abc", "assistants", "file-1")
+    client = FakeClient()
+
+    assert asyncio.run(find_uploaded_file(client, "consumer", "abc", "assistants"))["id"] == "file-1"
+    assert client.fetched == ["files/file-1"]
+
+
+def test_find_uploaded_file_forgets_files_deleted_upstream(index, monkeypatch):
+    monkeypatch.setattr(upload_stream, "dedup_index", index)
+    index.record("consumer", "abc", "assistants", "file-1")
+
+    client = FakeClient(error=OpenAIHTTPError(404, "not found"))
+    assert asyncio.run(find_uploaded_file(client, "consumer", "abc", "assistants")) is None
+    assert index.lookup("consumer", "abc", "assistants") is None
+
+
+def test_find_uploaded_file_keeps_entry_on_other_errors(index, monkeypatch):
+    monkeypatch.setattr(upload_stream, "dedup_index", index)
+    index.record("consumer", "abc", "assistants", "file-1")
+
+    client = FakeClient(error=OpenAIHTTPError(500, "boom"))
+    assert asyncio.run(find_uploaded_file(client, "consumer", "abc", "assistants")) is None
+    assert index.lookup("consumer", "abc", "assistants") == "file-1"
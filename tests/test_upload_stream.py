@@ -0,0 +1,168 @@
+"""
+Unit tests for streamed file uploads in app/services/upload_stream.py.
+
+    python -m pytest tests/test_upload_stream.py
+"""
+import asyncio
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services import upload_stream
+from services.upload_dedup import UploadDedupIndex
+from services.upload_stream import bounded_chunks, get_upload_progress, stream_upload_file
+
+
+class Sink:
+    """Collects what aiohttp would write to the connection."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    async def write(self, chunk):
+        self.data.extend(chunk)
+
+    async def write_eof(self, chunk=b""):
+        self.data.extend(chunk)
+
+
+class FakeClient:
+    """``OpenAIClient`` whose ``post`` drains the multipart body like a connection would."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.body = b""
+
+    async def post(self, path, data):
+        sink = Sink()
+        await data.write(sink)
+        self.body = bytes(sink.data)
+        if self.fail_after is not None:
+            raise ConnectionResetError("upstream closed")
+        return {"id": "file-1", "object": "file"}
+
+
+async def chunks_of(*parts):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(upload_stream, "active_uploads", {})
+    monkeypatch.setattr(upload_stream, "dedup_index", UploadDedupIndex(str(tmp_path / "dedup.sqlite3")))
+
+
+def test_bounded_chunks_never_buffers_more_than_the_limit():
+    produced = []
+
+    async def source():
+        for i in range(10):
+            produced.append(i)
+            yield bytes([i])
+
+    async def scenario():
+        received = []
+        ahead = []
+        async for chunk in bounded_chunks(source(), max_chunks=2):
+            await asyncio.sleep(0)
+            ahead.append(len(produced) - len(received))
+            received.append(chunk)
+        return received, ahead
+
+    received, ahead = asyncio.run(scenario())
+    assert received == [bytes([i]) for i in range(10)]
+    # Two queued, one being put and the one just handed out
+    assert max(ahead) <= 4
+
+
+def test_bounded_chunks_reraises_source_errors():
+    async def source():
+        yield b"a"
+        raise ValueError("client went away")
+
+    async def scenario():
+        return [chunk async for chunk in bounded_chunks(source())]
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+
+
+def test_bounded_chunks_stops_reader_when_consumer_stops():
+    async def endless():
+        while True:
+            yield b"x"
+
+    async def scenario():
+        buffered = bounded_chunks(endless(), max_chunks=1)
+        assert await buffered.__anext__() == b"x"
+        await buffered.aclose()
+        await asyncio.sleep(0)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_stream_upload_reports_progress_and_records_hash():
+    client = FakeClient()
+    updates = []
+
+    async def scenario():
+        return await stream_upload_file(
+            client, chunks_of(b"hello ", b"world"), filename="a.txt", total_bytes=11,
+            upload_id="u1", owner="consumer", on_progress=lambda p: updates.append(p.bytes_sent)
+        )
+
+    assert asyncio.run(scenario())["id"] == "file-1"
+    assert b"hello world" in client.body
+    assert updates == [6, 11]
+
+    progress = get_upload_progress("u1").to_dict()
+    assert progress["status"] == "completed"
+    assert progress["done"] is True
+    assert progress["percent"] == 100.0
+
+    sha256 = hashlib.sha256(b"hello world").hexdigest()
+    assert upload_stream.dedup_index.lookup("consumer", sha256, "assistants") == "file-1"
+
+
+def test_failed_upload_is_reported_and_not_recorded():
+    client = FakeClient(fail_after=0)
+
+    async def scenario():
+        await stream_upload_file(client, chunks_of(b"data"), filename="a.txt", upload_id="u1", owner="consumer")
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(scenario())
+
+    progress = get_upload_progress("u1")
+    assert progress.status == "failed"
+    assert "upstream closed" in progress.error
+    assert upload_stream.dedup_index.lookup("consumer", hashlib.sha256(b"data").hexdigest(), "assistants") is None
+
+
+def test_finished_progress_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(upload_stream.time, "time", lambda: now[0])
+    monkeypatch.setattr(upload_stream, "UPLOAD_PROGRESS_TTL", 60.0)
+
+    asyncio.run(stream_upload_file(FakeClient(), chunks_of(b"data"), filename="a.txt", upload_id="u1"))
+
+    now[0] += 59
+    assert get_upload_progress("u1") is not None
+    now[0] += 2
+    assert get_upload_progress("u1") is None
+
+
+def test_running_upload_never_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(upload_stream.time, "time", lambda: now[0])
+    monkeypatch.setattr(upload_stream, "UPLOAD_PROGRESS_TTL", 60.0)
+    upload_stream.active_uploads["u1"] = upload_stream.UploadProgress(upload_id="u1", filename="a.txt")
+
+    now[0] += 3600
+    assert get_upload_progress("u1") is not None
@@ -0,0 +1,185 @@
+"""
+Unit tests for the per-key rate-limit scheduler in app/services/upstream_scheduler.py.
+
+    python -m pytest tests/test_upstream_scheduler.py
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services import upstream_scheduler
+from services.upstream_scheduler import Priority, UpstreamScheduler, _Bucket, estimate_tokens, parse_duration
+
+
+class Clock:
+    """Stands in for ``time.monotonic`` so buckets can be refilled step by step."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(upstream_scheduler.time, "monotonic", clock)
+    return clock
+
+
+def limits(requests_limit, requests_remaining, tokens_limit=None, tokens_remaining=None, reset="1s"):
+    headers = {
+        "x-ratelimit-limit-requests": str(requests_limit),
+        "x-ratelimit-remaining-requests": str(requests_remaining),
+        "x-ratelimit-reset-requests": reset,
+    }
+    if tokens_limit is not None:
+        headers.update({
+            "x-ratelimit-limit-tokens": str(tokens_limit),
+            "x-ratelimit-remaining-tokens": str(tokens_remaining),
+            "x-ratelimit-reset-tokens": reset,
+        })
+    return headers
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("1s", 1.0),
+    ("6m0s", 360.0),
+    ("20ms", 0.02),
+    ("1h2m3.5s", 3723.5),
+    ("2.5", 2.5),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("value", ["", None, "soon"])
+def test_parse_duration_rejects_unknown_values(value):
+    assert parse_duration(value) is None
+
+
+def test_estimate_tokens_counts_prompt_and_completion_budget():
+    body = {"messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 100}
+    assert estimate_tokens(body) > 200
+    assert estimate_tokens(None) == 0
+
+
+def test_unknown_bucket_never_waits(clock):
+    bucket = _Bucket()
+    assert bucket.wait_time(1000) == 0.0
+
+
+def test_bucket_refills_at_learned_rate(clock):
+    bucket = _Bucket()
+    # 10 of 60 left, full again in 5s: 10 per second
+    bucket.sync(limit=60, remaining=10, reset=5.0, now=clock.now)
+    bucket.take(10)
+
+    assert bucket.wait_time(5) == pytest.approx(0.5)
+    clock.now += 0.5
+    bucket.refill(clock.now)
+    assert bucket.wait_time(5) == 0.0
+
+    clock.now += 60
+    bucket.refill(clock.now)
+    assert bucket.level == 60
+
+
+def test_requests_beyond_the_limit_wait(clock):
+    scheduler = UpstreamScheduler(enabled=True)
+    scheduler.observe("sk-a", 200, limits(60, 2, reset="2s"))
+    state = scheduler._state("sk-a")
+
+    assert scheduler._reserve(state, 0) == 0
+    assert scheduler._reserve(state, 0) == 0
+    # 58 used up over 2s: one request back every 1/29 s
+    assert scheduler._reserve(state, 0) == pytest.approx(1 / 29)
+
+
+def test_token_bucket_holds_back_large_requests(clock):
+    scheduler = UpstreamScheduler(enabled=True)
+    scheduler.observe("sk-a", 200, limits(100, 100, tokens_limit=1000, tokens_remaining=500, reset="10s"))
+    state = scheduler._state("sk-a")
+
+    assert scheduler._reserve(state, 400) == 0
+    # 100 tokens left, 50 per second back
+    assert scheduler._reserve(state, 200) == pytest.approx(2.0)
+    assert state.requests.level == 99
+
+
+def test_keys_are_paced_independently(clock):
+    scheduler = UpstreamScheduler(enabled=True)
+    scheduler.observe("sk-a", 200, limits(60, 0))
+
+    assert scheduler._reserve(scheduler._state("sk-a"), 0) > 0
+    assert scheduler._reserve(scheduler._state("sk-b"), 0) == 0
+    assert "sk-a" not in str(scheduler.stats())
+
+
+def test_rate_limited_key_is_paused(clock):
+    scheduler = UpstreamScheduler(enabled=True)
+
+    pause = scheduler.observe("sk-a", 429, {"retry-after-ms": "1500"})
+    state = scheduler._state("sk-a")
+
+    assert pause == pytest.approx(1.5)
+    assert scheduler._reserve(state, 0) == pytest.approx(1.5)
+    clock.now += 1.5
+    assert scheduler._reserve(state, 0) == 0
+
+
+def test_rate_limit_pause_falls_back_to_reset_headers_and_is_capped(clock, monkeypatch):
+    monkeypatch.setattr(upstream_scheduler, "UPSTREAM_MAX_BACKOFF", 30.0)
+    scheduler = UpstreamScheduler(enabled=True)
+
+    assert scheduler.observe("sk-a", 429, limits(60, 0, reset="6s")) == pytest.approx(6.0)
+    assert scheduler.observe("sk-b", 429, limits(60, 0, reset="6m0s")) == pytest.approx(30.0)
+
+
+def test_queued_calls_are_released_by_priority():
+    scheduler = UpstreamScheduler(enabled=True)
+    # Bucket empty, one request back every ~2ms
+    scheduler.observe("sk-a", 200, limits(60, 0, reset="100ms"))
+    released = []
+
+    async def call(name, priority):
+        await scheduler.acquire("sk-a", priority=priority)
+        released.append(name)
+
+    async def scenario():
+        await asyncio.gather(
+            call("batch", Priority.BATCH),
+            call("default", Priority.DEFAULT),
+            call("interactive", Priority.INTERACTIVE),
+        )
+
+    asyncio.run(scenario())
+    assert released == ["interactive", "default", "batch"]
+
+
+def test_disabled_scheduler_never_waits(clock):
+    scheduler = UpstreamScheduler(enabled=False)
+    scheduler.observe("sk-a", 429, {"retry-after": "60"})
+
+    asyncio.run(scheduler.acquire("sk-a"))
+    assert scheduler.stats()["keys"] == {}
+
+
+def test_acquire_blocking_without_loop_waits_for_capacity(clock, monkeypatch):
+    scheduler = UpstreamScheduler(enabled=True)
+    scheduler.observe("sk-a", 429, {"retry-after": "2"})
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(upstream_scheduler.time, "sleep", sleep)
+    scheduler.acquire_blocking("sk-a")
+
+    assert sum(slept) == pytest.approx(2.0)
@@ -0,0 +1,67 @@
+"""
+Unit tests for WebSocket frame encoding negotiation in app/services/ws_codec.py.
+
+    python -m pytest tests/test_ws_codec.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services import ws_codec
+from services.ws_codec import CompactJsonCodec, FrameDecodeError, JsonCodec, MsgpackCodec, negotiate_codec
+
+
+@pytest.mark.parametrize("protocol_version, encoding", [
+    (None, None),
+    (1, "compact"),
+    ("1", "msgpack"),
+    ("latest", "compact"),
+    (2, "xml"),
+])
+def test_negotiate_keeps_v1_json(protocol_version, encoding):
+    assert type(negotiate_codec(protocol_version, encoding)) is JsonCodec
+
+
+@pytest.mark.parametrize("encoding", [None, "compact"])
+def test_negotiate_compact(encoding):
+    assert type(negotiate_codec("2", encoding)) is CompactJsonCodec
+
+
+def test_negotiate_msgpack(monkeypatch):
+    monkeypatch.setattr(ws_codec, "MSGPACK_AVAILABLE", True)
+    assert type(negotiate_codec(2, "msgpack")) is MsgpackCodec
+
+
+def test_negotiate_msgpack_falls_back_without_package(monkeypatch):
+    monkeypatch.setattr(ws_codec, "MSGPACK_AVAILABLE", False)
+    assert type(negotiate_codec(2, "msgpack")) is CompactJsonCodec
+
+
+def test_compact_encoding_flattens_data():
+    frame = {"type": "content_chunk", "data": {"content": "Hel"}, "conversation_id": "a"}
+    assert json.loads(CompactJsonCodec().encode(frame)) == {"t": "c", "c": "Hel", "i": "a"}
+
+
+def test_compact_decoding_expands_client_frames():
+    raw = json.dumps({"t": "cm", "c": "hi", "i": "a", "extra": 1})
+    assert CompactJsonCodec().decode(raw) == {
+        "type": "chat_message", "content": "hi", "conversation_id": "a", "extra": 1,
+    }
+
+
+@pytest.mark.parametrize("raw", ["not json", "[1, 2]"])
+def test_decode_rejects_bad_frames(raw):
+    with pytest.raises(FrameDecodeError):
+        JsonCodec().decode(raw)
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    codec = MsgpackCodec()
+    encoded = codec.encode({"type": "chat_message", "data": {"content": "hi"}})
+    assert isinstance(encoded, bytes)
+    assert codec.decode(encoded) == {"type": "chat_message", "content": "hi"}